@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+应用标识常量
+
+QSettings 使用的组织名和应用名。托盘进程启动时只需要这两个常量，放在独立的轻量模块中，
+读取设置不必导入整个 search_gui_pyside。
+"""
+
+ORGANIZATION_NAME = "YourOrganizationName"  # Replace with your actual org name or identifier
+APPLICATION_NAME = "DocumentSearchToolPySide"
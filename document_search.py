@@ -2,34 +2,27 @@ import argparse
 from pathlib import Path
 import os
 import shutil
-import docx
-import jieba
 import json
 import re
 import time
 import zipfile
-import rarfile
 import tempfile
 import io
 import sys
 import multiprocessing
 import traceback
 import threading
-import pandas as pd
-import markdown
 import math
 from html.parser import HTMLParser
-from bs4 import BeautifulSoup
-from striprtf.striprtf import rtf_to_text
 import email
 from email.parser import BytesParser
 from email.header import decode_header
 from email.utils import parseaddr
-import chardet
-import extract_msg
 import csv
 from datetime import datetime
 import functools
+from contextlib import contextmanager
+import heapq
 # --- ADDED: 导入并发处理模块 ---
 import asyncio
 import concurrent.futures
@@ -75,30 +68,85 @@ def is_feature_available(feature_name):
 # --------------------------------
 
 from whoosh.index import create_in, open_dir, exists_in
-from whoosh.fields import Schema, TEXT, ID, STORED, NUMERIC, KEYWORD
+from whoosh.fields import Schema, TEXT, ID, STORED, NUMERIC, KEYWORD, FieldType
 from whoosh.analysis import Tokenizer, Token, Analyzer
 from whoosh.query import Phrase, Term, Prefix, And, Or, Not, Query, NumericRange, Every, FuzzyTerm, Wildcard, TermRange
 from whoosh import scoring
+from whoosh.sorting import Categorizer, FacetType, FieldFacet
 from whoosh.qparser import QueryParser, MultifieldParser, OrGroup, GtLtPlugin, PhrasePlugin, SequencePlugin
-from PyPDF2 import PdfReader
-import pptx
-import openpyxl
 from datetime import datetime
 import csv  # 添加用于写入TSV文件
-from tqdm import tqdm  # Added for better progress reporting
 from whoosh.highlight import Highlighter, ContextFragmenter, HtmlFormatter
 # --- ADDED: Import analysis module ---
 from whoosh import analysis
 # ------------------------------------
 
-# --- ADDED: Imports for OCR --- 
-import pytesseract
-from PIL import Image
-from pdf2image import convert_from_path, pdfinfo_from_path
-from pytesseract import TesseractError # Added
-import pdf2image
-from pdf2image.exceptions import PDFPopplerTimeoutError, PDFPageCountError # Added exceptions
-# ------------------------------
+# --- MODIFIED: 文档解析依赖延迟导入，第一次提取对应类型的文件时才加载 ---
+# 托盘启动和搜索只需要 Whoosh，不再在模块加载时导入 pandas、python-docx、OCR 等重量级依赖
+from lazy_imports import lazy_import, preload, timed_import
+import perf_trace  # ADDED: 索引与搜索热点路径的跟踪段
+
+docx = lazy_import("docx")
+jieba = lazy_import("jieba")
+rarfile = lazy_import("rarfile")
+pd = lazy_import("pandas")
+markdown = lazy_import("markdown")
+bs4 = lazy_import("bs4")
+striprtf = lazy_import("striprtf.striprtf")
+chardet = lazy_import("chardet")
+extract_msg = lazy_import("extract_msg")
+pptx = lazy_import("pptx")
+openpyxl = lazy_import("openpyxl")
+pytesseract = lazy_import("pytesseract")
+pdf2image = lazy_import("pdf2image")
+pdf2image_exceptions = lazy_import("pdf2image.exceptions")
+
+# 按扩展名登记各提取函数依赖的模块；preload_extractors() 在索引开始前按需预先加载
+EXTRACTOR_MODULES = {
+    '.docx': (docx,),
+    '.pdf': (pytesseract, pdf2image, pdf2image_exceptions),
+    '.pptx': (pptx,),
+    '.xlsx': (pd, openpyxl),
+    '.md': (markdown,),
+    '.html': (chardet, bs4),
+    '.htm': (chardet, bs4),
+    '.rtf': (striprtf,),
+    '.msg': (extract_msg, chardet, bs4),
+    '.rar': (rarfile,),
+}
+
+
+def preload_extractors(extensions, background: bool = False):
+    """
+    预先导入给定扩展名的提取依赖（例如索引前按待处理文件类型调用）
+
+    Args:
+        extensions: 扩展名集合（含点，如 '.docx'）
+        background: 为 True 时在后台线程导入并立即返回
+    """
+    modules = []
+    for ext in extensions:
+        for module in EXTRACTOR_MODULES.get(ext.lower(), ()):
+            if module not in modules:
+                modules.append(module)
+    if background:
+        return preload(modules)
+    for module in modules:
+        try:
+            module._load()
+        except ImportError as e:
+            print(f"Warning: 提取依赖导入失败: {e}", file=sys.stderr)
+    return None
+
+
+def preload_jieba_async():
+    """后台线程中导入 jieba 并加载词典，首次分词时不再等待（可重复调用）"""
+    def load_dictionary():
+        with timed_import("jieba 词典"):
+            jieba.initialize()
+
+    return preload([jieba], on_done=load_dictionary)
+# --- END MODIFIED ---
 
 # --- Constants ---
 # INDEX_DIR = "indexdir" # Commented out, will be passed as parameter
@@ -219,25 +267,28 @@ def format_skip_reason(reason_type: str, detail: str = "") -> str:
 # Set the path to the tesseract executable if it's not in PATH
 _TESSERACT_CMD = r'C:\Program Files\Tesseract-OCR\tesseract.exe' # Use double backslashes or raw string
 _tesseract_found = False
-if os.path.exists(_TESSERACT_CMD):
-     pytesseract.pytesseract.tesseract_cmd = _TESSERACT_CMD
-     _tesseract_found = True
-else:
-     if shutil.which('tesseract'):
-         # print("Tesseract executable found in PATH.") # COMMENTED OUT
-         _tesseract_found = True
-     else:
-        # print(f"Warning: Tesseract executable not found at {_TESSERACT_CMD} or in PATH. OCR will likely fail.") # COMMENTED OUT
-        pass
 
 # Path to the Poppler bin directory
 _POPPLER_PATH = r"C:\Program Files\poppler-24.08.0\Library\bin" # Use the path from user screenshot
 _poppler_found = False
-if os.path.isdir(_POPPLER_PATH) and os.path.exists(os.path.join(_POPPLER_PATH, 'pdfinfo.exe')):
-    _poppler_found = True
-else:
-    # print(f"Warning: Poppler bin directory not found or pdfinfo.exe missing at {_POPPLER_PATH}. PDF to image conversion will likely fail.") # COMMENTED OUT
-    pass
+
+
+@functools.lru_cache(maxsize=None)
+def _configure_ocr_tools() -> bool:
+    """
+    探测 Tesseract/Poppler 并配置 pytesseract（第一次需要 OCR 时调用一次，不在模块加载时进行）
+
+    Returns:
+        bool: 是否找到 Tesseract
+    """
+    global _tesseract_found, _poppler_found
+    if os.path.exists(_TESSERACT_CMD):
+        pytesseract.pytesseract.tesseract_cmd = _TESSERACT_CMD
+        _tesseract_found = True
+    elif shutil.which('tesseract'):
+        _tesseract_found = True
+    _poppler_found = os.path.isdir(_POPPLER_PATH) and os.path.exists(os.path.join(_POPPLER_PATH, 'pdfinfo.exe'))
+    return _tesseract_found
 # ------------------------------------------------------
 
 # --- Global Index Lock ---
@@ -352,14 +403,26 @@ def strip_tags(html):
 
 # --- ADDED: 并行搜索引擎优化类 ---
 class OptimizedSearchEngine:
-    """优化的并行搜索引擎"""
+    """优化的并行搜索引擎
+
+    所有搜索任务共享一个有界线程池（max_workers），异步入口运行在一个
+    常驻事件循环线程上；同步调用方通过 submit() 获得 Future。
+    """
     
     def __init__(self, max_workers: int = 4):
         self.max_workers = max_workers
         self.search_lock = Lock()
         self.result_cache = {}
         self.cache_timeout = 300  # 5分钟缓存过期
-        
+        # --- ADDED: 共享线程池与常驻事件循环 ---
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="search-worker")
+        self._loop = None
+        self._loop_thread = None
+        self._loop_lock = Lock()
+        self._channel_futures = {}  # 调用方通道 -> 最近一次 submit 的 Future，用于取消同一通道中被取代的查询
+        # -------------------------------------
+
     def _get_cache_key(self, query_str: str, search_params: dict) -> str:
         """生成缓存键"""
         import hashlib
@@ -393,22 +456,21 @@ class OptimizedSearchEngine:
     async def optimized_search(self, query_str: str, index_dir_path: str, **search_params) -> list[dict]:
         """优化的搜索入口"""
         start_time = time.time()
+        span_start = perf_trace.now()
         
-        # 移除不兼容的参数
+        # MODIFIED: search_index 已支持 limit 参数（文档命中上限），直接透传
         clean_params = search_params.copy()
-        if 'limit' in clean_params:
-            del clean_params['limit']
         
         # 生成缓存键
         cache_key = self._get_cache_key(query_str, clean_params)
         
         # 检查缓存
-        if cache_key in self.result_cache:
-            cache_entry = self.result_cache[cache_key]
-            if self._is_cache_valid(cache_entry):
-                print(f"💾 缓存命中: {query_str} ({len(cache_entry['results'])} 结果)")
-                return cache_entry['results']
-            else:
+        with self.search_lock:
+            cache_entry = self.result_cache.get(cache_key)
+            if cache_entry is not None:
+                if self._is_cache_valid(cache_entry):
+                    print(f"💾 缓存命中: {query_str} ({len(cache_entry['results'])} 结果)")
+                    return cache_entry['results']
                 # 清理过期缓存
                 del self.result_cache[cache_key]
                 
@@ -425,101 +487,79 @@ class OptimizedSearchEngine:
             results = await self._complex_search_with_optimization(query_str, index_dir_path, **clean_params)
             
         # 缓存结果
-        self.result_cache[cache_key] = {
-            'results': results,
-            'timestamp': time.time()
-        }
+        with self.search_lock:
+            self.result_cache[cache_key] = {
+                'results': results,
+                'timestamp': time.time()
+            }
         
         search_time = time.time() - start_time
+        perf_trace.record("search", span_start, complexity=complexity, results=len(results))
         print(f"⚡ 优化搜索完成: {search_time:.2f}秒, {len(results)} 结果")
         
         return results
         
+    async def _run_search_in_executor(self, query_str: str, index_dir_path: str, **search_params) -> list[dict]:
+        """在共享线程池中执行一次 search_index"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            functools.partial(search_index, query_str, index_dir_path, **search_params)
+        )
+
     async def _fast_simple_search(self, query_str: str, index_dir_path: str, **search_params) -> list[dict]:
         """快速简单搜索"""
-        loop = asyncio.get_event_loop()
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-            results = await loop.run_in_executor(
-                executor, 
-                lambda: search_index(query_str, index_dir_path, **search_params)
-            )
+        results = await self._run_search_in_executor(query_str, index_dir_path, **search_params)
         # 对于简单查询，限制返回结果数（限制到500条，优化性能）
         return results[:500] if len(results) > 500 else results
         
     async def _parallel_search(self, query_str: str, index_dir_path: str, **search_params) -> list[dict]:
         """并行搜索（适用于中等复杂度查询）"""
-        loop = asyncio.get_event_loop()
-        
-        # 创建多个搜索任务
-        tasks = []
-        
         # 如果有文件类型过滤，可以分别搜索不同类型
         file_types = search_params.get('file_type_filter')
         if file_types and len(file_types) > 1:
-            # 分文件类型并行搜索
+            # 分文件类型并行搜索：所有子查询先提交到共享线程池，再统一等待
+            tasks = []
             for file_type in file_types:
                 task_params = search_params.copy()
                 task_params['file_type_filter'] = [file_type]
-                
-                with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-                    task = loop.run_in_executor(
-                        executor,
-                        lambda ft=file_type, tp=task_params: search_index(query_str, index_dir_path, **tp)
-                    )
-                    tasks.append(task)
-                    
-            # 等待所有任务完成并合并结果
-            if tasks:
-                all_results = await asyncio.gather(*tasks)
-                merged_results = []
-                seen_paths = set()
-                
-                for results in all_results:
-                    for result in results:
-                        path = result.get('file_path')
-                        if path not in seen_paths:
-                            merged_results.append(result)
-                            seen_paths.add(path)
-                            
-                # 按相关度重新排序
-                merged_results.sort(key=lambda x: x.get('score', 0), reverse=True)
-                return merged_results[:500]  # 限制最多返回500个结果
+                tasks.append(self._run_search_in_executor(query_str, index_dir_path, **task_params))
+
+            all_results = await asyncio.gather(*tasks)
+            # 查询本身的错误（如通配符许可、语法错误）各子查询相同，只返回第一条
+            for results in all_results:
+                for result in results:
+                    if result.get('error'):
+                        return [result]
+            # 查询警告（如性能警告）各子查询相同，去重后像 search_index 一样放在结果前面
+            warnings = []
+            for results in all_results:
+                for result in results:
+                    if result.get('warning') and result not in warnings:
+                        warnings.append(result)
+            # 各文件类型的结果互不重叠，直接合并（保留同一文件的多个匹配段落）
+            merged_results = [result for results in all_results for result in results
+                              if not result.get('error') and not result.get('warning')]
+            # 按相关度重新排序
+            merged_results.sort(key=lambda x: x.get('score', 0), reverse=True)
+            return warnings + merged_results[:500]  # 限制最多返回500个结果
         
         # 如果无法并行化，使用单线程搜索
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-            results = await loop.run_in_executor(
-                executor,
-                lambda: search_index(query_str, index_dir_path, **search_params)
-            )
-        return results
+        return await self._run_search_in_executor(query_str, index_dir_path, **search_params)
         
     async def _complex_search_with_optimization(self, query_str: str, index_dir_path: str, **search_params) -> list[dict]:
         """复杂搜索优化"""
-        # 对于复杂查询，采用分阶段搜索策略
-        
-        # 第一阶段：快速文件名搜索
+        # 对于复杂查询，文件名搜索与全文搜索同时提交到共享线程池
         filename_params = search_params.copy()
         filename_params['search_scope'] = 'filename'
-        
-        loop = asyncio.get_event_loop()
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-            filename_results = await loop.run_in_executor(
-                executor,
-                lambda: search_index(query_str, index_dir_path, **filename_params)
-            )
-        
-        print(f"📁 文件名搜索: {len(filename_results)} 结果")
-        
-        # 第二阶段：全文搜索
         fulltext_params = search_params.copy()
         fulltext_params['search_scope'] = 'fulltext'
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-            fulltext_results = await loop.run_in_executor(
-                executor,
-                lambda: search_index(query_str, index_dir_path, **fulltext_params)
-            )
-            
+
+        filename_results, fulltext_results = await asyncio.gather(
+            self._run_search_in_executor(query_str, index_dir_path, **filename_params),
+            self._run_search_in_executor(query_str, index_dir_path, **fulltext_params),
+        )
+        print(f"📁 文件名搜索: {len(filename_results)} 结果")
         print(f"📄 全文搜索: {len(fulltext_results)} 结果")
         
         # 合并结果，去重，按相关度排序
@@ -537,9 +577,69 @@ class OptimizedSearchEngine:
         merged_results.sort(key=lambda x: x.get('score', 0), reverse=True)
         return merged_results[:500]  # 限制最多返回500个结果
         
+    # --- ADDED: 常驻事件循环与任务提交 ---
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """启动（或返回已启动的）常驻事件循环线程"""
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run_loop():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._loop_thread = threading.Thread(target=run_loop, name="search-event-loop", daemon=True)
+                self._loop_thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def submit(self, query_str: str, index_dir_path: str, channel: str | None = None,
+               **search_params) -> concurrent.futures.Future:
+        """从任意线程提交搜索，返回 concurrent.futures.Future
+
+        Args:
+            channel: 调用方通道名（如 "tray_quick_search"）。指定时取消同一通道上一次仍未完成的
+                     提交（被新查询取代），不影响其它调用方；已在线程池中运行的 search_index
+                     会执行完，但其结果被丢弃
+        """
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._loop_thread:
+            raise RuntimeError("不能在搜索事件循环线程中同步等待搜索结果，请直接 await optimized_search")
+        future = asyncio.run_coroutine_threadsafe(
+            self.optimized_search(query_str, index_dir_path, **search_params), loop)
+        if channel is None:
+            return future
+        with self._loop_lock:
+            previous = self._channel_futures.get(channel)
+            self._channel_futures[channel] = future
+        if previous is not None and not previous.done():
+            previous.cancel()
+            print(f"⏹️ 已取消被新查询取代的搜索任务 ({channel})")
+        return future
+
+    def cancel_pending(self, channel: str):
+        """取消指定通道最近一次仍未完成的搜索提交"""
+        with self._loop_lock:
+            previous = self._channel_futures.pop(channel, None)
+        if previous is not None and not previous.done():
+            previous.cancel()
+
+    def shutdown(self):
+        """停止事件循环线程并关闭共享线程池"""
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(loop.stop)
+        self.executor.shutdown(wait=False)
+    # -------------------------------------
+
     def clear_cache(self):
         """清理缓存"""
-        self.result_cache.clear()
+        with self.search_lock:
+            self.result_cache.clear()
         print("🧹 搜索缓存已清理")
         
     def get_cache_stats(self) -> dict:
@@ -563,18 +663,12 @@ def get_optimized_search_engine() -> OptimizedSearchEngine:
     return _optimized_search_engine
 
 def optimized_search_sync(query_str: str, index_dir_path: str, **search_params) -> list[dict]:
-    """同步版本的优化搜索接口"""
+    """同步版本的优化搜索接口
+
+    MODIFIED: 提交到引擎的常驻事件循环执行，不再为每次查询调用 asyncio.run 新建事件循环
+    """
     engine = get_optimized_search_engine()
-    
-    # 如果已经在事件循环中，直接调用异步版本
-    try:
-        loop = asyncio.get_running_loop()
-        # 在已有事件循环中，创建新任务
-        task = asyncio.create_task(engine.optimized_search(query_str, index_dir_path, **search_params))
-        return asyncio.run_coroutine_threadsafe(task, loop).result()
-    except RuntimeError:
-        # 没有运行的事件循环，创建新的
-        return asyncio.run(engine.optimized_search(query_str, index_dir_path, **search_params))
+    return engine.submit(query_str, index_dir_path, **search_params).result()
 # ------------------------------------
 
 def get_schema() -> Schema:
@@ -758,6 +852,7 @@ def extract_text_from_pdf(file_path: Path, enable_ocr: bool = True, ocr_lang: st
             # 将原始超时时间分割为更小的块，每个块后检查取消状态
             chunk_timeout = min(30, timeout) if timeout else 30  # 每30秒检查一次
 
+            _configure_ocr_tools()
             images = pdf2image.convert_from_path(
                             file_path,
                 timeout=chunk_timeout,  # 使用较短的超时
@@ -807,7 +902,7 @@ def extract_text_from_pdf(file_path: Path, enable_ocr: bool = True, ocr_lang: st
                     check_cancellation(cancel_callback, f"PDF页面 {page_num} OCR完成")
                     # ----------------------------------------
                         
-                except TesseractError as te:
+                except pytesseract.TesseractError as te:
                     tesseract_fail_time = time.time()
                     print(f"DEBUG: [{file_path.name} Page {page_num}] TesseractError at {tesseract_fail_time:.2f} (Duration before error: {tesseract_fail_time - tesseract_start_time:.2f}s)")
                     err_msg = str(te).lower()
@@ -849,14 +944,14 @@ def extract_text_from_pdf(file_path: Path, enable_ocr: bool = True, ocr_lang: st
                  print(f"Info: OCR process completed for {file_path.name}. Total chars: {len(extracted_text)}")
 
         # --- MODIFIED: Return tuple on exceptions ---
-        except PDFPopplerTimeoutError:
+        except pdf2image_exceptions.PDFPopplerTimeoutError:
             pdf2image_fail_time = time.time()
             print(f"DEBUG: [{file_path.name}] PDFPopplerTimeoutError at {pdf2image_fail_time:.2f} (Duration before error: {pdf2image_fail_time - pdf2image_start_time:.2f}s)")
             print(f"Warning: PDF to image conversion timed out (>{chunk_timeout}s) for {file_path.name}.", file=sys.stderr)
             # 这里不记录跳过的文件，因为该函数无法访问index_dir_path
             # 记录会在_extract_worker中完成
             return None, [] # MODIFIED
-        except PDFPageCountError as pe:
+        except pdf2image_exceptions.PDFPageCountError as pe:
              print(f"Error getting page count or converting PDF {file_path.name}: {pe}. Skipping OCR.", file=sys.stderr)
              # 这里不记录跳过的文件，因为该函数无法访问index_dir_path
              # 记录会在_extract_worker中完成
@@ -1150,7 +1245,7 @@ def extract_text_from_html(file_path: Path, cancel_callback=None) -> tuple[str,
         # 在解析前再次检查取消状态
         check_cancellation(cancel_callback, "HTML解析处理")
             
-        soup = BeautifulSoup(html_content_decoded, 'lxml')
+        soup = bs4.BeautifulSoup(html_content_decoded, 'lxml')
         for script_or_style in soup(["script", "style"]):
             script_or_style.decompose()
         content = ' '.join(soup.stripped_strings)
@@ -1195,7 +1290,7 @@ def extract_text_from_rtf(file_path: Path, cancel_callback=None) -> tuple[str, l
         # 在转换前检查取消状态
         check_cancellation(cancel_callback, "RTF转换文本")
             
-        content = rtf_to_text(rtf_content, errors="ignore").strip()
+        content = striprtf.rtf_to_text(rtf_content, errors="ignore").strip()
         if content:
             structure.append({'type': 'paragraph', 'text': content})
         return content, structure
@@ -1364,7 +1459,7 @@ def extract_text_from_msg(file_path: Path, cancel_callback=None) -> tuple[str, l
                             html_content_decoded = html_bytes.decode('utf-8', errors='replace')
                             print(f"MSG HTML Body: Decoded using final fallback utf-8 (replace)")
                     if html_content_decoded:
-                        soup = BeautifulSoup(html_content_decoded, 'lxml')
+                        soup = bs4.BeautifulSoup(html_content_decoded, 'lxml')
                         for script_or_style in soup(["script", "style"]):
                             script_or_style.decompose()
                         body_to_process = ' '.join(soup.stripped_strings)
@@ -1446,7 +1541,7 @@ def index_documents(writer, content_dict: dict[Path, tuple[str, list[dict]]]):
                 filename_text = path.name
 
             # 更新索引
-            writer.update_document(
+            writer.update_document(**add_directory_keys(writer.schema, dict(
                 path=normalize_path_for_index(str(path)),  # 标准化路径
                 content=content,
                 filename_text=filename_text,  # 文件名作为单独的字段
@@ -1455,7 +1550,7 @@ def index_documents(writer, content_dict: dict[Path, tuple[str, list[dict]]]):
                 file_size=file_size,
                 file_type=file_ext.lstrip('.'),  # 去掉前导点
                 indexed_with_ocr=ocr_used  # 存储OCR使用状态
-            )
+            )))
         except Exception as e:
             print(f"Warning: Error indexing document {path}: {e}")
             continue  # 继续索引其他文档
@@ -1643,88 +1738,249 @@ def expand_chinese_wildcard_query(query_str):
     
     return expanded_queries  # 返回所有扩展查询，上层调用处需要处理
 
-def search_index(query_str: str,
-                 index_dir_path: str, # Added parameter
-                 search_mode: str = 'phrase',
-                 # --- ADDED: Parameter for search scope ---
-                 search_scope: str = 'fulltext',
-                 # -----------------------------------------
-                 min_size_kb: int | None = None,
-                 max_size_kb: int | None = None,
-                 start_date: str | None = None,  # Changed to string (e.g., "2023-01-01")
-                 end_date: str | None = None,    # Changed to string (e.g., "2023-12-31")
-                 file_type_filter: list[str] | None = None,
-                 sort_by: str = 'relevance',
-                 case_sensitive: bool = False,
-                 # --- ADDED: Parameter for current source directories ---
-                 current_source_dirs: list[str] | None = None) -> list[dict]: # Filter results by current directories
-    # --- MODIFIED: Include search_scope in debug log ---
-    print(f"\n🔍 开始搜索:")
-    print(f"   查询: '{query_str}'")
-    print(f"   模式: {search_mode}")
-    print(f"   范围: {search_scope}")
-    print(f"   索引: {index_dir_path}")
+# --- ADDED: 基于偏移量的摘要片段（snippet）支持 ---
+# 搜索结果不再携带整段原文，而是只返回匹配位置附近的有限窗口，
+# 同时附带块引用（文件路径 + block_index），需要完整文本时再按需读取。
+SNIPPET_CONTEXT_CHARS = 60     # 匹配前后保留的上下文字符数
+SNIPPET_MAX_CHARS = 240        # 单个片段的最大字符数（不含省略号）
+SNIPPET_ELLIPSIS = "…"
+
+
+def find_match_spans(text: str, search_mode: str, query_str: str, terms=None) -> list[tuple[int, int]]:
+    """返回文本中所有匹配位置 (start, end)，按起始位置排序。
+
+    phrase 模式按完整查询串匹配；fuzzy 模式按正向词项匹配（长词优先）。
+    """
+    if not isinstance(text, str) or not text:
+        return []
     if search_mode == 'phrase':
-        print(f"   ⚠️  精确搜索模式: 将只返回包含完整短语 '{query_str}' 的结果")
-    # ---------------------------------------------------
-    print(f"Filters - Size: {min_size_kb}-{max_size_kb}KB, Date: {start_date}-{end_date}, Types: {file_type_filter}") # Debug
-    print(f"Case Sensitive: {case_sensitive} (Note: Currently ignored by backend)") # ADDED Debug for case_sensitive
+        if not query_str:
+            return []
+        pattern = re.compile(re.escape(query_str), flags=re.IGNORECASE)
+    else:
+        if not terms:
+            return []
+        ordered_terms = sorted((t for t in terms if t), key=len, reverse=True)
+        if not ordered_terms:
+            return []
+        pattern = re.compile("|".join(re.escape(t) for t in ordered_terms), flags=re.IGNORECASE)
+    return [(m.start(), m.end()) for m in pattern.finditer(text) if m.end() > m.start()]
 
-    processed_results = [] # <--- Initialize a new list to store processed hits
-    if not Path(index_dir_path).exists() or not exists_in(index_dir_path):
+
+def build_snippet(text: str, spans: list[tuple[int, int]],
+                  context_chars: int = SNIPPET_CONTEXT_CHARS,
+                  max_chars: int = SNIPPET_MAX_CHARS) -> dict:
+    """根据匹配位置截取有限长度的窗口。
+
+    Returns:
+        dict: {'text': 窗口文本, 'start': 窗口在原文中的起点, 'end': 终点,
+               'highlights': 窗口内的相对高亮区间, 'text_length': 原文长度,
+               'truncated': 是否被截断}
+    """
+    text = text if isinstance(text, str) else ("" if text is None else str(text))
+    text_len = len(text)
+    if text_len <= max_chars:
+        start, end = 0, text_len
+    elif spans:
+        first_start = spans[0][0]
+        start = max(0, first_start - context_chars)
+        end = min(text_len, start + max_chars)
+        # 窗口贴近文本末尾时，向前补足上下文
+        start = max(0, min(start, end - max_chars))
+    else:
+        start, end = 0, max_chars
+
+    highlights = []
+    for span_start, span_end in spans:
+        if span_start >= end:
+            break
+        if span_end <= start:
+            continue
+        highlights.append((max(span_start, start) - start, min(span_end, end) - start))
+
+    return {
+        'text': text[start:end],
+        'start': start,
+        'end': end,
+        'highlights': highlights,
+        'text_length': text_len,
+        'truncated': start > 0 or end < text_len,
+    }
+
+
+def render_snippet(snippet: dict) -> tuple[str, str]:
+    """将片段渲染为 (纯文本, 带高亮标记文本)，被截断的一侧补充省略号"""
+    window_text = snippet.get('text', '')
+    parts = []
+    cursor = 0
+    for hl_start, hl_end in snippet.get('highlights', []):
+        if hl_start < cursor:
+            continue
+        parts.append(window_text[cursor:hl_start])
+        parts.append(f"__HIGHLIGHT_START__{window_text[hl_start:hl_end]}__HIGHLIGHT_END__")
+        cursor = hl_end
+    parts.append(window_text[cursor:])
+    marked_text = "".join(parts)
+
+    if snippet.get('start', 0) > 0:
+        window_text = SNIPPET_ELLIPSIS + window_text
+        marked_text = SNIPPET_ELLIPSIS + marked_text
+    if snippet.get('end', 0) < snippet.get('text_length', 0):
+        window_text += SNIPPET_ELLIPSIS
+        marked_text += SNIPPET_ELLIPSIS
+    return window_text, marked_text
+
+
+def get_block_text(index_dir_path: str, file_path: str, block_index: int) -> dict | None:
+    """按需读取某个结果块的完整内容（来自索引中存储的 structure_map）。
+
+    Args:
+        index_dir_path: 索引目录
+        file_path: 结果中的 file_path（索引 path 字段）
+        block_index: 结果中的 block_index
+
+    Returns:
+        dict | None: 原始块字典（包含完整 text / values 等），找不到时返回 None
+    """
+    if block_index is None or not file_path:
+        return None
+    if not index_exists(index_dir_path):
         print(f"Error: Index directory '{index_dir_path}' not found.")
-        return processed_results # <--- Return the empty processed list
+        return None
+    ix = None
+    try:
+        ix = open_search_index(index_dir_path)
+        with ix.searcher() as searcher:
+            docnum = searcher.document_number(path=file_path)
+            structure_map_json = StructureMapReader(searcher).get(docnum) if docnum is not None else None
+        if not structure_map_json:
+            return None
+        structure = json.loads(structure_map_json)
+        if 0 <= block_index < len(structure):
+            return structure[block_index]
+    except Exception as e:
+        print(f"读取完整段落失败 {file_path}#{block_index}: {e}")
+    finally:
+        if ix:
+            ix.close()
+    return None
+# --- END ADDED ---
 
-    # --- 检查通配符搜索是否允许 (位置1：在最开始检查) ---
+# --- ADDED: 搜索流程拆分为可复用步骤（search_index / iter_search_batches 共用） ---
+DEFAULT_SEARCH_HIT_LIMIT = 3000   # search_index 默认向 Whoosh 请求的文档命中上限
+MAX_RECOMMENDED_RESULTS = 500     # 单次返回给界面的最大结果条数
+DEFAULT_PAGE_SIZE = 50            # iter_search_batches 默认每批文档数
+
+
+def _check_query_preconditions(query_str: str) -> tuple[list | None, list]:
+    """检查通配符许可与语法。
+
+    Returns:
+        tuple: (错误结果列表或None, 需要附加到结果中的警告列表)
+    """
+    warnings = []
     if '*' in query_str or '?' in query_str:
         # 检查是否为专业版功能
         if not is_feature_available(Features.WILDCARDS):
             print(f"通配符搜索功能不可用 (未获得许可)")
-            return [{'error': True, 'error_message': "通配符搜索是专业版功能，请升级以使用", 'license_required': True}]
-        
+            return [{'error': True, 'error_message': "通配符搜索是专业版功能，请升级以使用", 'license_required': True}], warnings
+
         # 验证通配符语法
         is_valid, error_message = validate_wildcard_syntax(query_str)
         if not is_valid:
             print(f"无效的通配符语法: {error_message}")
-            return [{'error': True, 'error_message': f"通配符语法错误: {error_message}"}]
-        
+            return [{'error': True, 'error_message': f"通配符语法错误: {error_message}"}], warnings
+
         # 检查性能风险
         has_risk, risk_message = check_wildcard_performance_risk(query_str)
         if has_risk:
             print(f"通配符性能风险: {risk_message}")
             # 仅记录风险，不阻止搜索，可选择添加到结果中作为警告
-            processed_results.append({'warning': True, 'warning_message': risk_message, 'performance_warning': True})
+            warnings.append({'warning': True, 'warning_message': risk_message, 'performance_warning': True})
+    return None, warnings
 
-    # --- Determine target field based on scope --- ADDED
-    target_field = "filename_text" if search_scope == 'filename' else "content"
-    print(f"Searching in field: '{target_field}'")
-    # --------------------------------------------
-    
-    # --- 检查许可证状态，确定当前可访问的文件类型 ---
-    allowed_file_types = {'.docx', '.txt', '.html', '.htm', '.rtf', '.xlsx', '.pptx'} # 基础版允许的文件类型
-    
-    # 如果用户有相应的许可证，添加专业版文件类型
-    if is_feature_available(Features.PDF_SUPPORT):
-        allowed_file_types.add('.pdf')
-    if is_feature_available(Features.MARKDOWN_SUPPORT):
-        allowed_file_types.add('.md')
-    if is_feature_available(Features.EMAIL_SUPPORT):
-        allowed_file_types.add('.eml')
-        allowed_file_types.add('.msg')
-    if is_feature_available(Features.MULTIMEDIA_SUPPORT):
-        # 添加多媒体文件类型支持
+
+# 基础版允许的文件类型
+BASE_ALLOWED_FILE_TYPES = frozenset({'.docx', '.txt', '.html', '.htm', '.rtf', '.xlsx', '.pptx'})
+
+# 需要专业版功能授权的文件类型：Features 属性名 -> 文件类型
+LICENSED_FILE_TYPES = {
+    'PDF_SUPPORT': ('.pdf',),
+    'MARKDOWN_SUPPORT': ('.md',),
+    'EMAIL_SUPPORT': ('.eml', '.msg'),
+    'MULTIMEDIA_SUPPORT': (
         # 视频文件
-        allowed_file_types.update(['.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.webm', '.m4v', '.3gp', '.rmvb'])
-        # 音频文件  
-        allowed_file_types.update(['.mp3', '.wav', '.flac', '.aac', '.ogg', '.wma', '.m4a', '.opus', '.aiff'])
+        '.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.webm', '.m4v', '.3gp', '.rmvb',
+        # 音频文件
+        '.mp3', '.wav', '.flac', '.aac', '.ogg', '.wma', '.m4a', '.opus', '.aiff',
         # 图片文件
-        allowed_file_types.update(['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tiff', '.svg', '.ico', '.raw'])
-    
-    print(f"Current license allows file types: {allowed_file_types}")
-    # -------------------------------------------
+        '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tiff', '.svg', '.ico', '.raw',
+    ),
+}
 
-    ix = open_dir(index_dir_path)
-    searcher = ix.searcher(weighting=scoring.BM25F())
+# 按许可证状态缓存的文件类型授权结果: {'key', 'allowed', 'mask'}
+_license_filter_cache = {}
+_license_filter_lock = Lock()
+
+
+def _get_license_state_key():
+    """返回决定文件类型授权的许可证状态，用作缓存键"""
+    if not _license_manager_available:
+        return 'no_license_manager'
+    try:
+        return get_license_manager().get_license_status()
+    except Exception as e:
+        print(f"许可证检查错误: {e}")
+        return 'license_error'
+
+
+def _compile_license_file_type_filter():
+    """根据当前许可证逐项检查功能，生成允许的类型集合与需屏蔽类型的查询"""
+    allowed_file_types = set(BASE_ALLOWED_FILE_TYPES)
+    disallowed_terms = []
+    for feature_attr, file_types in LICENSED_FILE_TYPES.items():
+        if not _license_manager_available or is_feature_available(getattr(Features, feature_attr)):
+            allowed_file_types.update(file_types)
+        else:
+            # file_type 字段按文本分词存储（'.pdf' -> 'pdf'），查询时去掉前导点
+            disallowed_terms.extend(Term("file_type", ft.lstrip('.')) for ft in file_types)
+    mask_query = Or(disallowed_terms) if disallowed_terms else None
+    return frozenset(allowed_file_types), mask_query
+
+
+def get_license_file_type_filter():
+    """返回 (允许的文件类型集合, 需屏蔽的Whoosh查询或None)。
+
+    结果只在许可证状态变化时重新计算；屏蔽查询作为 mask 传给
+    searcher.search，未授权类型的文档不会被评分和后处理。
+    """
+    state_key = _get_license_state_key()
+    with _license_filter_lock:
+        if _license_filter_cache.get('key') != state_key:
+            allowed_file_types, mask_query = _compile_license_file_type_filter()
+            _license_filter_cache.update(key=state_key, allowed=allowed_file_types, mask=mask_query)
+            print(f"许可证文件类型过滤已更新 (状态: {state_key}): {sorted(allowed_file_types)}")
+        return _license_filter_cache['allowed'], _license_filter_cache['mask']
+
+
+def _get_allowed_file_types() -> set:
+    """根据当前许可证状态返回可访问的文件类型集合"""
+    return set(get_license_file_type_filter()[0])
+
+
+@perf_trace.traced("query_parse")
+def _build_search_query(ix, query_str: str, search_mode: str, search_scope: str,
+                        min_size_kb: int | None, max_size_kb: int | None,
+                        start_date: str | None, end_date: str | None,
+                        file_type_filter: list[str] | None):
+    """构造最终的 Whoosh 查询。
+
+    Returns:
+        tuple: (final_query, parsed_query_obj)，后者用于提取高亮词项
+    """
+    # --- Determine target field based on scope --- ADDED
+    target_field = "filename_text" if search_scope == 'filename' else "content"
+    print(f"Searching in field: '{target_field}'")
     # --- Use analyzer associated with the target field (or default) --- MODIFIED
     analyzer = ix.schema[target_field].analyzer if target_field in ix.schema else ChineseAnalyzer()
     # -------------------------------------------------------------------
@@ -1993,260 +2249,542 @@ def search_index(query_str: str,
         final_query = And(all_queries)
         print(f"Combined query: {final_query}")
 
-    # Sorting logic (remains the same)
-    sort_field = None
-    reverse = False
+    return final_query, parsed_query_obj
+
+
+def _resolve_sort_field(sort_by: str) -> tuple[str | None, bool]:
+    """将 sort_by 选项映射为 (排序字段, 是否倒序)"""
     if sort_by == 'date_asc':
-        sort_field = 'last_modified'
-        reverse = False
+        return 'last_modified', False
     elif sort_by == 'date_desc':
-        sort_field = 'last_modified'
-        reverse = True
+        return 'last_modified', True
     elif sort_by == 'size_asc':
-        sort_field = 'file_size'
-        reverse = False
+        return 'file_size', False
     elif sort_by == 'size_desc':
-        sort_field = 'file_size'
-        reverse = True
+        return 'file_size', True
     elif sort_by == 'relevance':
-        sort_field = None  # Default Whoosh scoring
+        return None, False  # Default Whoosh scoring
+    print(f"Warning: Unknown sort_by option '{sort_by}', defaulting to relevance.")
+    return None, False
+
+
+def sort_results(results: list[dict], sort_by: str) -> list[dict]:
+    """对已取得的结果重新排序，与 search_index 的 sort_by 选项一致，供界面复用。
+
+    排序键只从结果中已有的索引字段取一次，对下标排列排序（稳定排序，
+    同一文件的多个段落保持相对顺序），不重新搜索也不访问文件系统。
+    """
+    sort_field, reverse = _resolve_sort_field(sort_by)
+    if not sort_field or len(results) < 2:
+        return list(results)
+    sort_keys = [result.get(sort_field) or 0 for result in results]
+    order = sorted(range(len(results)), key=sort_keys.__getitem__, reverse=reverse)
+    return [results[i] for i in order]
+
+
+def _resolve_directory_scope(ix, index_dir_path: str, current_source_dirs: list[str] | None):
+    """目录过滤优先下推为 Whoosh filter 查询，旧索引不支持时回退到逐条过滤。
+
+    Returns:
+        tuple: (filter查询或None, 仍需逐条过滤的目录列表或None)
+    """
+    dir_filter = build_directory_filter(ix, index_dir_path, current_source_dirs)
+    if dir_filter is not None:
+        print(f"目录过滤已下推到索引查询: {len(current_source_dirs)} 个目录")
+        return dir_filter, None
+    return None, current_source_dirs
+
+
+def _get_highlight_terms(search_scope: str, parsed_query_obj) -> set:
+    """仅在全文搜索且有解析后的查询时提取正向词项用于高亮"""
+    positive_terms_for_highlighting = set()
+    if search_scope == 'fulltext' and parsed_query_obj:
+        positive_terms_for_highlighting = get_positive_terms(parsed_query_obj)
+        print(f"DEBUG: Positive terms for highlighting: {positive_terms_for_highlighting}")
+    return positive_terms_for_highlighting
+
+
+@perf_trace.traced("highlight")
+def _process_search_hit(hit, query_str: str, search_mode: str, search_scope: str,
+                        positive_terms_for_highlighting: set,
+                        current_source_dirs: list[str] | None,
+                        allowed_file_types: set,
+                        structure_reader=None) -> list[dict]:
+    """处理单个文档命中：过滤、块匹配与片段生成。
+
+    结构信息只在需要生成片段时通过 structure_reader 按文档号读取。
+
+    Returns:
+        list[dict]: 该命中产生的结果条目（被过滤时为空列表）
+    """
+    file_path = hit.get('path', "(未知文件)")
+    file_type = hit.get('file_type', '')
+
+    # --- 检查文件是否还存在 ---
+    if not os.path.exists(file_path):
+        print(f"Skipping result for {file_path} because file no longer exists")
+        return []  # 跳过此结果，文件已被删除
+    # -----------------------------------------
+
+    # --- 检查文件是否在当前源目录中 ---
+    if current_source_dirs:
+        # 标准化文件路径和源目录路径进行比较
+        file_path_normalized = os.path.normpath(file_path).lower()
+        is_in_current_dirs = False
+
+        for source_dir in current_source_dirs:
+            source_dir_normalized = os.path.normpath(source_dir).lower()
+            # 检查文件是否在这个源目录或其子目录中
+            if file_path_normalized.startswith(source_dir_normalized + os.sep) or \
+               file_path_normalized == source_dir_normalized:
+                is_in_current_dirs = True
+                break
+
+        if not is_in_current_dirs:
+            print(f"Skipping result for {file_path} because it's not in current source directories")
+            return []  # 跳过此结果，不在当前源目录中
+    # -----------------------------------------
+
+    # --- 检查当前许可证是否允许访问该文件类型 ---
+    if file_type:
+        # 标准化文件类型格式，确保都以点开头
+        normalized_file_type = file_type if file_type.startswith('.') else f'.{file_type}'
+
+        if normalized_file_type not in allowed_file_types:
+            print(f"Skipping result for {file_path} due to license restrictions (type: {file_type})")
+            return []  # 跳过此结果，不添加到返回列表
+    # -----------------------------------------
+
+    # --- Basic result structure (always included) ---
+    basic_result_info = {
+        'file_path': file_path,
+        'last_modified': hit.get('last_modified', 0),
+        'file_size': hit.get('file_size', 0),
+        'file_type': file_type,
+        'score': hit.score
+    }
+    # -----------------------------------------------
+
+    # If search_scope is 'filename' OR query_str is empty (filter only search)
+    # Just add the basic file info, no content highlighting needed here
+    if not (search_scope == 'fulltext' and query_str):
+        return [basic_result_info]
+
+    # --- Content-based processing only for fulltext search ---
+    hit_results = []
+    added_paragraphs_in_hit = set()
+    if structure_reader is not None:
+        structure_map_json = structure_reader.get(hit.docnum, hit)
     else:
-        print(f"Warning: Unknown sort_by option '{sort_by}', defaulting to relevance.")
-        sort_field = None
+        structure_map_json = hit.get('structure_map')
+    if not structure_map_json:
+        print(f"Warning: No structure information for {file_path}")
+        # Add the basic info if no structure
+        return [basic_result_info]
+    try:
+        structure = json.loads(structure_map_json)
+    except json.JSONDecodeError:
+        print(f"Error parsing structure for {file_path}")
+        # Add the basic info even if structure fails
+        return [basic_result_info]
+
+    for i, block in enumerate(structure):
+        block_text = block.get('text', '')
+        block_type = block.get('type')
+
+        # --- MODIFIED: 基于偏移量判断相关性并生成有限长度片段 ---
+        text_spans = find_match_spans(block_text, search_mode, query_str, positive_terms_for_highlighting)
+        is_relevant_block = bool(text_spans)
+        cell_spans = None
+        if block_type == 'excel_row':
+            original_excel_values = block.get('values', []) or []
+            cell_spans = [find_match_spans(cell_value, search_mode, query_str, positive_terms_for_highlighting)
+                          if isinstance(cell_value, str) else []
+                          for cell_value in original_excel_values]
+            if search_mode == 'fuzzy' and any(cell_spans):
+                is_relevant_block = True
+
+        if search_mode == 'phrase' and is_relevant_block:
+            print(f"🎯 精确匹配找到: 文件 {file_path}, 块类型 {block_type}, 位置 {text_spans[0]}")
+
+        # If the block was relevant, create a detailed result entry
+        if not is_relevant_block or block_text in added_paragraphs_in_hit: # Avoid duplicate paragraphs from same file hit
+            continue
+
+        snippet = build_snippet(block_text, text_spans)
+        snippet_text, marked_snippet = render_snippet(snippet)
+        snippet_truncated = snippet['truncated']
+
+        final_marked_paragraph = ""
+        final_marked_heading = ""
+        final_excel_values = None
+        if block_type == 'heading' or block_type == 'metadata':
+            final_marked_heading = marked_snippet
+        elif block_type == 'excel_row':
+            final_excel_values = []
+            for cell_value, spans_in_cell in zip(original_excel_values, cell_spans):
+                if not isinstance(cell_value, str):
+                    final_excel_values.append(cell_value)
+                    continue
+                cell_snippet = build_snippet(cell_value, spans_in_cell)
+                snippet_truncated = snippet_truncated or cell_snippet['truncated']
+                final_excel_values.append(render_snippet(cell_snippet)[1])
+        else: # paragraph
+            final_marked_paragraph = marked_snippet
+
+        result_block = {
+            **basic_result_info, # Include basic info
+            'type': block_type,
+            'level': block.get('level'),
+            'paragraph': snippet_text if block_type != 'heading' and block_type != 'metadata' and block_type != 'excel_row' else None,
+            'heading': block.get('text') if block_type == 'heading' or block_type == 'metadata' else None,
+            'excel_sheet': block.get('sheet_name'),
+            'excel_row_idx': block.get('row_index'),
+            'excel_headers': block.get('headers'),
+            'excel_values': final_excel_values if final_excel_values is not None else block.get('values'),
+            'marked_paragraph': final_marked_paragraph,
+            'marked_heading': final_marked_heading,
+            # 块引用与片段偏移，完整文本通过 get_block_text() 按需读取
+            'block_index': i,
+            'snippet_start': snippet['start'],
+            'snippet_end': snippet['end'],
+            'block_length': snippet['text_length'],
+            'snippet_truncated': snippet_truncated,
+            # Keep score from basic_result_info
+        }
+        hit_results.append(result_block)
+        added_paragraphs_in_hit.add(block_text)
+        # ---------------------------------------------------------
+
+    # If after checking all blocks, no content match was found for this hit
+    # (This shouldn't happen often with fulltext search, but as a fallback)
+    if not hit_results:
+        print(f"Note: Hit found for {file_path} but no specific content block matched/highlighted.")
+        return [basic_result_info] # Add basic info
+    return hit_results
+# --- END ADDED ---
+
+def search_index(query_str: str,
+                 index_dir_path: str, # Added parameter
+                 search_mode: str = 'phrase',
+                 # --- ADDED: Parameter for search scope ---
+                 search_scope: str = 'fulltext',
+                 # -----------------------------------------
+                 min_size_kb: int | None = None,
+                 max_size_kb: int | None = None,
+                 start_date: str | None = None,  # Changed to string (e.g., "2023-01-01")
+                 end_date: str | None = None,    # Changed to string (e.g., "2023-12-31")
+                 file_type_filter: list[str] | None = None,
+                 sort_by: str = 'relevance',
+                 case_sensitive: bool = False,
+                 # --- ADDED: Parameter for current source directories ---
+                 current_source_dirs: list[str] | None = None, # Filter results by current directories
+                 # --- ADDED: 向 Whoosh 请求的文档命中上限 ---
+                 limit: int | None = None) -> list[dict]:
+    # --- MODIFIED: Include search_scope in debug log ---
+    print(f"\n🔍 开始搜索:")
+    print(f"   查询: '{query_str}'")
+    print(f"   模式: {search_mode}")
+    print(f"   范围: {search_scope}")
+    print(f"   索引: {index_dir_path}")
+    if search_mode == 'phrase':
+        print(f"   ⚠️  精确搜索模式: 将只返回包含完整短语 '{query_str}' 的结果")
+    # ---------------------------------------------------
+    print(f"Filters - Size: {min_size_kb}-{max_size_kb}KB, Date: {start_date}-{end_date}, Types: {file_type_filter}") # Debug
+    print(f"Case Sensitive: {case_sensitive} (Note: Currently ignored by backend)") # ADDED Debug for case_sensitive
+
+    processed_results = [] # <--- Initialize a new list to store processed hits
+    if not index_exists(index_dir_path):
+        print(f"Error: Index directory '{index_dir_path}' not found.")
+        return processed_results # <--- Return the empty processed list
+
+    # --- 检查通配符搜索是否允许 (位置1：在最开始检查) ---
+    error_results, query_warnings = _check_query_preconditions(query_str)
+    if error_results:
+        return error_results
+    processed_results.extend(query_warnings)
+
+    # --- 检查许可证状态，确定当前可访问的文件类型（按许可证状态缓存） ---
+    allowed_file_types, license_mask = get_license_file_type_filter()
+    # -------------------------------------------
+
+    ix = open_search_index(index_dir_path)
+    searcher = ix.searcher(weighting=scoring.BM25F())
+    final_query, parsed_query_obj = _build_search_query(
+        ix, query_str, search_mode, search_scope, min_size_kb, max_size_kb,
+        start_date, end_date, file_type_filter)
+    sort_field, reverse = _resolve_sort_field(sort_by)
 
     # --- 修改搜索结果处理逻辑，过滤掉许可证无法访问的文件类型 ---
-    results = searcher.search(final_query, limit=3000, sortedby=sort_field, reverse=reverse) # Performance-balanced limit with user experience priority
-    
+    hit_limit = limit if limit else DEFAULT_SEARCH_HIT_LIMIT # Performance-balanced limit with user experience priority
+    dir_filter, post_filter_dirs = _resolve_directory_scope(ix, index_dir_path, current_source_dirs)
+    results = _search_hits(searcher, index_dir_path, final_query, hit_limit, sort_field, reverse,
+                           dir_filter, license_mask)
+
     # --- Result Processing and Highlighting (Conditional) --- MODIFIED
     if results:
         print(f"Found {len(results)} document hit(s):")
-        matched_contexts = 0
-        
-        # --- MODIFIED: Get positive terms for highlighting --- 
-        # Only prepare for content highlighting if scope is fulltext and we have a parsed query
-        positive_terms_for_highlighting = set()
-        if search_scope == 'fulltext' and parsed_query_obj:
-            positive_terms_for_highlighting = get_positive_terms(parsed_query_obj)
-            print(f"DEBUG: Positive terms for highlighting: {positive_terms_for_highlighting}")
-        # -----------------------------------------------------
-        
-        for hit in results:
-            file_path = hit.get('path', "(未知文件)")
-            file_type = hit.get('file_type', '')
-            
-            # --- 检查文件是否还存在 ---
-            if not os.path.exists(file_path):
-                print(f"Skipping result for {file_path} because file no longer exists")
-                continue  # 跳过此结果，文件已被删除
-            # -----------------------------------------
-            
-            # --- 检查文件是否在当前源目录中 ---
-            if current_source_dirs:
-                # 标准化文件路径和源目录路径进行比较
-                file_path_normalized = os.path.normpath(file_path).lower()
-                is_in_current_dirs = False
-                
-                for source_dir in current_source_dirs:
-                    source_dir_normalized = os.path.normpath(source_dir).lower()
-                    # 检查文件是否在这个源目录或其子目录中
-                    if file_path_normalized.startswith(source_dir_normalized + os.sep) or \
-                       file_path_normalized == source_dir_normalized:
-                        is_in_current_dirs = True
-                        break
-                
-                if not is_in_current_dirs:
-                    print(f"Skipping result for {file_path} because it's not in current source directories")
-                    continue  # 跳过此结果，不在当前源目录中
-            # -----------------------------------------
-            
-            # --- 检查当前许可证是否允许访问该文件类型 ---
-            if file_type:
-                # 标准化文件类型格式，确保都以点开头
-                normalized_file_type = file_type if file_type.startswith('.') else f'.{file_type}'
-                
-                if normalized_file_type not in allowed_file_types:
-                    print(f"Skipping result for {file_path} due to license restrictions (type: {file_type})")
-                    continue  # 跳过此结果，不添加到返回列表
-            # -----------------------------------------
-            
-            # --- Basic result structure (always included) ---
-            basic_result_info = {
-                'file_path': file_path,
-                'last_modified': hit.get('last_modified', 0),
-                'file_size': hit.get('file_size', 0),
-                'file_type': file_type,
-                'score': hit.score
-            }
-            # -----------------------------------------------
-            
-            # --- Content-based processing only for fulltext search ---
-            if search_scope == 'fulltext' and query_str: # Only process structure if doing text search in content
-                added_paragraphs_in_hit = set()
-                structure = []
-                structure_map_json = hit.get('structure_map')
-                if structure_map_json:
-                    try:
-                        structure = json.loads(structure_map_json)
-                    except json.JSONDecodeError:
-                        print(f"Error parsing structure for {file_path}")
-                        # Add the basic info even if structure fails
-                        processed_results.append(basic_result_info)
-                        continue
-                else:
-                    print(f"Warning: No structure information for {file_path}")
-                    # Add the basic info if no structure
-                    processed_results.append(basic_result_info)
-                    continue
+        # --- MODIFIED: Get positive terms for highlighting ---
+        positive_terms_for_highlighting = _get_highlight_terms(search_scope, parsed_query_obj)
+        structure_reader = StructureMapReader(searcher)
+
+        for hit_index, hit in enumerate(results):
+            processed_results.extend(_process_search_hit(
+                hit, query_str, search_mode, search_scope, positive_terms_for_highlighting,
+                post_filter_dirs, allowed_file_types, structure_reader))
+            # --- ADDED: 达到推荐上限后不再处理剩余命中（与 iter_search_batches 一致） ---
+            if len(processed_results) >= MAX_RECOMMENDED_RESULTS:
+                skipped_hits = len(results) - hit_index - 1
+                if skipped_hits:
+                    print(f"⚠️  已达到 {MAX_RECOMMENDED_RESULTS} 条结果，跳过剩余 {skipped_hits} 个命中的高亮")
+                break
+            # --- END ADDED ---
+        # End of loop through hits
+    else:
+        print("No document hits found for the query.")
+
+    # Close searcher and index
+    if searcher: searcher.close()
+    if ix: ix.close()
+
+    # 智能结果截断和用户友好提示
+    original_count = len(processed_results)
+    max_recommended_results = MAX_RECOMMENDED_RESULTS  # 推荐的最大结果数
+
+    if original_count > max_recommended_results:
+        # 截断到推荐数量，保留相关度最高的结果
+        processed_results = processed_results[:max_recommended_results]
+        print(f"⚠️  结果数量较多 ({original_count} 条)，为保证性能已截断到 {max_recommended_results} 条")
+        print(f"💡 建议：使用更具体的搜索词或添加筛选条件以获得更精确的结果")
+
+    print(f"--- Search complete. Returning {len(processed_results)} processed results. ---")
+    return processed_results
+
+
+# --- ADDED: 流式搜索接口 ---
+def iter_search_batches(query_str: str,
+                        index_dir_path: str,
+                        batch_size: int = DEFAULT_PAGE_SIZE,
+                        max_results: int = MAX_RECOMMENDED_RESULTS,
+                        cancel_callback=None,
+                        search_mode: str = 'phrase',
+                        search_scope: str = 'fulltext',
+                        min_size_kb: int | None = None,
+                        max_size_kb: int | None = None,
+                        start_date: str | None = None,
+                        end_date: str | None = None,
+                        file_type_filter: list[str] | None = None,
+                        sort_by: str = 'relevance',
+                        case_sensitive: bool = False,
+                        current_source_dirs: list[str] | None = None,
+                        limit: int | None = None):
+    """流式搜索生成器：Whoosh 完成 top-k 打分后，按批处理命中并逐批产出结果。
+
+    每处理 batch_size 个文档命中产出一次结果列表（格式同 search_index），
+    调用方可以在第一批到达时就开始显示，而不必等待全部命中处理完毕。
+
+    Args:
+        batch_size: 每批处理的文档命中数
+        max_results: 累计产出的结果条目上限（与 search_index 的截断一致）
+        cancel_callback: 可选回调，返回 True 时停止处理并结束生成器（用于丢弃被新查询取代的搜索）
+
+    Yields:
+        list[dict]: 一批结果条目；错误（如通配符许可）以单独一批产出后结束
+    """
+    def _is_cancelled():
+        try:
+            return bool(cancel_callback and cancel_callback())
+        except Exception:
+            return False
+
+    if not index_exists(index_dir_path):
+        print(f"Error: Index directory '{index_dir_path}' not found.")
+        return
+
+    error_results, query_warnings = _check_query_preconditions(query_str)
+    if error_results:
+        yield error_results
+        return
+    if query_warnings:
+        yield query_warnings
+
+    allowed_file_types, license_mask = get_license_file_type_filter()
+    batch_size = max(1, int(batch_size or DEFAULT_PAGE_SIZE))
+    emitted = 0
+
+    ix = open_search_index(index_dir_path)
+    try:
+        with ix.searcher(weighting=scoring.BM25F()) as searcher:
+            final_query, parsed_query_obj = _build_search_query(
+                ix, query_str, search_mode, search_scope, min_size_kb, max_size_kb,
+                start_date, end_date, file_type_filter)
+            sort_field, reverse = _resolve_sort_field(sort_by)
+            if _is_cancelled():
+                return
+
+            dir_filter, post_filter_dirs = _resolve_directory_scope(ix, index_dir_path, current_source_dirs)
+            results = _search_hits(searcher, index_dir_path, final_query,
+                                   limit if limit else DEFAULT_SEARCH_HIT_LIMIT,
+                                   sort_field, reverse, dir_filter, license_mask)
+            positive_terms_for_highlighting = _get_highlight_terms(search_scope, parsed_query_obj)
+            structure_reader = StructureMapReader(searcher)
+
+            batch = []
+            hits_in_batch = 0
+            for hit in results:
+                if _is_cancelled():
+                    print(f"⏹️ 流式搜索已取消: '{query_str}'")
+                    return
+                batch.extend(_process_search_hit(
+                    hit, query_str, search_mode, search_scope, positive_terms_for_highlighting,
+                    post_filter_dirs, allowed_file_types, structure_reader))
+                hits_in_batch += 1
+
+                if emitted + len(batch) >= max_results:
+                    yield batch[:max_results - emitted]
+                    print(f"⚠️  结果数量较多，流式搜索在 {max_results} 条处截断")
+                    return
+                if hits_in_batch >= batch_size:
+                    if batch:
+                        emitted += len(batch)
+                        yield batch
+                    batch = []
+                    hits_in_batch = 0
+
+            if batch:
+                yield batch
+    finally:
+        ix.close()
+
+
+def _collect_facet_counts(searcher, final_query, facets, dir_filter, license_mask) -> dict:
+    """在索引内对匹配文档分面计数，不加载存储字段、不评分。
+
+    Returns:
+        dict: {分面名: {键: 文档数}}
+    """
+    from whoosh import sorting
+    results = searcher.search(final_query, limit=1, scored=False, terms=False,
+                              groupedby=facets, maptype=sorting.Count,
+                              filter=dir_filter, mask=license_mask)
+    return {name: results.groups(name) for name in facets.names()}
+
+
+def _day_key(mtime) -> str:
+    """修改时间戳 -> 本地日期键（YYYY-MM-DD）"""
+    if mtime:
+        try:
+            return datetime.fromtimestamp(mtime).strftime('%Y-%m-%d')
+        except (ValueError, OSError, OverflowError):
+            pass
+    return '未知日期'
+
+
+class DayFacet(FacetType):
+    """按修改日期（本地日期键，见 _day_key）分组的分面
+
+    包装 FieldFacet 的分类器，用它的 key_to_name 把分类键还原为时间戳：
+    有列存储时（模式 v3 起 sortable=True）键是列值，旧版索引没有该列时 Whoosh 从词表
+    建立文档顺序表，键只是词表中的序号。两种情况都还原后再换算日期，分组数按天而不是按时间戳。
+    """
+
+    def __init__(self, fieldname: str = 'last_modified'):
+        self.fieldname = fieldname
+        self.maptype = None
 
-                found_match_in_content = False # Flag to track if any block matched
-                for i, block in enumerate(structure):
-                    block_text = block.get('text', '')
-                    block_type = block.get('type')
-                    # Initialize markers/highlights
-                    final_marked_paragraph = ""
-                    final_marked_heading = ""
-                    final_marked_excel_values = None
-                    is_relevant_block = False # Reset for each block
-
-                    # Helper for fuzzy highlighting (now uses specific positive terms)
-                    def fuzzy_highlighter(text, terms_to_highlight):
-                        if not isinstance(text, str) or not terms_to_highlight:
-                            return str(text)
-                        temp_text = text
-                        for term in terms_to_highlight:
-                            def replace_func(matchobj):
-                                return f"__HIGHLIGHT_START__{matchobj.group(0)}__HIGHLIGHT_END__"
-                            # Use regex to match whole word unless term contains wildcard?
-                            # For now, simple substring match might be okay if terms are from parser
-                            temp_text = re.sub(re.escape(term), replace_func, temp_text, flags=re.IGNORECASE)
-                        return temp_text
-                        
-                    # Helper for phrase highlighting (remains mostly the same, but should ideally use positive phrase)
-                    def phrase_highlighter(text, phrase):
-                        if not isinstance(text, str) or not phrase:
-                            return str(text)
-                        phrase_pattern = re.compile(re.escape(phrase), flags=re.IGNORECASE)
-                        def replace_phrase_func(matchobj):
-                            return f"__HIGHLIGHT_START__{matchobj.group(0)}__HIGHLIGHT_END__"
-                        return phrase_pattern.sub(replace_phrase_func, text)
-
-                    # Check if block is relevant based on search mode and content
-                    if search_mode == 'phrase':
-                        # 添加精确搜索调试信息
-                        escaped_query = re.escape(query_str)
-                        match = re.search(escaped_query, block_text, flags=re.IGNORECASE)
-                        if match:
-                           print(f"🎯 精确匹配找到: 文件 {file_path}, 块类型 {block_type}")
-                           print(f"   查询: '{query_str}' -> 正则: '{escaped_query}'")
-                           print(f"   匹配文本: '{match.group(0)}'")
-                           print(f"   块内容前50字符: '{block_text[:50]}...'")
-                           is_relevant_block = True
-                           highlighted_block_text = phrase_highlighter(block_text, query_str)
-                           if block_type == 'heading' or block_type == 'metadata':
-                               final_marked_heading = highlighted_block_text
-                           elif block_type == 'excel_row':
-                               original_excel_values = block.get('values', [])
-                               marked_excel_values = []
-                               for cell_value in original_excel_values:
-                                   marked_excel_values.append(phrase_highlighter(cell_value, query_str))
-                               final_marked_excel_values = marked_excel_values
-                           else: # paragraph
-                               final_marked_paragraph = highlighted_block_text
-                               
-                    elif search_mode == 'fuzzy':
-                        contains_term = False
-                        # --- MODIFIED: Check against positive terms only --- 
-                        if positive_terms_for_highlighting:
-                            # Check block text first
-                            if block_text:
-                                block_text_lower = block_text.lower()
-                                for term in positive_terms_for_highlighting:
-                                    if term in block_text_lower:
-                                        contains_term = True
-                                        break
-                            # If not in text, check excel values if applicable
-                            if not contains_term and block_type == 'excel_row':
-                                original_excel_values = block.get('values', [])
-                                for cell_value in original_excel_values:
-                                    if isinstance(cell_value, str):
-                                        cell_lower = cell_value.lower()
-                                        for term in positive_terms_for_highlighting:
-                                            if term in cell_lower:
-                                                contains_term = True
-                                                break
-                                    if contains_term:
-                                        break
-                        # -----------------------------------------------
-                                        
-                        if contains_term:
-                           is_relevant_block = True
-                           # --- MODIFIED: Pass positive terms to highlighter --- 
-                           if block_type == 'heading' or block_type == 'metadata':
-                               final_marked_heading = fuzzy_highlighter(block_text, positive_terms_for_highlighting)
-                           elif block_type == 'excel_row':
-                               original_excel_values = block.get('values', [])
-                               marked_excel_values = []
-                               for cell_value in original_excel_values:
-                                   marked_excel_values.append(fuzzy_highlighter(cell_value, positive_terms_for_highlighting))
-                               final_marked_excel_values = marked_excel_values
-                           else: # paragraph
-                               final_marked_paragraph = fuzzy_highlighter(block_text, positive_terms_for_highlighting)
-                           # -------------------------------------------------
-                               
-                    # If the block was relevant, create a detailed result entry
-                    if is_relevant_block:
-                        if block_text not in added_paragraphs_in_hit: # Avoid duplicate paragraphs from same file hit
-                            result_block = {
-                                **basic_result_info, # Include basic info
-                                'type': block_type,
-                                'level': block.get('level'),
-                                'paragraph': block.get('text') if block_type != 'heading' and block_type != 'metadata' and block_type != 'excel_row' else None,
-                                'heading': block.get('text') if block_type == 'heading' or block_type == 'metadata' else None,
-                                'excel_sheet': block.get('sheet_name'),
-                                'excel_row_idx': block.get('row_index'),
-                                'excel_headers': block.get('headers'),
-                                'excel_values': final_marked_excel_values if final_marked_excel_values is not None else block.get('values'), # Use marked or original
-                                'marked_paragraph': final_marked_paragraph,
-                                'marked_heading': final_marked_heading,
-                                # Keep score from basic_result_info
-                            }
-                            # print(f"MATCHED BLOCK: {result_block}") # Too verbose
-                            processed_results.append(result_block)
-                            found_match_in_content = True
-                            matched_contexts += 1
-                            added_paragraphs_in_hit.add(block_text)
-                            
-                # If after checking all blocks, no content match was found for this hit
-                # (This shouldn't happen often with fulltext search, but as a fallback)
-                if not found_match_in_content:
-                    print(f"Note: Hit found for {file_path} but no specific content block matched/highlighted.")
-                    processed_results.append(basic_result_info) # Add basic info
-                    
-            else: # If search_scope is 'filename' OR query_str is empty (filter only search)
-                # Just add the basic file info, no content highlighting needed here
-                processed_results.append(basic_result_info)
-        # End of loop through hits
-    else:
-        print("No document hits found for the query.")
-        
-    # Close searcher and index
-    if searcher: searcher.close()
-    if ix: ix.close()
-    
-    # 智能结果截断和用户友好提示
-    original_count = len(processed_results)
-    max_recommended_results = 500  # 推荐的最大结果数
-    
-    if original_count > max_recommended_results:
-        # 截断到推荐数量，保留相关度最高的结果
-        processed_results = processed_results[:max_recommended_results]
-        print(f"⚠️  结果数量较多 ({original_count} 条)，为保证性能已截断到 {max_recommended_results} 条")
-        print(f"💡 建议：使用更具体的搜索词或添加筛选条件以获得更精确的结果")
-    elif original_count > 500:
-        print(f"💡 找到 {original_count} 条结果，将使用虚拟滚动模式保证界面流畅性")
-    
-    print(f"--- Search complete. Returning {len(processed_results)} processed results. ---")
-    return processed_results
+    def categorizer(self, global_searcher):
+        return self.DayCategorizer(FieldFacet(self.fieldname).categorizer(global_searcher))
+
+    class DayCategorizer(Categorizer):
+        def __init__(self, field_categorizer):
+            self.field_categorizer = field_categorizer
+
+        def set_searcher(self, segment_searcher, docoffset):
+            self.field_categorizer.set_searcher(segment_searcher, docoffset)
+
+        def key_for(self, matcher, segment_docnum):
+            catter = self.field_categorizer
+            return _day_key(catter.key_to_name(catter.key_for(matcher, segment_docnum)))
+
+
+def search_facets(query_str: str,
+                  index_dir_path: str,
+                  search_mode: str = 'phrase',
+                  search_scope: str = 'fulltext',
+                  min_size_kb: int | None = None,
+                  max_size_kb: int | None = None,
+                  start_date: str | None = None,
+                  end_date: str | None = None,
+                  file_type_filter: list[str] | None = None,
+                  current_source_dirs: list[str] | None = None,
+                  folders: list[str] | None = None,
+                  facet_names=('file_type', 'date', 'folder')) -> dict:
+    """统计查询命中文档按文件类型、修改日期（按天）和文件夹的分布。
+
+    计数直接来自索引（按文档计，而非按段落结果计），无需物化全部命中。
+    文件类型计数忽略 file_type_filter，使未勾选的类型也能显示数量。
+
+    Args:
+        folders: 需要统计的文件夹（任意层级的前缀，如文件夹树的节点）；
+                 未指定或旧版索引（不支持目录下推）时不统计文件夹
+        facet_names: 需要统计的分面，只需要部分分面时可减少查询
+
+    Returns:
+        dict: {'file_type': {'.pdf': n, ...}, 'date': {'2024-01-31': n, ...},
+               'folder': {folder: n, ...}, 'total_docs': n}（total_docs 随日期分面统计）
+    """
+    from whoosh import sorting
+    facet_counts = {'file_type': {}, 'date': {}, 'folder': {}, 'total_docs': 0}
+    if not index_exists(index_dir_path):
+        return facet_counts
+    error_results, _ = _check_query_preconditions(query_str)
+    if error_results:
+        return facet_counts
+
+    _, license_mask = get_license_file_type_filter()
+    groups = {}
+    ix = open_search_index(index_dir_path)
+    try:
+        with ix.searcher() as searcher:
+            dir_filter, _ = _resolve_directory_scope(ix, index_dir_path, current_source_dirs)
+            final_query, _ = _build_search_query(
+                ix, query_str, search_mode, search_scope, min_size_kb, max_size_kb,
+                start_date, end_date, file_type_filter)
+
+            facets = sorting.Facets()
+            if 'date' in facet_names:
+                facets.add_facet('date', DayFacet('last_modified'))
+            if 'folder' in facet_names and folders and supports_directory_pushdown(ix, index_dir_path):
+                # dir_keys 含文件所有上级目录的键，任意层级的文件夹前缀都可以直接计数
+                facets.add_query('folder', {
+                    folder: Term('dir_keys', PathStandardizer.directory_key(folder))
+                    for folder in folders
+                }, allow_overlap=True)
+            if 'file_type' in facet_names and not file_type_filter:
+                facets.add_field('file_type')
+            if facets.names():
+                groups.update(_collect_facet_counts(searcher, final_query, facets, dir_filter, license_mask))
+
+            if 'file_type' in facet_names and file_type_filter:
+                # 类型分面需要去掉类型过滤条件重新统计
+                type_query, _ = _build_search_query(
+                    ix, query_str, search_mode, search_scope, min_size_kb, max_size_kb,
+                    start_date, end_date, None)
+                type_facets = sorting.Facets().add_field('file_type')
+                groups.update(_collect_facet_counts(searcher, type_query, type_facets, dir_filter, license_mask))
+    finally:
+        ix.close()
+
+    # file_type 按文本分词存储（'.pdf' -> 'pdf'），恢复带点的扩展名
+    for type_term, count in groups.get('file_type', {}).items():
+        type_key = f".{type_term}" if type_term else ''
+        facet_counts['file_type'][type_key] = facet_counts['file_type'].get(type_key, 0) + count
+
+    facet_counts['date'] = dict(groups.get('date', {}))
+    facet_counts['total_docs'] = sum(facet_counts['date'].values())
+    facet_counts['folder'] = dict(groups.get('folder', {}))
+    return facet_counts
+# --- END ADDED ---
 
 # --- MODIFIED: Accept a dictionary --- 
 # def _extract_worker(item_data: tuple) -> dict:
@@ -2296,6 +2834,7 @@ def _extract_worker(worker_args: dict) -> dict:
     error_message = None
     content_truncated = False # --- ADDED: Flag for truncation
 
+    span_start = perf_trace.now()  # ADDED: 按文件类型记录提取耗时
     try:
         start_time = time.time()
         
@@ -2800,6 +3339,8 @@ def _extract_worker(worker_args: dict) -> dict:
         'ocr_enabled_for_file': enable_ocr_for_file,
         'content_truncated': content_truncated
     }
+    perf_trace.record(f"extract{result['file_type'] or '.unknown'}", span_start,
+                      filename_only=is_filename_only, error=error_message is not None)
     return result
 
 # --- ADDED: Function to read license-skipped files ---
@@ -3378,7 +3919,8 @@ def create_or_update_index(directories: list[str], index_dir_path: str, enable_o
                           max_file_size_mb: int = 100, skip_system_files: bool = True,
                           incremental: bool = True, max_workers: int = None, 
                           cancel_callback=None, file_types_to_index=None, 
-                          filename_only_types=None, preserve_removed_dirs: bool = True):
+                          filename_only_types=None, preserve_removed_dirs: bool = True,
+                          update_snapshot: bool = True):
     """
     创建或更新文档索引（优化版本）
 
@@ -3394,6 +3936,7 @@ def create_or_update_index(directories: list[str], index_dir_path: str, enable_o
         max_workers: 最大工作进程数
         cancel_callback: 取消检查回调函数，如果返回True则取消操作
         file_types_to_index: 要索引的文件类型列表，如['txt', 'docx', 'pdf']
+        update_snapshot: 提交后是否重建文件名快照（分片更新时由上层统一重建）
 
     Yields:
         dict: 进度信息
@@ -3418,6 +3961,16 @@ def create_or_update_index(directories: list[str], index_dir_path: str, enable_o
         index_path = Path(index_dir_path)
         index_path.mkdir(parents=True, exist_ok=True)
 
+        # --- MODIFIED: 旧版本索引在扫描前升级，文件均未变更（提前返回）时也能启用新模式的功能 ---
+        if exists_in(index_dir_path) and get_index_schema_version(index_dir_path) < INDEX_SCHEMA_VERSION:
+            progress.update({
+                'stage': 'upgrading_schema',
+                'message': '🔧 正在升级索引结构（仅需一次）...'
+            })
+            yield progress
+            upgrade_index_schema(index_dir_path, cancel_callback=cancel_callback)
+        # --- END MODIFIED ---
+
         # 更新进度信息
         progress.update({
             'stage': 'scanning',
@@ -3446,9 +3999,10 @@ def create_or_update_index(directories: list[str], index_dir_path: str, enable_o
             print(f"已加载缓存信息：{len(file_cache)} 个文件")
         
         # 智能扫描：在扫描阶段就利用缓存信息
-        all_files, filename_only_files, skipped_files = scan_documents_optimized(
-            directories, max_file_size_mb, skip_system_files, file_types_to_index, filename_only_types, cancel_callback, file_cache, index_dir_path
-        )
+        with perf_trace.span("scan", directories=len(directories)):
+            all_files, filename_only_files, skipped_files = scan_documents_optimized(
+                directories, max_file_size_mb, skip_system_files, file_types_to_index, filename_only_types, cancel_callback, file_cache, index_dir_path
+            )
 
         total_files = len(all_files) + len(filename_only_files)
         progress.update({
@@ -3474,6 +4028,10 @@ def create_or_update_index(directories: list[str], index_dir_path: str, enable_o
                 'files_skipped': len(skipped_files),
                 'errors': 0
             })
+            # --- ADDED: 文件均已是最新时，只在缺少文件名快照时导出 ---
+            if update_snapshot:
+                ensure_filename_snapshot(index_dir_path)
+            # --- END ADDED ---
             yield progress
             return
 
@@ -3491,7 +4049,8 @@ def create_or_update_index(directories: list[str], index_dir_path: str, enable_o
             if cancel_callback and cancel_callback():
                 raise InterruptedError("操作被用户取消")
 
-            new_files, modified_files, deleted_files = detect_file_changes(all_files, file_cache, filename_only_files)
+            with perf_trace.span("stat", files=len(all_files) + len(filename_only_files)):
+                new_files, modified_files, deleted_files = detect_file_changes(all_files, file_cache, filename_only_files)
 
             files_to_process = new_files + modified_files
             
@@ -3527,6 +4086,11 @@ def create_or_update_index(directories: list[str], index_dir_path: str, enable_o
                         print(f"快速完成：缓存已更新，记录了 {len(file_cache)} 个文件状态")
                     except Exception as e:
                         print(f"警告：缓存保存失败，但不影响索引完整性: {e}")
+
+                # --- ADDED: 文件均已是最新时，只在缺少文件名快照时导出 ---
+                if update_snapshot:
+                    ensure_filename_snapshot(index_dir_path)
+                # --- END ADDED ---
                 
                 # 快速完成，跳过所有收尾处理
                 progress.update({
@@ -3567,22 +4131,14 @@ def create_or_update_index(directories: list[str], index_dir_path: str, enable_o
         from whoosh import fields, index
 
         # 定义索引模式
-        schema = fields.Schema(
-            path=fields.ID(stored=True, unique=True),
-            content=fields.TEXT(stored=True),
-            filename_text=fields.TEXT(stored=True),
-            structure_map=fields.TEXT(stored=True),
-            last_modified=fields.NUMERIC(stored=True),
-            file_size=fields.NUMERIC(stored=True),
-            file_type=fields.TEXT(stored=True),
-            indexed_with_ocr=fields.BOOLEAN(stored=True)
-        )
+        schema = build_index_schema()
 
-        # 创建或打开索引
+        # 创建或打开索引（旧版本索引已在扫描前升级）
         if index.exists_in(index_dir_path):
             ix = index.open_dir(index_dir_path)
         else:
             ix = index.create_in(index_dir_path, schema)
+            save_index_features(index_dir_path, {'schema_version': INDEX_SCHEMA_VERSION})
 
         # 5. 批量处理文件
         if files_to_process:
@@ -3722,6 +4278,7 @@ def create_or_update_index(directories: list[str], index_dir_path: str, enable_o
 
             # 6. 批量索引文档
             with ix.writer() as writer:
+                writer.commit = perf_trace.traced("commit")(writer.commit)  # ADDED: 退出 with 时提交
                 # 根据preserve_removed_dirs参数决定是否删除文件
                 if incremental and 'deleted_files' in locals() and not preserve_removed_dirs:
                     print(f"物理删除 {len(deleted_files)} 个索引条目（preserve_removed_dirs=False）")
@@ -3763,17 +4320,18 @@ def create_or_update_index(directories: list[str], index_dir_path: str, enable_o
                             yield progress
                             continue
 
-                        # 索引文档
-                        writer.add_document(
-                            path=result['path_key'],
-                            content=result['text_content'],
-                            filename_text=result['filename'],
-                            structure_map=json.dumps(result['structure'], ensure_ascii=False),
-                            last_modified=result['mtime'],
-                            file_size=result['fsize'],
-                            file_type=result['file_type'],
-                            indexed_with_ocr=result['ocr_enabled_for_file']
-                        )
+                        # 索引文档（write 跟踪段包含其中的 tokenize）
+                        with trace_document_write(writer, result['file_type']):
+                            writer.add_document(**add_directory_keys(writer.schema, dict(
+                                path=result['path_key'],
+                                content=result['text_content'],
+                                filename_text=result['filename'],
+                                structure_map=json.dumps(result['structure'], ensure_ascii=False),
+                                last_modified=result['mtime'],
+                                file_size=result['fsize'],
+                                file_type=result['file_type'],
+                                indexed_with_ocr=result['ocr_enabled_for_file']
+                            )))
                         success_count += 1
                         
                         # 发送进度更新
@@ -3859,6 +4417,13 @@ def create_or_update_index(directories: list[str], index_dir_path: str, enable_o
                 file_path, reason = skip_info
                 record_skipped_file(index_dir_path, str(file_path), reason)
 
+        # --- ADDED: 增量写入会不断产生新段，段数超限时在后台合并 ---
+        schedule_segment_merge(index_dir_path)
+
+        # --- ADDED: 重建快捷搜索使用的文件名快照 ---
+        if update_snapshot:
+            export_filename_snapshot(index_dir_path)
+
         # 9. 显示正在完成状态
         progress.update({
             'stage': 'finalizing',
@@ -4180,6 +4745,10 @@ def process_files_multiprocess(worker_args_list: list[dict], max_workers: int =
     # 在实际部署中，这应该使用真正的multiprocessing.Pool
     print(f"开始多进程处理 {total_files} 个文件，使用 {max_workers} 个进程")
 
+    # --- ADDED: 按本批文件的扩展名预先导入提取依赖（延迟导入的模块只在这里加载一次） ---
+    preload_extractors({Path(args.get('path_key', '')).suffix.lower() for args in worker_args_list})
+    # ----------------------------------------------------------------------------
+
     for i, args in enumerate(worker_args_list):
         try:
             # 在实际实现中这里会调用真正的多进程处理
@@ -4226,6 +4795,44 @@ def process_files_multiprocess(worker_args_list: list[dict], max_workers: int =
 
     return results
 
+# --- ADDED: 写入文档时的分词跟踪 ---
+class _TracedAnalyzer:
+    """写入单个文档期间临时包裹字段分析器，记录分词耗时"""
+
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+
+    def __call__(self, value, **kwargs):
+        return perf_trace.timed_iter("tokenize", self.analyzer(value, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self.analyzer, name)
+
+
+@contextmanager
+def trace_document_write(writer, file_type: str = ''):
+    """
+    把一次 add_document/update_document 记为 write 跟踪段，其中的分词记为 tokenize
+
+    分词在写入时按 token 流惰性进行，只能在写入期间包裹 TEXT 字段的分析器；
+    退出时恢复原分析器，提交时保存的索引结构不受影响。
+    """
+    if not perf_trace.is_enabled():
+        yield
+        return
+    schema = writer.schema
+    wrapped = [(field, field.analyzer) for _, field in schema.items()
+               if isinstance(field, TEXT) and field.analyzer is not None]
+    for field, analyzer in wrapped:
+        field.analyzer = _TracedAnalyzer(analyzer)
+    try:
+        with perf_trace.span("write", file_type=file_type):
+            yield
+    finally:
+        for field, analyzer in wrapped:
+            field.analyzer = analyzer
+# --- END ADDED ---
+
 def batch_index_documents(writer, extraction_results: list[dict], index_dir_path: str, progress_callback=None) -> tuple[int, int]:
     """
     批量索引文档（优化版本）
@@ -4277,16 +4884,17 @@ def batch_index_documents(writer, extraction_results: list[dict], index_dir_path
             file_path = Path(path_key)
 
             # 添加到索引
-            writer.update_document(
-                path=normalize_path_for_index(path_key),
-                content=content,
-                filename_text=file_path.name,
-                structure_map=json.dumps(structure),
-                last_modified=result['mtime'],
-                file_size=result['fsize'],
-                file_type=result.get('file_type', '').lstrip('.'),
-                indexed_with_ocr=result.get('ocr_enabled_for_file', False)
-            )
+            with trace_document_write(writer, result.get('file_type', '')):
+                writer.update_document(**add_directory_keys(writer.schema, dict(
+                    path=normalize_path_for_index(path_key),
+                    content=content,
+                    filename_text=file_path.name,
+                    structure_map=json.dumps(structure, ensure_ascii=False),
+                    last_modified=result['mtime'],
+                    file_size=result['fsize'],
+                    file_type=result.get('file_type', '').lstrip('.'),
+                    indexed_with_ocr=result.get('ocr_enabled_for_file', False)
+                )))
 
             success_count += 1
             
@@ -4324,6 +4932,775 @@ def remove_deleted_files_from_index(writer, deleted_files: list[str]):
         except Exception as e:
             print(f"删除索引项时出错 {file_path}: {e}")
 
+# --- ADDED: 索引模式（schema）版本管理与升级 ---
+# 2: 新增 dir_keys 目录键字段（目录过滤下推到索引查询）
+# 3: last_modified/file_size 改为64位列存储可排序字段（排序不再构建字段缓存）
+# 4: content 不再存储；structure_map 改为压缩列，不再分词索引，按命中单独读取
+INDEX_SCHEMA_VERSION = 4
+INDEX_FEATURES_FILENAME = "index_features.json"
+STRUCTURE_COMPRESSION_LEVEL = 6
+
+
+class CompressedTextColumn(FieldType):
+    """只写入压缩列存储的长文本字段（不建索引，也不放进存储字段）
+
+    Whoosh 读取任何存储字段时会解出整篇文档的全部存储字段；放在列中的值
+    只在按文档号读取时才解压，因此搜索排序、分面等不需要该值的流程没有额外 I/O。
+    """
+
+    indexed = False
+    stored = False
+
+    def __init__(self, level: int = STRUCTURE_COMPRESSION_LEVEL):
+        from whoosh.columns import CompressedBytesColumn
+        self.column_type = CompressedBytesColumn(level=level)
+
+    def to_bytes(self, value):
+        return value.encode('utf-8') if isinstance(value, str) else value
+
+    def from_column_value(self, value):
+        return value.decode('utf-8') if value else ''
+
+
+class StructureMapReader:
+    """按文档号读取文档结构（structure_map 的 JSON 文本）
+
+    新索引从压缩列中读取单个文档的值；v3 及更早的索引存放在存储字段中，
+    此时回退到命中（或文档号）的存储字段。每次搜索创建一个实例，列读取器只打开一次。
+    """
+
+    def __init__(self, searcher):
+        self._searcher = searcher
+        reader = searcher.reader()
+        self._column = reader.column_reader('structure_map') if reader.has_column('structure_map') else None
+
+    def get(self, docnum: int, stored_fields=None) -> str | None:
+        if self._column is not None:
+            value = self._column[docnum]
+            if value:
+                return value
+        if stored_fields is None:
+            stored_fields = self._searcher.stored_fields(docnum)
+        return stored_fields.get('structure_map')
+
+
+def _structure_to_content(structure_map_json: str | None) -> str:
+    """由结构块的文本重建全文（content 不再存储，升级索引模式时用于重新建立全文索引）"""
+    if not structure_map_json:
+        return ''
+    try:
+        structure = json.loads(structure_map_json)
+    except json.JSONDecodeError:
+        return ''
+    texts = []
+    for block in structure:
+        if block.get('type') == 'excel_row':
+            texts.append(' '.join(str(value) for value in block.get('values') or [] if value is not None))
+        else:
+            texts.append(block.get('text', ''))
+    return '\n'.join(text for text in texts if text)
+
+
+def build_index_schema():
+    """返回 create_or_update_index 使用的当前索引模式"""
+    from whoosh import fields
+    return fields.Schema(
+        path=fields.ID(stored=True, unique=True),
+        # 全文只建索引不存储：结果片段全部来自 structure_map 中的块文本，存储会重复一份
+        content=fields.TEXT(stored=False),
+        filename_text=fields.TEXT(stored=True),
+        structure_map=CompressedTextColumn(),
+        # sortable=True 将值写入列存储，排序/分面直接读列，无需每个搜索器重建字段缓存
+        last_modified=fields.NUMERIC(int, bits=64, stored=True, sortable=True),
+        file_size=fields.NUMERIC(int, bits=64, stored=True, sortable=True),
+        file_type=fields.TEXT(stored=True),
+        indexed_with_ocr=fields.BOOLEAN(stored=True),
+        # 文件自身及所有上级目录的目录键（见 PathStandardizer.ancestor_directory_keys）
+        dir_keys=fields.KEYWORD(scorable=False)
+    )
+
+
+def load_index_features(index_dir_path: str) -> dict:
+    """读取索引特性记录（模式版本等），不存在时返回空字典"""
+    features_file = Path(index_dir_path) / INDEX_FEATURES_FILENAME
+    if features_file.exists():
+        try:
+            with open(features_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"读取索引特性记录失败: {e}")
+    return {}
+
+
+def save_index_features(index_dir_path: str, features: dict):
+    """保存索引特性记录"""
+    features_file = Path(index_dir_path) / INDEX_FEATURES_FILENAME
+    try:
+        with open(features_file, 'w', encoding='utf-8') as f:
+            json.dump(features, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"保存索引特性记录失败: {e}")
+
+
+def get_index_schema_version(index_dir_path: str) -> int:
+    """返回索引的模式版本，未记录的旧索引视为版本1；分片索引返回各分片中的最低版本"""
+    if is_sharded_index(index_dir_path):
+        shard_dirs = list_index_dirs(index_dir_path)
+        if shard_dirs:
+            return min(get_index_schema_version(shard_dir) for shard_dir in shard_dirs)
+    return int(load_index_features(index_dir_path).get('schema_version', 1))
+
+
+def add_directory_keys(schema, doc_fields: dict) -> dict:
+    """若索引模式包含 dir_keys 字段，为待写入的文档补充目录键"""
+    if 'dir_keys' in schema.names() and doc_fields.get('path'):
+        doc_fields['dir_keys'] = " ".join(PathStandardizer.ancestor_directory_keys(doc_fields['path']))
+    return doc_fields
+
+
+def upgrade_index_schema(index_dir_path: str, cancel_callback=None, progress_callback=None) -> bool:
+    """
+    将旧版本索引升级到当前模式
+
+    直接从索引的存储字段复制文档到新模式的临时索引，无需重新提取文件内容，
+    完成后只替换 Whoosh 的 MAIN 索引文件，缓存、跳过记录等文件保持不变。
+
+    Args:
+        index_dir_path: 索引目录路径
+        cancel_callback: 取消检查回调函数
+        progress_callback: 进度回调函数，接收(current, total, detail)参数
+
+    Returns:
+        bool: 是否执行了升级
+    """
+    if not Path(index_dir_path).exists() or not exists_in(index_dir_path):
+        return False
+    old_version = get_index_schema_version(index_dir_path)
+    if old_version >= INDEX_SCHEMA_VERSION:
+        return False
+
+    index_dir = Path(index_dir_path)
+    tmp_dir = index_dir.parent / f"{index_dir.name}.schema_upgrade"
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    print(f"升级索引模式: v{old_version} -> v{INDEX_SCHEMA_VERSION} ({index_dir_path})")
+
+    new_schema = build_index_schema()
+    old_ix = open_dir(index_dir_path)
+    try:
+        new_ix = create_in(str(tmp_dir), new_schema)
+        writer = new_ix.writer()
+        try:
+            with old_ix.searcher() as searcher:
+                total = searcher.doc_count()
+                structure_reader = StructureMapReader(searcher)
+                for i, (docnum, stored) in enumerate(searcher.reader().iter_docs()):
+                    check_cancellation(cancel_callback, "升级索引模式")
+                    doc_fields = {name: value for name, value in stored.items() if name in new_schema.names()}
+                    # v4 起 structure_map 在列中、content 不存储，需要分别取回
+                    doc_fields['structure_map'] = structure_reader.get(docnum, stored)
+                    if not doc_fields.get('content'):
+                        doc_fields['content'] = _structure_to_content(doc_fields['structure_map'])
+                    writer.add_document(**add_directory_keys(new_schema, doc_fields))
+                    if progress_callback and (i + 1) % 200 == 0:
+                        progress_callback(i + 1, total, f"升级索引模式 ({i + 1}/{total})")
+            writer.commit()
+        except BaseException:
+            writer.cancel()
+            raise
+        finally:
+            new_ix.close()
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    finally:
+        old_ix.close()
+
+    # 替换 Whoosh 索引文件（索引名为 MAIN），保留目录中的其它文件
+    for old_file in index_dir.iterdir():
+        if old_file.is_file() and (old_file.name.startswith('_MAIN_') or old_file.name.startswith('MAIN_')):
+            old_file.unlink()
+    for new_file in tmp_dir.iterdir():
+        shutil.move(str(new_file), str(index_dir / new_file.name))
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    features = load_index_features(index_dir_path)
+    features['schema_version'] = INDEX_SCHEMA_VERSION
+    save_index_features(index_dir_path, features)
+    print(f"索引模式升级完成: v{INDEX_SCHEMA_VERSION}")
+    return True
+
+
+def supports_directory_pushdown(ix, index_dir_path: str) -> bool:
+    """索引中所有文档都带有目录键时，目录过滤才能下推到查询"""
+    return 'dir_keys' in ix.schema.names() and get_index_schema_version(index_dir_path) >= 2
+
+
+def build_directory_filter(ix, index_dir_path: str, source_dirs: list[str] | None):
+    """
+    构造目录过滤查询（作为 searcher.search 的 filter 参数）
+
+    Returns:
+        Query | None: 目录过滤查询；无需过滤或索引不支持下推时返回 None（调用方回退到逐条过滤）
+    """
+    if not source_dirs or not supports_directory_pushdown(ix, index_dir_path):
+        return None
+    dir_terms = [Term('dir_keys', PathStandardizer.directory_key(d)) for d in source_dirs if d]
+    if not dir_terms:
+        return None
+    return dir_terms[0] if len(dir_terms) == 1 else Or(dir_terms)
+# --- END ADDED ---
+
+# --- ADDED: 段并行搜索与有界段合并策略 ---
+MAX_INDEX_SEGMENTS = 8               # 段合并后保留的最大段数（保留若干段供并行搜索）
+PARALLEL_SEGMENT_MIN_DOCS = 20000    # 文档总数低于此值时，进程调度开销大于并行收益
+
+_segment_pool = None
+_segment_pool_lock = Lock()
+_segment_worker_searchers = {}       # 子进程内缓存: 索引目录 -> 搜索器
+_segment_merge_lock = Lock()
+
+
+class SegmentHit:
+    """段并行搜索的命中：全局文档号与评分，存储字段在第一次访问时才读取（与 Whoosh Hit 的用法兼容）
+
+    合并各段 top-k 时不读取存储字段，流式搜索的第一批结果不必等待全部命中的字段加载完。
+    """
+
+    __slots__ = ('searcher', 'docnum', 'score', '_fields')
+
+    def __init__(self, searcher, docnum: int, score: float):
+        self.searcher = searcher
+        self.docnum = docnum
+        self.score = score
+        self._fields = None
+
+    def fields(self) -> dict:
+        if self._fields is None:
+            self._fields = self.searcher.stored_fields(self.docnum)
+        return self._fields
+
+    def get(self, key, default=None):
+        return self.fields().get(key, default)
+
+    def __getitem__(self, key):
+        return self.fields()[key]
+
+    def __contains__(self, key):
+        return key in self.fields()
+
+    def keys(self):
+        return self.fields().keys()
+
+    def items(self):
+        return self.fields().items()
+
+
+def _get_segment_pool():
+    """返回段搜索进程池（按需创建，进程数不超过CPU核心数与最大段数）"""
+    global _segment_pool
+    with _segment_pool_lock:
+        if _segment_pool is None:
+            workers = max(1, min(multiprocessing.cpu_count(), MAX_INDEX_SEGMENTS))
+            _segment_pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        return _segment_pool
+
+
+def _score_segment_worker(index_dir_path: str, segment_id: str, query, limit: int,
+                          filter_query=None, mask_query=None) -> list[tuple[float, int]]:
+    """子进程：对单个段评分，返回该段的 top-k (评分, 段内文档号)。
+
+    段内搜索器以整个索引的搜索器为父级，因此 idf 等统计量仍是全局的，
+    各段评分可直接比较。
+    """
+    for attempt in range(2):
+        cached = _segment_worker_searchers.get(index_dir_path)
+        if cached is not None and (attempt > 0 or cached[0].latest_generation() != cached[2]):
+            cached[1].close()
+            cached = None
+        if cached is None:
+            # 分片索引没有统一的 refresh()，按各分片的代数判断是否需要重新打开
+            ix = open_search_index(index_dir_path)
+            cached = (ix, ix.searcher(weighting=scoring.BM25F()), ix.latest_generation())
+            _segment_worker_searchers[index_dir_path] = cached
+        searcher = cached[1]
+
+        for leaf_searcher, _ in searcher.leaf_searchers():
+            if leaf_searcher.reader().segment().segment_id() == segment_id:
+                results = leaf_searcher.search(query, limit=limit, filter=filter_query, mask=mask_query)
+                return [(hit.score, hit.docnum) for hit in results]
+    raise LookupError(f"索引段已变化: {segment_id}")
+
+
+def search_segments_parallel(searcher, index_dir_path: str, query, limit: int,
+                             filter_query=None, mask_query=None) -> list[SegmentHit] | None:
+    """
+    在多个进程中并行对各索引段评分，再合并各段的 top-k 堆
+
+    仅用于按相关度排序的搜索。段数少于2或文档数低于 PARALLEL_SEGMENT_MIN_DOCS 时
+    返回 None，由调用方使用普通的 searcher.search。
+
+    Returns:
+        list[SegmentHit] | None: 按评分降序的命中列表
+    """
+    if searcher.is_atomic() or searcher.doc_count() < PARALLEL_SEGMENT_MIN_DOCS:
+        return None
+    leaves = [(leaf.reader().segment().segment_id(), offset) for leaf, offset in searcher.leaf_searchers()]
+    if len(leaves) < 2:
+        return None
+
+    try:
+        pool = _get_segment_pool()
+        futures = [
+            (offset, pool.submit(_score_segment_worker, index_dir_path, segment_id, query,
+                                 limit, filter_query, mask_query))
+            for segment_id, offset in leaves
+        ]
+        scored = []
+        for offset, future in futures:
+            scored.extend((score, offset + docnum) for score, docnum in future.result())
+    except Exception as e:
+        print(f"段并行搜索失败，回退到单线程搜索: {e}")
+        return None
+
+    # 合并各段 top-k：评分相同时按文档号升序，与 Whoosh 的顺序一致
+    top_hits = heapq.nsmallest(limit, scored, key=lambda item: (-item[0], item[1]))
+    print(f"段并行搜索: {len(leaves)} 个段, {len(scored)} 个候选, 取前 {len(top_hits)} 个")
+    return [SegmentHit(searcher, docnum, score) for score, docnum in top_hits]
+
+
+@perf_trace.traced("score")
+def _search_hits(searcher, index_dir_path: str, final_query, limit: int, sort_field, reverse: bool,
+                 filter_query=None, mask_query=None):
+    """按相关度排序时优先段并行搜索，其余情况使用 searcher.search"""
+    if sort_field is None:
+        hits = search_segments_parallel(searcher, index_dir_path, final_query, limit,
+                                        filter_query, mask_query)
+        if hits is not None:
+            return hits
+    return searcher.search(final_query, limit=limit, sortedby=sort_field, reverse=reverse,
+                           filter=filter_query, mask=mask_query)
+
+
+def make_bounded_merge_policy(max_segments: int = MAX_INDEX_SEGMENTS, max_deleted_ratio: float | None = None):
+    """
+    创建段合并策略（Whoosh mergetype）
+
+    先合并已删除文档比例超过 max_deleted_ratio 的段（清除已删除文档），再按 Whoosh
+    默认策略合并小段；提交后段数仍会超过 max_segments 时继续合并最小的段。
+    """
+    from whoosh.reading import SegmentReader
+    from whoosh.writing import MERGE_SMALL
+
+    def merge_policy(writer, segments):
+        def merge(segs):
+            for seg in segs:
+                reader = SegmentReader(writer.storage, writer.schema, seg)
+                writer.add_reader(reader)
+                reader.close()
+
+        purged = []
+        if max_deleted_ratio is not None:
+            purged = [seg for seg in segments
+                      if seg.doc_count_all() and seg.deleted_count() / seg.doc_count_all() > max_deleted_ratio]
+            merge(purged)
+        candidates = [seg for seg in segments if seg not in purged]
+        remaining = MERGE_SMALL(writer, candidates)
+
+        # 新文档和被合并的段会写入本次提交产生的新段，需要为它预留一个位置
+        creates_segment = writer.docnum > 0 or bool(purged) or len(remaining) < len(candidates)
+        limit = max_segments - 1 if creates_segment else max_segments
+        if len(remaining) <= limit:
+            return remaining
+
+        by_size = sorted(remaining, key=lambda seg: seg.doc_count_all())
+        # 若此前不会产生新段，合并本身会产生一个，需要多合并一个段
+        merge_count = len(by_size) - limit if creates_segment else len(by_size) - limit + 1
+        merge(by_size[:merge_count])
+        return by_size[merge_count:]
+
+    return merge_policy
+
+
+# 默认段合并策略：段数不超过 MAX_INDEX_SEGMENTS
+BOUNDED_MERGE = make_bounded_merge_policy()
+
+
+def merge_index_segments(index_dir_path: str) -> bool:
+    """段数超过 MAX_INDEX_SEGMENTS 时按 BOUNDED_MERGE 合并，索引被占用时跳过
+
+    Returns:
+        bool: 是否执行了合并
+    """
+    from whoosh.index import LockError
+
+    if not _segment_merge_lock.acquire(blocking=False):
+        return False
+    try:
+        if not Path(index_dir_path).exists() or not exists_in(index_dir_path):
+            return False
+        ix = open_dir(index_dir_path)
+        try:
+            segment_count = len(ix._segments())
+            if segment_count <= MAX_INDEX_SEGMENTS:
+                return False
+            try:
+                writer = ix.writer()
+            except LockError:
+                print("索引正在写入，跳过本次段合并")
+                return False
+            writer.commit(mergetype=BOUNDED_MERGE)
+            print(f"索引段合并完成: {segment_count} -> {len(ix._segments())} 个段")  # _segments() 每次读取最新的目录表
+            return True
+        finally:
+            ix.close()
+    except Exception as e:
+        print(f"索引段合并失败: {e}")
+        return False
+    finally:
+        _segment_merge_lock.release()
+
+
+def schedule_segment_merge(index_dir_path: str) -> threading.Thread:
+    """在后台线程中执行 merge_index_segments，不阻塞索引流程"""
+    merge_thread = threading.Thread(target=merge_index_segments, args=(index_dir_path,),
+                                    name="index-segment-merge", daemon=True)
+    merge_thread.start()
+    return merge_thread
+# --- END ADDED ---
+
+# --- ADDED: 分片索引布局（每个源目录一个分片） ---
+SHARD_MANIFEST_FILENAME = "shards.json"
+SHARDS_SUBDIR = "shards"
+DEFAULT_PARALLEL_SHARDS = 2          # 同时更新的分片数（每个分片内部还有自己的提取进程）
+
+
+def load_shard_manifest(index_dir_path: str) -> dict:
+    """读取分片清单，不是分片索引时返回空字典"""
+    manifest_file = Path(index_dir_path) / SHARD_MANIFEST_FILENAME
+    if manifest_file.exists():
+        try:
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"读取分片清单失败: {e}")
+    return {}
+
+
+def save_shard_manifest(index_dir_path: str, manifest: dict):
+    """保存分片清单"""
+    manifest_file = Path(index_dir_path) / SHARD_MANIFEST_FILENAME
+    try:
+        with open(manifest_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"保存分片清单失败: {e}")
+
+
+def is_sharded_index(index_dir_path: str) -> bool:
+    return bool(load_shard_manifest(index_dir_path).get('shards'))
+
+
+def shard_dir_for(index_dir_path: str, source_dir: str) -> str:
+    """源目录对应的分片目录（以目录键命名，新增源目录不影响已有分片）"""
+    return str(Path(index_dir_path) / SHARDS_SUBDIR / PathStandardizer.directory_key(source_dir))
+
+
+def list_index_dirs(index_dir_path: str) -> list[str]:
+    """
+    返回实际存放 Whoosh 索引的目录列表
+
+    普通索引返回 [index_dir_path]；分片索引返回已建立的各分片目录。
+    """
+    manifest = load_shard_manifest(index_dir_path)
+    if not manifest.get('shards'):
+        return [index_dir_path]
+    shard_dirs = []
+    for shard_info in manifest['shards'].values():
+        shard_dir = str(Path(index_dir_path) / shard_info['path'])
+        if exists_in(shard_dir):
+            shard_dirs.append(shard_dir)
+    return shard_dirs
+
+
+def index_exists(index_dir_path: str) -> bool:
+    """普通索引或至少一个分片已建立时返回 True"""
+    if not Path(index_dir_path).exists():
+        return False
+    if is_sharded_index(index_dir_path):
+        return bool(list_index_dirs(index_dir_path))
+    return exists_in(index_dir_path)
+
+
+class ShardedIndex:
+    """多个分片索引的联合视图
+
+    提供与 Whoosh 索引对象相同的 schema / reader() / searcher() / close() 用法。
+    各分片的段读取器合并为一个 MultiReader，idf 等统计量在全部分片上计算，
+    因此联合搜索的评分与单一索引一致，现有的搜索、排序、分面代码无需区分布局。
+    """
+
+    def __init__(self, shard_indexes: list):
+        self._indexes = shard_indexes
+        self.schema = shard_indexes[0].schema
+
+    def reader(self):
+        from whoosh.reading import MultiReader
+        segment_readers = []
+        empty_readers = []
+        for ix in self._indexes:
+            shard_reader = ix.reader()
+            if shard_reader.doc_count_all() == 0:
+                empty_readers.append(shard_reader)
+                continue
+            segment_readers.extend(leaf for leaf, _ in shard_reader.leaf_readers())
+        if not segment_readers:
+            return empty_readers[0]
+        for empty_reader in empty_readers:
+            empty_reader.close()
+        if len(segment_readers) == 1:
+            return segment_readers[0]
+        return MultiReader(segment_readers)
+
+    def searcher(self, **kwargs):
+        from whoosh.searching import Searcher
+        return Searcher(self.reader(), **kwargs)
+
+    def latest_generation(self):
+        return tuple(ix.latest_generation() for ix in self._indexes)
+
+    def close(self):
+        for ix in self._indexes:
+            ix.close()
+
+
+def open_search_index(index_dir_path: str):
+    """
+    打开用于搜索的索引：普通索引返回 Whoosh 索引对象，分片索引返回包含全部分片的 ShardedIndex
+
+    分片索引总是打开全部分片，使评分统计与单一索引一致；目录范围仍由 dir_keys 过滤下推处理。
+    """
+    if not is_sharded_index(index_dir_path):
+        return open_dir(index_dir_path)
+    return ShardedIndex([open_dir(shard_dir) for shard_dir in list_index_dirs(index_dir_path)])
+
+
+def _remove_single_index_files(index_dir_path: str):
+    """删除索引目录中普通布局的 Whoosh 文件及其缓存（切换到分片布局时调用）"""
+    index_dir = Path(index_dir_path)
+    for entry in index_dir.iterdir():
+        if entry.is_file() and (entry.name.startswith('MAIN_') or entry.name.startswith('_MAIN_')
+                                or entry.name in ("file_cache.json", INDEX_FEATURES_FILENAME)):
+            entry.unlink()
+
+
+def remove_shard_layout(index_dir_path: str):
+    """删除分片清单与全部分片（切换回普通布局时调用）"""
+    shutil.rmtree(Path(index_dir_path) / SHARDS_SUBDIR, ignore_errors=True)
+    manifest_file = Path(index_dir_path) / SHARD_MANIFEST_FILENAME
+    if manifest_file.exists():
+        manifest_file.unlink()
+
+
+def _merge_shard_skipped_records(index_dir_path: str, shard_dirs: list[str]):
+    """把各分片的跳过文件记录汇总到索引根目录，界面的“查看跳过文件”读取这里"""
+    clear_skipped_files_record(index_dir_path)
+    rows = []
+    for shard_dir in shard_dirs:
+        shard_log = os.path.join(shard_dir, "index_skipped_files.tsv")
+        if not os.path.exists(shard_log):
+            continue
+        with open(shard_log, 'r', encoding='utf-8') as f:
+            rows.extend(list(csv.reader(f, delimiter='\t'))[1:])
+    if not rows:
+        return
+    with open(os.path.join(index_dir_path, "index_skipped_files.tsv"), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter='\t')
+        writer.writerow(["文件路径", "跳过原因", "时间"])
+        writer.writerows(rows)
+
+
+def create_or_update_sharded_index(directories: list[str], index_dir_path: str,
+                                   max_parallel_shards: int = DEFAULT_PARALLEL_SHARDS,
+                                   cancel_callback=None, rebuild_dirs: list[str] | None = None,
+                                   **index_kwargs):
+    """
+    按源目录分片创建或更新索引
+
+    每个源目录对应 index_dir_path/shards/ 下的一个独立 Whoosh 索引，各分片有自己的
+    写入锁和文件缓存，因此可以并行更新；新增源目录只会新建分片，不触碰已有分片；
+    单个分片损坏时可以用 rebuild_dirs 单独重建。
+
+    Args:
+        directories: 要索引的源目录列表
+        index_dir_path: 索引根目录
+        max_parallel_shards: 同时更新的分片数
+        cancel_callback: 取消检查回调函数
+        rebuild_dirs: 需要清空后完整重建的源目录
+        **index_kwargs: 传给 create_or_update_index 的其余参数
+
+    Yields:
+        dict: 进度信息（格式与 create_or_update_index 相同）
+    """
+    import queue
+
+    index_path = Path(index_dir_path)
+    index_path.mkdir(parents=True, exist_ok=True)
+    manifest = load_shard_manifest(index_dir_path)
+    if not manifest.get('shards'):
+        if exists_in(index_dir_path):
+            print("将现有的单一索引切换为分片索引布局")
+            _remove_single_index_files(index_dir_path)
+        manifest = {'layout': 'sharded', 'shards': {}}
+
+    # 非增量模式等同于重建全部分片；分片本身总以增量模式构建，保证文件缓存被保存
+    if not index_kwargs.pop('incremental', True):
+        rebuild_dirs = directories
+    rebuild_keys = {PathStandardizer.directory_key(d) for d in (rebuild_dirs or [])}
+    shard_jobs = []
+    for source_dir in directories:
+        shard_id = PathStandardizer.directory_key(source_dir)
+        shard_dir = shard_dir_for(index_dir_path, source_dir)
+        if shard_id in rebuild_keys:
+            print(f"重建分片: {source_dir}")
+            shutil.rmtree(shard_dir, ignore_errors=True)
+        manifest['shards'][shard_id] = {
+            'source_dir': source_dir,
+            'path': str(Path(SHARDS_SUBDIR) / shard_id),
+        }
+        shard_jobs.append((source_dir, shard_dir))
+    if not index_kwargs.get('preserve_removed_dirs', True):
+        # 不保留已移除目录时直接删除其分片，其余分片不受影响
+        current_keys = {PathStandardizer.directory_key(d) for d in directories}
+        for shard_id in [k for k in manifest['shards'] if k not in current_keys]:
+            print(f"删除已移除目录的分片: {manifest['shards'][shard_id]['source_dir']}")
+            shutil.rmtree(Path(index_dir_path) / manifest['shards'].pop(shard_id)['path'], ignore_errors=True)
+    save_shard_manifest(index_dir_path, manifest)
+
+    updates = queue.Queue()
+
+    def run_shard(source_dir, shard_dir):
+        last_progress = {}
+        for shard_progress in create_or_update_index([source_dir], shard_dir, incremental=True,
+                                                     cancel_callback=cancel_callback,
+                                                     update_snapshot=False, **index_kwargs):
+            last_progress = dict(shard_progress)
+            updates.put((source_dir, last_progress))
+        return last_progress
+
+    progress = {
+        'stage': 'scanning',
+        'current': 0,
+        'total': len(shard_jobs),
+        'message': f'开始更新 {len(shard_jobs)} 个索引分片...',
+        'files_processed': 0,
+        'files_skipped': 0,
+        'errors': 0
+    }
+    yield progress
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_parallel_shards),
+                                               thread_name_prefix="index-shard") as executor:
+        futures = {executor.submit(run_shard, source_dir, shard_dir): source_dir
+                   for source_dir, shard_dir in shard_jobs}
+        pending = set(futures)
+        while pending or not updates.empty():
+            try:
+                source_dir, shard_progress = updates.get(timeout=0.2)
+            except queue.Empty:
+                pending = {f for f in pending if not f.done()}
+                continue
+            # 分片自己的完成/取消/错误只作为状态转发，整体结果在全部分片结束后汇总
+            stage = shard_progress.get('stage', '')
+            if stage in ('complete', 'cancelled', 'error'):
+                stage = f'shard_{stage}'
+            shard_name = Path(source_dir).name or source_dir
+            yield dict(shard_progress, stage=stage,
+                       message=f"[分片 {shard_name}] {shard_progress.get('message', '')}")
+
+        shard_errors = []
+        for future, source_dir in futures.items():
+            try:
+                shard_result = future.result()
+            except InterruptedError:
+                raise
+            except Exception as e:
+                shard_errors.append(f"{source_dir}: {e}")
+                continue
+            for key in ('files_processed', 'files_skipped', 'errors'):
+                progress[key] += shard_result.get(key, 0)
+
+    # 未参与本次更新的分片保留上次的跳过记录，一并汇总
+    _merge_shard_skipped_records(index_dir_path, [str(index_path / shard_info['path'])
+                                                  for shard_info in manifest['shards'].values()])
+    export_filename_snapshot(index_dir_path)
+    progress['errors'] += len(shard_errors)
+    message = (f'🎉 分片索引更新完成！\n' +
+               f'🧩 分片: {len(shard_jobs)} 个\n' +
+               f'✅ 成功处理: {progress["files_processed"]} 个文件\n' +
+               f'⏭️ 跳过文件: {progress["files_skipped"]} 个\n' +
+               f'❌ 处理错误: {progress["errors"]} 个')
+    if shard_errors:
+        message += '\n⚠️ 以下分片更新失败，可单独重建:\n' + '\n'.join(shard_errors)
+    progress.update({'stage': 'complete', 'current': len(shard_jobs), 'message': message})
+    yield progress
+
+
+def rebuild_shard(index_dir_path: str, source_dir: str, **index_kwargs):
+    """清空并完整重建单个源目录的分片，其他分片保持不变
+
+    Yields:
+        dict: 进度信息（格式与 create_or_update_index 相同）
+    """
+    # 目录列表只有待重建的源目录，不保留已移除目录会把其他分片当作已移除而删除
+    index_kwargs['preserve_removed_dirs'] = True
+    yield from create_or_update_sharded_index([source_dir], index_dir_path,
+                                              rebuild_dirs=[source_dir], **index_kwargs)
+# --- END ADDED ---
+
+# --- ADDED: 快捷搜索文件名快照 ---
+def export_filename_snapshot(index_dir_path: str) -> int:
+    """从索引导出文件名快照（见 index_snapshot），失败时只记录日志
+
+    Returns:
+        int: 快照中的记录数，失败时返回 -1
+    """
+    import index_snapshot
+
+    if not index_exists(index_dir_path):
+        return -1
+    start_time = time.time()
+    try:
+        ix = open_search_index(index_dir_path)
+        try:
+            with ix.reader() as reader:
+                count = index_snapshot.write_snapshot(index_dir_path, (
+                    (stored['path'], stored.get('last_modified', 0), stored.get('file_size', 0))
+                    for _, stored in reader.iter_docs() if stored.get('path')))
+        finally:
+            ix.close()
+    except Exception as e:
+        print(f"导出文件名快照失败: {e}")
+        return -1
+    print(f"文件名快照已更新: {count} 个文件, 耗时 {(time.time() - start_time) * 1000:.0f}ms")
+    return count
+
+
+def ensure_filename_snapshot(index_dir_path: str) -> bool:
+    """索引还没有文件名快照（如快照功能加入前建立的索引）或快照文件丢失时导出一次
+
+    Returns:
+        bool: 是否导出了快照
+    """
+    import index_snapshot
+
+    path = index_snapshot.snapshot_path(index_dir_path)
+    if path is not None and os.path.exists(path):
+        return False
+    return export_filename_snapshot(index_dir_path) >= 0
+# --- END ADDED ---
+
 # --- 结束高级索引优化功能 ---
 
 # --- 兼容性包装函数 ---
@@ -4331,7 +5708,7 @@ def remove_deleted_files_from_index(writer, deleted_files: list[str]):
 def create_or_update_index_legacy(source_directories, index_dir_path, enable_ocr, 
                                  extraction_timeout=300, txt_content_limit_kb=1024, 
                                  file_types_to_index=None, filename_only_types=None, 
-                                 cancel_callback=None, preserve_removed_dirs=True):
+                                 cancel_callback=None, preserve_removed_dirs=True, sharded=None):
     """
     兼容性包装函数，保持与现有GUI的兼容性
     将旧版本的参数映射到新的优化版本
@@ -4344,16 +5721,29 @@ def create_or_update_index_legacy(source_directories, index_dir_path, enable_ocr
         txt_content_limit_kb: TXT内容限制（KB）
         file_types_to_index: 要索引的文件类型列表
         cancel_callback: 取消检查回调函数
+        sharded: 是否按源目录分片索引；None 时沿用索引目录现有的布局
 
     Yields:
         dict: 进度信息（转换为旧格式）
     """
     print("使用兼容性包装函数调用优化版索引...")
 
+    # --- ADDED: 分片索引布局选择 ---
+    if sharded is None:
+        sharded = is_sharded_index(index_dir_path)
+    if sharded:
+        index_function = create_or_update_sharded_index
+    else:
+        if is_sharded_index(index_dir_path):
+            print("切换回单一索引布局，删除现有分片")
+            remove_shard_layout(index_dir_path)
+        index_function = create_or_update_index
+    # --- END ADDED ---
+
     # 将新的优化参数映射到旧的格式
     try:
         # 调用优化版本的索引函数
-        for progress in create_or_update_index(
+        for progress in index_function(
             directories=source_directories,
             index_dir_path=index_dir_path,
             enable_ocr=enable_ocr,
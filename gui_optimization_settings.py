@@ -12,7 +12,7 @@ from PySide6.QtWidgets import (
     QApplication, QDialog, QVBoxLayout, QHBoxLayout, QGroupBox, 
     QLabel, QSpinBox, QCheckBox, QComboBox, QPushButton, 
     QDialogButtonBox, QSlider, QProgressBar, QTextEdit,
-    QTabWidget, QWidget, QFormLayout, QFrame
+    QTabWidget, QWidget, QFormLayout, QFrame, QFileDialog, QMessageBox
 )
 from PySide6.QtCore import Qt, QSettings, Signal, QTimer
 from PySide6.QtGui import QFont
@@ -20,6 +20,8 @@ from PySide6.QtGui import QFont
 # 添加当前目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+import perf_trace
+
 class OptimizationSettingsDialog(QDialog):
     """索引优化设置对话框"""
     
@@ -50,6 +52,7 @@ class OptimizationSettingsDialog(QDialog):
         
         # 创建选项卡
         tab_widget = QTabWidget()
+        self.tab_widget = tab_widget
         
         # 基础优化选项卡
         basic_tab = self._create_basic_tab()
@@ -60,8 +63,8 @@ class OptimizationSettingsDialog(QDialog):
         tab_widget.addTab(advanced_tab, "高级优化")
         
         # 性能监控选项卡
-        monitoring_tab = self._create_monitoring_tab()
-        tab_widget.addTab(monitoring_tab, "性能监控")
+        self.monitoring_tab = self._create_monitoring_tab()
+        tab_widget.addTab(self.monitoring_tab, "性能监控")
         
         layout.addWidget(tab_widget)
         
@@ -215,7 +218,7 @@ class OptimizationSettingsDialog(QDialog):
         # 显示性能指标
         self.show_performance_metrics_checkbox = QCheckBox("显示性能指标")
         self.show_performance_metrics_checkbox.setChecked(True)
-        self.show_performance_metrics_checkbox.setToolTip("显示处理速度、文件数量等性能指标")
+        self.show_performance_metrics_checkbox.setToolTip("记录扫描、提取、分词、写入、查询、渲染等阶段的耗时，并在下方显示统计")
         monitoring_layout.addRow("", self.show_performance_metrics_checkbox)
         
         # 进度更新频率
@@ -239,6 +242,33 @@ class OptimizationSettingsDialog(QDialog):
         
         layout.addWidget(prediction_group)
         
+        # --- ADDED: 性能指标（各跟踪段的耗时统计，可导出为跟踪文件） ---
+        metrics_group = QGroupBox("性能指标")
+        metrics_layout = QVBoxLayout(metrics_group)
+        
+        self.performance_metrics_text = QTextEdit()
+        self.performance_metrics_text.setReadOnly(True)
+        self.performance_metrics_text.setLineWrapMode(QTextEdit.NoWrap)
+        self.performance_metrics_text.setStyleSheet("font-family: monospace;")
+        metrics_layout.addWidget(self.performance_metrics_text)
+        
+        metrics_buttons = QHBoxLayout()
+        self.refresh_metrics_button = QPushButton("刷新")
+        self.refresh_metrics_button.clicked.connect(self._refresh_performance_metrics)
+        self.export_trace_button = QPushButton("导出跟踪文件...")
+        self.export_trace_button.setToolTip("导出为 Chrome 跟踪事件格式（chrome://tracing 或 ui.perfetto.dev 打开）")
+        self.export_trace_button.clicked.connect(self._export_performance_trace)
+        self.reset_metrics_button = QPushButton("清空")
+        self.reset_metrics_button.clicked.connect(self._reset_performance_metrics)
+        metrics_buttons.addWidget(self.refresh_metrics_button)
+        metrics_buttons.addWidget(self.export_trace_button)
+        metrics_buttons.addWidget(self.reset_metrics_button)
+        metrics_buttons.addStretch()
+        metrics_layout.addLayout(metrics_buttons)
+        
+        layout.addWidget(metrics_group)
+        # -------------------------------------------------------------
+        
         # 当前系统信息组
         system_info_group = QGroupBox("系统信息")
         system_info_layout = QVBoxLayout(system_info_group)
@@ -287,7 +317,45 @@ class OptimizationSettingsDialog(QDialog):
     def _on_settings_changed(self):
         """当设置改变时调用"""
         # 这里可以添加实时预览或验证逻辑
-        pass
+        self._update_performance_metrics_state()
+    
+    # --- ADDED: 性能指标 ---
+    def show_monitoring_tab(self):
+        """切换到"性能监控"选项卡"""
+        self.tab_widget.setCurrentIndex(self.tab_widget.indexOf(self.monitoring_tab))
+    
+    def _update_performance_metrics_state(self):
+        """"显示性能指标"未勾选时隐藏统计"""
+        enabled = self.show_performance_metrics_checkbox.isChecked()
+        self.performance_metrics_text.setEnabled(enabled)
+        self.refresh_metrics_button.setEnabled(enabled)
+        self.export_trace_button.setEnabled(enabled)
+        self.reset_metrics_button.setEnabled(enabled)
+        if enabled:
+            self._refresh_performance_metrics()
+        else:
+            self.performance_metrics_text.setPlainText("性能指标未开启")
+    
+    def _refresh_performance_metrics(self):
+        self.performance_metrics_text.setPlainText(perf_trace.format_summary())
+    
+    def _reset_performance_metrics(self):
+        perf_trace.reset()
+        self._refresh_performance_metrics()
+    
+    def _export_performance_trace(self):
+        """导出跟踪事件和直方图到 JSON 文件"""
+        path, _ = QFileDialog.getSaveFileName(
+            self, "导出跟踪文件", perf_trace.default_trace_path(), "跟踪文件 (*.json)")
+        if not path:
+            return
+        try:
+            count = perf_trace.export_trace(path)
+        except OSError as e:
+            QMessageBox.warning(self, "导出失败", f"无法写入跟踪文件:\n{e}")
+            return
+        QMessageBox.information(self, "导出完成", f"已导出 {count} 个跟踪事件到:\n{path}")
+    # --- END ADDED ---
     
     def _load_settings(self):
         """加载当前设置"""
@@ -343,6 +411,7 @@ class OptimizationSettingsDialog(QDialog):
         self.enable_time_estimation_checkbox.setChecked(
             self.settings.value("optimization/enable_time_estimation", True, type=bool)
         )
+        self._update_performance_metrics_state()
     
     def _apply_settings(self):
         """应用设置"""
@@ -353,6 +422,9 @@ class OptimizationSettingsDialog(QDialog):
         for key, value in settings_dict.items():
             self.settings.setValue(f"optimization/{key}", value)
         
+        # ADDED: 立即开启/关闭性能跟踪
+        perf_trace.set_enabled(settings_dict["show_performance_metrics"])
+        
         # 发出设置改变信号
         self.settingsChanged.emit(settings_dict)
         
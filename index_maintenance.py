@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文智搜索引维护模块
+
+增量索引每次运行都会追加新的索引段，被更新或删除的文档只做标记，
+长期使用后段数和已删除文档比例都会增长，查询随之变慢。
+本模块统计索引健康状况，在程序空闲（主窗口隐藏在托盘、没有搜索或索引任务）时
+于后台合并索引段，并报告合并前后的查询延迟。
+"""
+
+import time
+import statistics
+from pathlib import Path
+
+from PySide6.QtCore import QObject, QThread, QTimer, Signal, Slot
+from whoosh.index import open_dir, exists_in
+
+import document_search
+from file_processing_utils import check_cancellation, InterruptedError
+
+# 触发维护的阈值
+DEFAULT_MAX_SEGMENTS = document_search.MAX_INDEX_SEGMENTS
+DEFAULT_MAX_DELETED_RATIO = 0.2          # 已删除文档超过20%时合并以清除
+DEFAULT_IDLE_MINUTES = 5                 # 连续空闲多久后才开始维护
+DEFAULT_CHECK_INTERVAL_MS = 60 * 1000    # 空闲状态检查间隔
+LATENCY_SAMPLE_TERMS = 5                 # 测量延迟使用的高频词数量
+LATENCY_REPEATS = 3                      # 每个查询重复次数（取中位数）
+
+
+def collect_index_stats(index_dir_path: str) -> dict:
+    """
+    统计索引健康状况
+
+    Returns:
+        dict: segment_count, doc_count, deleted_count, deleted_ratio, size_bytes；
+              索引不存在时返回空字典
+    """
+    if not Path(index_dir_path).exists() or not exists_in(index_dir_path):
+        return {}
+    ix = open_dir(index_dir_path)
+    try:
+        segments = ix._segments()
+        doc_count_all = sum(seg.doc_count_all() for seg in segments)
+        deleted_count = sum(seg.deleted_count() for seg in segments)
+    finally:
+        ix.close()
+
+    size_bytes = 0
+    for entry in Path(index_dir_path).iterdir():
+        if entry.is_file() and (entry.name.startswith('MAIN_') or entry.name.startswith('_MAIN_')):
+            size_bytes += entry.stat().st_size
+
+    return {
+        'segment_count': len(segments),
+        'doc_count': doc_count_all - deleted_count,
+        'deleted_count': deleted_count,
+        'deleted_ratio': deleted_count / doc_count_all if doc_count_all else 0.0,
+        'size_bytes': size_bytes,
+    }
+
+
+def needs_optimization(stats: dict, max_segments: int = DEFAULT_MAX_SEGMENTS,
+                       max_deleted_ratio: float = DEFAULT_MAX_DELETED_RATIO) -> tuple[bool, str]:
+    """根据统计判断是否需要维护，返回 (是否需要, 原因)"""
+    if not stats:
+        return False, "索引不存在"
+    if stats['segment_count'] > max_segments:
+        return True, f"索引段过多 ({stats['segment_count']} > {max_segments})"
+    if stats['deleted_ratio'] > max_deleted_ratio:
+        return True, f"已删除文档比例过高 ({stats['deleted_ratio']:.0%})"
+    return False, "索引状态良好"
+
+
+def _sample_latency_queries(index_dir_path: str, count: int = LATENCY_SAMPLE_TERMS) -> list:
+    """取全文字段中的高频词作为延迟测量查询，保证合并前后使用同一组查询"""
+    from whoosh.query import Term
+    ix = open_dir(index_dir_path)
+    try:
+        with ix.reader() as reader:
+            if 'content' not in reader.indexed_field_names():
+                return []
+            terms = reader.most_frequent_terms('content', number=count)
+            return [Term('content', reader.schema['content'].from_bytes(btext)) for _, btext in terms]
+    finally:
+        ix.close()
+
+
+def measure_query_latency(index_dir_path: str, queries: list, repeats: int = LATENCY_REPEATS) -> dict:
+    """
+    测量查询延迟（每次都新建搜索器，包含打开各段的开销）
+
+    Returns:
+        dict: median_ms, max_ms, samples
+    """
+    from whoosh import scoring
+    timings = []
+    for query in queries:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            ix = open_dir(index_dir_path)
+            try:
+                with ix.searcher(weighting=scoring.BM25F()) as searcher:
+                    searcher.search(query, limit=document_search.DEFAULT_PAGE_SIZE)
+            finally:
+                ix.close()
+            timings.append((time.perf_counter() - start) * 1000)
+    if not timings:
+        return {'median_ms': 0.0, 'max_ms': 0.0, 'samples': 0}
+    return {
+        'median_ms': statistics.median(timings),
+        'max_ms': max(timings),
+        'samples': len(timings),
+    }
+
+
+def optimize_index(index_dir_path: str, max_segments: int = DEFAULT_MAX_SEGMENTS,
+                   max_deleted_ratio: float = DEFAULT_MAX_DELETED_RATIO,
+                   progress_callback=None, cancel_callback=None) -> dict:
+    """
+    合并索引段并清除已删除文档，返回维护报告
+
+    合并提交本身无法中途打断，取消请求在各阶段之间检查；在提交前取消时
+    写入器会被放弃，索引保持原状。
+
+    Args:
+        progress_callback: 进度回调函数，接收(current, total, detail)参数
+        cancel_callback: 取消检查回调函数
+
+    Returns:
+        dict: optimized, reason, before, after, latency_before, latency_after
+    """
+    from whoosh.index import LockError
+
+    total_steps = 4
+
+    def report_progress(step, detail):
+        print(f"索引维护 [{step}/{total_steps}]: {detail}")
+        if progress_callback:
+            progress_callback(step, total_steps, detail)
+
+    report = {'optimized': False, 'index_dir': index_dir_path}
+    before = collect_index_stats(index_dir_path)
+    should_optimize, reason = needs_optimization(before, max_segments, max_deleted_ratio)
+    report.update(before=before, reason=reason)
+    if not should_optimize:
+        return report
+
+    report_progress(1, "测量维护前查询延迟")
+    queries = _sample_latency_queries(index_dir_path)
+    report['latency_before'] = measure_query_latency(index_dir_path, queries)
+    check_cancellation(cancel_callback, "索引维护")
+
+    report_progress(2, f"合并索引段: {reason}")
+    ix = open_dir(index_dir_path)
+    try:
+        try:
+            writer = ix.writer()
+        except LockError:
+            report['reason'] = "索引正在写入，稍后重试"
+            return report
+        if cancel_callback and cancel_callback():
+            writer.cancel()
+            raise InterruptedError("索引维护被取消")
+        writer.commit(mergetype=document_search.make_bounded_merge_policy(max_segments, max_deleted_ratio))
+    finally:
+        ix.close()
+    report['optimized'] = True
+
+    report_progress(3, "测量维护后查询延迟")
+    report['after'] = collect_index_stats(index_dir_path)
+    report['latency_after'] = measure_query_latency(index_dir_path, queries)
+
+    report_progress(4, format_report(report))
+    return report
+
+
+def format_report(report: dict) -> str:
+    """生成用户可读的维护报告"""
+    if not report.get('optimized'):
+        return f"索引无需维护: {report.get('reason', '')}"
+    before, after = report['before'], report['after']
+    text = (f"索引维护完成: 段 {before['segment_count']} -> {after['segment_count']}, "
+            f"已删除文档 {before['deleted_count']} -> {after['deleted_count']}, "
+            f"大小 {before['size_bytes'] / 1024 / 1024:.1f}MB -> {after['size_bytes'] / 1024 / 1024:.1f}MB")
+    latency_before = report.get('latency_before', {})
+    latency_after = report.get('latency_after', {})
+    if latency_before.get('samples') and latency_after.get('samples'):
+        text += (f", 查询延迟中位数 {latency_before['median_ms']:.1f}ms -> "
+                 f"{latency_after['median_ms']:.1f}ms")
+    return text
+
+
+class _MaintenanceThread(QThread):
+    """在后台线程中执行 optimize_index"""
+
+    progressUpdated = Signal(int, int, str)  # current, total, detail
+    maintenanceFinished = Signal(dict)       # 维护报告
+
+    def __init__(self, index_dir_path, max_segments, max_deleted_ratio, parent=None):
+        super().__init__(parent)
+        self.index_dir_path = index_dir_path
+        self.max_segments = max_segments
+        self.max_deleted_ratio = max_deleted_ratio
+        self.cancel_requested = False
+
+    def run(self):
+        try:
+            report = optimize_index(
+                self.index_dir_path, self.max_segments, self.max_deleted_ratio,
+                progress_callback=lambda current, total, detail: self.progressUpdated.emit(current, total, detail),
+                cancel_callback=lambda: self.cancel_requested)
+        except InterruptedError:
+            report = {'optimized': False, 'cancelled': True, 'reason': "索引维护已取消"}
+        except Exception as e:
+            print(f"索引维护失败: {e}")
+            report = {'optimized': False, 'error': str(e), 'reason': f"索引维护失败: {e}"}
+        self.maintenanceFinished.emit(report)
+
+
+class IndexMaintenanceScheduler(QObject):
+    """空闲时自动维护索引的调度器
+
+    定时检查空闲状态；连续空闲 idle_minutes 分钟且索引需要维护时，在后台线程中合并索引段。
+    空闲状态结束（例如用户打开窗口或开始搜索）时请求取消尚未提交的维护。
+    """
+
+    # 定义信号
+    progressUpdated = Signal(int, int, str)  # 维护进度
+    maintenanceFinished = Signal(dict)       # 维护报告（含维护前后统计与查询延迟）
+
+    def __init__(self, index_dir_getter, is_idle_callback, parent=None,
+                 idle_minutes=DEFAULT_IDLE_MINUTES, check_interval_ms=DEFAULT_CHECK_INTERVAL_MS,
+                 max_segments=DEFAULT_MAX_SEGMENTS, max_deleted_ratio=DEFAULT_MAX_DELETED_RATIO):
+        """初始化调度器
+
+        Args:
+            index_dir_getter: 返回当前索引目录的函数（设置可能在运行中改变）
+            is_idle_callback: 返回程序当前是否空闲的函数
+        """
+        super().__init__(parent)
+        self.index_dir_getter = index_dir_getter
+        self.is_idle_callback = is_idle_callback
+        self.idle_seconds = idle_minutes * 60
+        self.max_segments = max_segments
+        self.max_deleted_ratio = max_deleted_ratio
+        self.last_report = None
+
+        self._idle_since = None
+        self._checked_index_dirs = set()  # 本次空闲期内已检查且无需维护的索引
+        self._thread = None
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(check_interval_ms)
+        self._timer.timeout.connect(self._check_idle_state)
+
+    def start(self):
+        self._timer.start()
+
+    def stop(self):
+        """停止调度；正在进行的维护会在当前阶段结束后退出"""
+        self._timer.stop()
+        self.cancel()
+        if self.is_running():
+            self._thread.wait(3000)
+
+    def is_running(self):
+        return self._thread is not None and self._thread.isRunning()
+
+    def cancel(self):
+        """请求取消正在进行的维护（已开始的段合并提交会执行完）"""
+        if self.is_running():
+            self._thread.cancel_requested = True
+
+    @Slot()
+    def _check_idle_state(self):
+        try:
+            idle = bool(self.is_idle_callback())
+        except Exception as e:
+            print(f"检查空闲状态出错: {e}")
+            idle = False
+
+        if not idle:
+            self._idle_since = None
+            self._checked_index_dirs.clear()
+            self.cancel()
+            return
+
+        now = time.monotonic()
+        if self._idle_since is None:
+            self._idle_since = now
+        if now - self._idle_since < self.idle_seconds or self.is_running():
+            return
+
+        index_dir_path = self.index_dir_getter()
+        if not index_dir_path:
+            return
+        # 分片索引逐个维护各分片，每次检查最多启动一个
+        for shard_dir in document_search.list_index_dirs(index_dir_path):
+            if shard_dir not in self._checked_index_dirs and self.run_now(shard_dir):
+                return
+
+    def run_now(self, index_dir_path):
+        """立即在后台检查并维护指定索引"""
+        if self.is_running():
+            return False
+        try:
+            should_optimize, reason = needs_optimization(
+                collect_index_stats(index_dir_path), self.max_segments, self.max_deleted_ratio)
+        except Exception as e:
+            print(f"读取索引统计失败: {e}")
+            return False
+        if not should_optimize:
+            self._checked_index_dirs.add(index_dir_path)
+            return False
+
+        print(f"程序空闲，开始后台索引维护: {reason}")
+        self._thread = _MaintenanceThread(index_dir_path, self.max_segments, self.max_deleted_ratio, self)
+        self._thread.progressUpdated.connect(self.progressUpdated)
+        self._thread.maintenanceFinished.connect(self._on_maintenance_finished)
+        self._thread.start()
+        return True
+
+    @Slot(dict)
+    def _on_maintenance_finished(self, report):
+        self.last_report = report
+        if report.get('optimized') and report.get('index_dir'):
+            self._checked_index_dirs.add(report['index_dir'])
+        print(format_report(report) if report.get('optimized') else report.get('reason', ''))
+        self.maintenanceFinished.emit(report)
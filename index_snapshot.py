@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件名只读快照模块
+
+每次索引提交后，把索引中所有文档的文件名、路径、修改时间和大小导出为一个紧凑的
+二进制快照（按规范化文件名排序的定长数组 + 字符串区）。快捷搜索用 mmap 只读打开，
+直接在映射内存上做二分查找和子串扫描，不需要打开 Whoosh 索引，也不复制数据；
+多个进程打开同一快照时共享操作系统的页缓存。
+
+本模块只依赖标准库，托盘进程可以在毫秒级完成冷启动。
+
+Windows 上无法替换仍被映射的文件，因此每次导出写入新的快照文件，再原子替换
+指针文件 filename_snapshot.current（只保存当前快照文件名）；旧快照在不再被映射后清理。
+
+文件布局（小端，各区按8字节对齐）:
+    头部:   magic, version, count, 各区起始偏移
+    name_offsets: uint64[count + 1]  规范化文件名在 names 区中的偏移
+    path_offsets: uint64[count + 1]  原始路径在 paths 区中的偏移
+    mtimes:       int64[count]
+    sizes:        int64[count]
+    names:  规范化文件名（UTF-8），每个名称后跟 NUL 分隔符，查询子串不会跨越两个名称
+    paths:  原始路径（UTF-8）
+"""
+
+import os
+import mmap
+import struct
+import bisect
+import threading
+import time
+
+SNAPSHOT_POINTER_FILENAME = "filename_snapshot.current"
+SNAPSHOT_FILE_PREFIX = "filename_snapshot-"
+SNAPSHOT_MAGIC = b"WZSFNS01"
+SNAPSHOT_VERSION = 1
+
+# magic, version, count, name_offsets, path_offsets, mtimes, sizes, names, paths
+_HEADER = struct.Struct("<8sII6Q")
+_SEPARATOR = b"\0"
+
+
+def snapshot_path(index_dir_path: str) -> str | None:
+    """返回当前快照文件路径，尚未导出过快照时返回 None"""
+    try:
+        with open(os.path.join(index_dir_path, SNAPSHOT_POINTER_FILENAME), 'r', encoding='utf-8') as f:
+            name = f.read().strip()
+    except OSError:
+        return None
+    return os.path.join(index_dir_path, name) if name else None
+
+
+def _remove_stale_snapshots(index_dir_path: str, current_name: str):
+    """删除旧快照文件；仍被其它进程映射的文件（Windows）删除失败时留待下次清理"""
+    for name in os.listdir(index_dir_path):
+        if name.startswith(SNAPSHOT_FILE_PREFIX) and name != current_name:
+            try:
+                os.remove(os.path.join(index_dir_path, name))
+            except OSError:
+                pass
+
+
+def normalize_filename(name: str) -> str:
+    """快照与查询共用的文件名规范化（不区分大小写）"""
+    return name.casefold()
+
+
+def _align(position: int) -> int:
+    return (position + 7) & ~7
+
+
+def write_snapshot(index_dir_path: str, records) -> int:
+    """
+    写入文件名快照（写完新文件后才切换指针，读取方不会看到写了一半的快照）
+
+    Args:
+        index_dir_path: 索引目录
+        records: 可迭代的 (file_path, last_modified, file_size)
+
+    Returns:
+        int: 写入的记录数
+    """
+    entries = []
+    for file_path, last_modified, file_size in records:
+        name = normalize_filename(os.path.basename(file_path)).encode("utf-8")
+        entries.append((name, file_path.encode("utf-8"), int(last_modified or 0), int(file_size or 0)))
+    entries.sort(key=lambda entry: (entry[0], entry[1]))
+    count = len(entries)
+
+    name_offsets, path_offsets = [0], [0]
+    for name, path, _, _ in entries:
+        name_offsets.append(name_offsets[-1] + len(name) + len(_SEPARATOR))
+        path_offsets.append(path_offsets[-1] + len(path))
+
+    sections = [
+        struct.pack(f"<{count + 1}Q", *name_offsets),
+        struct.pack(f"<{count + 1}Q", *path_offsets),
+        struct.pack(f"<{count}q", *(entry[2] for entry in entries)),
+        struct.pack(f"<{count}q", *(entry[3] for entry in entries)),
+        b"".join(name + _SEPARATOR for name, _, _, _ in entries),
+        b"".join(entry[1] for entry in entries),
+    ]
+    positions = []
+    position = _align(_HEADER.size)
+    for section in sections:
+        positions.append(position)
+        position = _align(position + len(section))
+
+    snapshot_name = f"{SNAPSHOT_FILE_PREFIX}{time.time_ns()}.bin"
+    with open(os.path.join(index_dir_path, snapshot_name), "wb") as f:
+        f.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, count, *positions))
+        for section_position, section in zip(positions, sections):
+            f.seek(section_position)
+            f.write(section)
+        f.truncate(_align(f.tell()))
+
+    pointer_path = os.path.join(index_dir_path, SNAPSHOT_POINTER_FILENAME)
+    with open(f"{pointer_path}.tmp", 'w', encoding='utf-8') as f:
+        f.write(snapshot_name)
+    os.replace(f"{pointer_path}.tmp", pointer_path)
+    _remove_stale_snapshots(index_dir_path, snapshot_name)
+    return count
+
+
+class FilenameSnapshot:
+    """mmap 只读打开的文件名快照
+
+    查询直接在映射内存上进行：前缀匹配用二分查找，子串匹配用 mmap.find 扫描 names 区
+    再通过偏移数组二分定位记录。新的索引提交切换了快照指针后，refresh() 会重新映射。
+    """
+
+    def __init__(self, index_dir_path: str):
+        self.index_dir_path = index_dir_path
+        self.path = None
+        self._lock = threading.Lock()
+        self._file = None
+        self._mmap = None
+        self._views = []
+        self.count = 0
+        self._open(snapshot_path(index_dir_path))
+
+    def _open(self, path: str | None):
+        if path is None:
+            raise FileNotFoundError(f"索引目录中没有文件名快照: {self.index_dir_path}")
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, count, *positions = _HEADER.unpack_from(self._mmap, 0)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                raise ValueError(f"不支持的快照格式: {self.path}")
+        except Exception:
+            self._release()
+            raise
+        self.count = count
+        name_offsets_pos, path_offsets_pos, mtimes_pos, sizes_pos, names_pos, paths_pos = positions
+        view = memoryview(self._mmap)
+        # 对映射内存按类型转换，不复制数据
+        self._name_offsets = view[name_offsets_pos:name_offsets_pos + (count + 1) * 8].cast("Q")
+        self._path_offsets = view[path_offsets_pos:path_offsets_pos + (count + 1) * 8].cast("Q")
+        self._mtimes = view[mtimes_pos:mtimes_pos + count * 8].cast("q")
+        self._sizes = view[sizes_pos:sizes_pos + count * 8].cast("q")
+        self._views = [view, self._name_offsets, self._path_offsets, self._mtimes, self._sizes]
+        self._names_pos = names_pos
+        self._names_end = names_pos + self._name_offsets[count]
+        self._paths_pos = paths_pos
+
+    def _release(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.count = 0
+
+    def close(self):
+        with self._lock:
+            self._release()
+
+    def refresh(self) -> bool:
+        """快照指针已切换到新文件时重新映射，返回是否重新打开"""
+        with self._lock:
+            current_path = snapshot_path(self.index_dir_path)
+            if current_path is None or current_path == self.path:
+                return False
+            self._release()
+            self._open(current_path)
+            return True
+
+    def __len__(self):
+        return self.count
+
+    def _name_at(self, index: int) -> bytes:
+        start = self._names_pos + self._name_offsets[index]
+        return self._mmap[start:self._names_pos + self._name_offsets[index + 1] - len(_SEPARATOR)]
+
+    def record(self, index: int) -> dict:
+        """返回第 index 条记录（字段名与搜索结果一致）"""
+        path_start = self._paths_pos + self._path_offsets[index]
+        file_path = self._mmap[path_start:self._paths_pos + self._path_offsets[index + 1]].decode("utf-8")
+        return {
+            'file_path': file_path,
+            'last_modified': self._mtimes[index],
+            'file_size': self._sizes[index],
+            'file_type': os.path.splitext(file_path)[1].lower(),
+        }
+
+    def _prefix_range(self, prefix: bytes) -> tuple[int, int]:
+        """二分查找规范化文件名以 prefix 开头的记录区间 [lo, hi)"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name_at(mid) < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        start, hi = lo, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name_at(mid)[:len(prefix)] == prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        return start, lo
+
+    def _substring_matches(self, needle: bytes):
+        """扫描 names 区，按名称顺序产生包含 needle 的记录号"""
+        names_pos = self._names_pos
+        position = names_pos
+        while True:
+            found = self._mmap.find(needle, position, self._names_end)
+            if found < 0:
+                return
+            # 偏移数组有序，二分定位命中所在的名称，然后跳到下一个名称继续扫描
+            index = bisect.bisect_right(self._name_offsets, found - names_pos) - 1
+            yield index
+            position = names_pos + self._name_offsets[index + 1]
+
+    def search(self, query: str, max_results: int = 100, accept=None) -> list[dict]:
+        """
+        文件名查询：查询按空白拆分，所有词都包含在文件名中才算匹配
+
+        完全相同的文件名优先，其次是前缀匹配，再次是子串匹配；同一等级按修改时间倒序。
+
+        Args:
+            query: 查询词
+            max_results: 最大结果数
+            accept: 可选的记录过滤函数，接收记录字典返回是否保留（用于源目录、许可证过滤）
+
+        Returns:
+            list[dict]: 结果列表，含 file_path, last_modified, file_size, file_type, match_score
+        """
+        terms = [normalize_filename(term).encode("utf-8") for term in query.split()]
+        if not terms or not self.count:
+            return []
+        # 最长的词候选最少，用它扫描，其余词在候选上校验
+        terms.sort(key=len, reverse=True)
+        lead, others = terms[0], terms[1:]
+
+        with self._lock:
+            if self._mmap is None:
+                return []
+            prefix_lo, prefix_hi = self._prefix_range(lead)
+            scored = []
+            for index in self._substring_matches(lead):
+                name = self._name_at(index)
+                if any(term not in name for term in others):
+                    continue
+                if name == lead:
+                    match_score = 3
+                elif prefix_lo <= index < prefix_hi:
+                    match_score = 2
+                else:
+                    match_score = 1
+                scored.append((match_score, self._mtimes[index], index))
+
+            scored.sort(reverse=True)
+            results = []
+            for match_score, _, index in scored:
+                record = self.record(index)
+                if accept is not None and not accept(record):
+                    continue
+                record['match_score'] = match_score
+                results.append(record)
+                if len(results) >= max_results:
+                    break
+        return results
+
+
+_open_snapshots = {}
+_open_snapshots_lock = threading.Lock()
+
+
+def get_snapshot(index_dir_path: str) -> FilenameSnapshot | None:
+    """返回（并缓存）索引目录的快照，快照不存在或损坏时返回 None"""
+    with _open_snapshots_lock:
+        snapshot = _open_snapshots.get(index_dir_path)
+        try:
+            if snapshot is None:
+                if snapshot_path(index_dir_path) is None:
+                    return None
+                snapshot = FilenameSnapshot(index_dir_path)
+                _open_snapshots[index_dir_path] = snapshot
+            else:
+                snapshot.refresh()
+        except (OSError, ValueError, struct.error) as e:
+            print(f"打开文件名快照失败: {e}")
+            _open_snapshots.pop(index_dir_path, None)
+            return None
+        return snapshot
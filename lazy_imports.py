@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+延迟导入与启动耗时统计模块
+
+文档解析依赖（pandas、PyPDF2、python-pptx、openpyxl、pytesseract 等）导入很慢，但只有建立索引
+时才会用到。lazy_import() 返回一个占位模块对象，第一次访问其属性时才真正导入；
+托盘启动时不再为这些模块付出导入时间。
+
+每次真正导入（以及用 timed_import() 包住的启动阶段导入）都会记录耗时，
+format_import_report() 输出按耗时排序的启动耗时报告。
+
+本模块只依赖标准库。
+"""
+
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+
+_lock = threading.RLock()
+_import_timings = {}  # 名称 -> 耗时（秒）
+_lazy_modules = {}    # 名称 -> LazyModule
+_clock_start = time.perf_counter()  # 入口脚本最先导入本模块，从这里开始计时
+
+
+def record_import_time(name: str, seconds: float):
+    with _lock:
+        _import_timings[name] = _import_timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def timed_import(label: str):
+    """统计一段（通常是 import 语句）的耗时，计入启动耗时报告"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_import_time(label, time.perf_counter() - start)
+
+
+class LazyModule:
+    """第一次访问属性时才导入的模块占位对象"""
+
+    def __init__(self, name: str):
+        object.__setattr__(self, '_lazy_name', name)
+        object.__setattr__(self, '_lazy_module', None)
+
+    def _load(self):
+        module = self._lazy_module
+        if module is None:
+            # 导入系统按模块加锁，这里不再持有全局锁，后台预加载不会阻塞其它模块的导入
+            start = time.perf_counter()
+            module = importlib.import_module(self._lazy_name)
+            if self._lazy_module is None:
+                object.__setattr__(self, '_lazy_module', module)
+                record_import_time(self._lazy_name, time.perf_counter() - start)
+        return module
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._lazy_module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "已导入" if self._lazy_module is not None else "未导入"
+        return f"<LazyModule {self._lazy_name} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """返回延迟导入的模块（同名模块共享一个占位对象）"""
+    with _lock:
+        module = _lazy_modules.get(name)
+        if module is None:
+            module = LazyModule(name)
+            _lazy_modules[name] = module
+        return module
+
+
+def preload(modules, on_done=None) -> threading.Thread:
+    """
+    在后台线程中依次导入模块（LazyModule 或模块名），用于提前加载稍后一定会用到的依赖
+
+    Args:
+        modules: LazyModule 或模块名的可迭代对象
+        on_done: 可选回调，全部导入完成后在后台线程中调用
+    """
+    def run():
+        for module in modules:
+            try:
+                if isinstance(module, LazyModule):
+                    module._load()
+                else:
+                    with timed_import(module):
+                        importlib.import_module(module)
+            except Exception as e:
+                print(f"后台预加载模块失败 {module!r}: {e}")
+        if on_done is not None:
+            on_done()
+
+    thread = threading.Thread(target=run, name="module-preload", daemon=True)
+    thread.start()
+    return thread
+
+
+def import_timings() -> list[tuple[str, float]]:
+    """已记录的导入耗时，按耗时降序"""
+    with _lock:
+        return sorted(_import_timings.items(), key=lambda item: item[1], reverse=True)
+
+
+def format_import_report(title: str = "启动耗时报告", limit: int = 20) -> str:
+    """格式化启动耗时报告：开始计时至今的总耗时，以及各模块的导入耗时"""
+    timings = import_timings()
+    lines = [f"=== {title} (开始计时后 {(time.perf_counter() - _clock_start) * 1000:.0f}ms) ==="]
+    for name, seconds in timings[:limit]:
+        lines.append(f"  {seconds * 1000:8.1f}ms  {name}")
+    if len(timings) > limit:
+        rest = sum(seconds for _, seconds in timings[limit:])
+        lines.append(f"  {rest * 1000:8.1f}ms  其它 {len(timings) - limit} 项")
+    with _lock:
+        deferred = [name for name, module in _lazy_modules.items() if not module.is_loaded]
+    if deferred:
+        lines.append(f"  尚未导入（延迟）: {', '.join(deferred)}")
+    return "\n".join(lines)
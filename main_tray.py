@@ -5,18 +5,28 @@ import logging
 import multiprocessing
 from pathlib import Path
 
-from PySide6.QtWidgets import QApplication, QSystemTrayIcon
-from PySide6.QtCore import Qt, QSettings
+# --- ADDED: 统计各启动阶段的导入耗时（重量级文档解析依赖已改为延迟导入） ---
+from lazy_imports import timed_import, format_import_report
+import perf_trace
+
+with timed_import("PySide6"):
+    from PySide6.QtWidgets import QApplication, QSystemTrayIcon
+    from PySide6.QtCore import Qt, QSettings, QTimer
 
 # 导入托盘功能模块
-from tray_app import TrayIcon, parse_arguments
+with timed_import("tray_app"):
+    from tray_app import TrayIcon, parse_arguments
 
-# 导入支持托盘的主窗口类和相关常量
-from main_window_tray import TrayMainWindow
-from search_gui_pyside import ORGANIZATION_NAME, APPLICATION_NAME
+# --- MODIFIED: 托盘优先启动，主窗口模块（search_gui_pyside）在首次打开主窗口时才导入 ---
+with timed_import("tray_host"):
+    from tray_host import TrayHost
+    from app_identity import ORGANIZATION_NAME, APPLICATION_NAME
+# -------------------------------------------------------------------------------
 
 # 导入热键管理器
-from hotkey_manager import HotkeyManager
+with timed_import("hotkey_manager"):
+    from hotkey_manager import HotkeyManager
+# -------------------------------------------------------------------------
 
 def main():
     """程序入口函数"""
@@ -106,13 +116,13 @@ def main():
     QApplication.setApplicationName(APPLICATION_NAME)
     print("应用元数据设置完成")
     
-    print("创建主窗口...")
-    # --- 创建支持托盘的主窗口 ---
+    # --- MODIFIED: 托盘优先启动：先创建托盘宿主、热键和托盘图标，主窗口在首次打开时才创建 ---
+    print("创建托盘宿主...")
     try:
-        window = TrayMainWindow()
-        print("主窗口创建成功")
+        host = TrayHost()
+        print("托盘宿主创建成功")
     except Exception as e:
-        print(f"创建主窗口时发生错误: {e}")
+        print(f"创建托盘宿主时发生错误: {e}")
         import traceback
         traceback.print_exc()
         return 1
@@ -120,8 +130,8 @@ def main():
     print("创建热键管理器...")
     # --- 创建热键管理器并初始化 ---
     try:
-        hotkey_manager = HotkeyManager(window)
-        window.hotkey_manager = hotkey_manager  # 给窗口设置热键管理器引用
+        hotkey_manager = HotkeyManager(host)
+        host.set_hotkey_manager(hotkey_manager)  # 主窗口创建时会取得热键管理器引用
         print("热键管理器创建成功")
         
         # 从设置中加载热键配置
@@ -140,7 +150,13 @@ def main():
         print("系统托盘不可用！程序将以普通窗口模式运行。")
         # 如果系统托盘不可用，强制显示主窗口
         should_minimize = False
-        window.show()
+        try:
+            host.show_main_window()
+        except Exception as e:
+            print(f"创建主窗口时发生错误: {e}")
+            import traceback
+            traceback.print_exc()
+            return 1
         print("主窗口已显示（托盘不可用模式）")
         # 运行应用但不创建托盘图标
         try:
@@ -155,7 +171,7 @@ def main():
     print("系统托盘可用，创建托盘图标...")
     # --- 创建系统托盘图标 ---
     try:
-        tray_icon = TrayIcon(window)
+        tray_icon = TrayIcon(host)
         print("托盘图标创建成功")
         
         # 验证托盘图标是否创建成功
@@ -174,9 +190,12 @@ def main():
         traceback.print_exc()
         return 1
     
-    print("设置窗口和热键管理器的托盘图标引用...")
-    # --- 设置主窗口的托盘图标引用 ---
-    window.set_tray_icon(tray_icon)
+    # 主窗口可能一直不创建，关闭快捷搜索窗口等最后一个窗口时不退出，由托盘菜单退出
+    app.setQuitOnLastWindowClosed(False)
+    
+    print("设置宿主和热键管理器的托盘图标引用...")
+    # --- 设置宿主（及之后创建的主窗口）的托盘图标引用 ---
+    host.set_tray_icon(tray_icon)
     
     # --- 设置热键管理器的托盘图标引用 ---
     if hotkey_manager:
@@ -188,12 +207,11 @@ def main():
         """处理热键触发事件"""
         print(f"热键触发: {hotkey_name}")
         if hotkey_name == "show_search":
-            # 显示主搜索窗口
-            window.showNormal()
-            window.activateWindow()
+            # 显示主搜索窗口（首次触发时创建）
+            host.show_main_window()
         elif hotkey_name == "quick_search":
-            # 显示轻量级搜索窗口
-            window.show_quick_search_dialog()
+            # 显示轻量级搜索窗口，不需要主窗口
+            host.show_quick_search_dialog()
     
     if hotkey_manager:
         hotkey_manager.hotkey_activated_signal.connect(handle_hotkey_triggered)
@@ -205,19 +223,26 @@ def main():
     
     print("连接托盘信号...")
     # --- 连接托盘信号 ---
-    tray_icon.show_main_window_signal.connect(lambda: (window.showNormal(), window.activateWindow()))
-    tray_icon.hide_main_window_signal.connect(window.hide)
-    tray_icon.quit_app_signal.connect(lambda: (hotkey_manager.stop_listener() if hotkey_manager else None, window.force_close(), app.quit()))
+    tray_icon.show_main_window_signal.connect(host.show_main_window)
+    tray_icon.hide_main_window_signal.connect(host.hide_main_window)
+    tray_icon.light_search_signal.connect(lambda text: host.show_quick_search_dialog(text or None))
+    tray_icon.quick_search_signal.connect(host._handle_show_main_window_from_quick_search)
+    tray_icon.quit_app_signal.connect(lambda: (hotkey_manager.stop_listener() if hotkey_manager else None, host.shutdown(), app.quit()))
     
     print("决定窗口显示状态...")
     # --- 根据启动参数决定是否显示主窗口 ---
     if should_minimize:
-        print("以最小化模式启动，仅显示托盘图标")
-        window.hide()
+        print("以最小化模式启动，仅显示托盘图标（主窗口在首次打开时创建）")
     else:
         print("显示主窗口...")
-        window.show()
-        print("主窗口已显示")
+        # 托盘图标已可用，主窗口在事件循环开始后创建
+        QTimer.singleShot(0, host.show_main_window)
+    # -------------------------------------------------------------------------------
+    
+    # --- ADDED: 输出启动耗时报告；事件循环开始后再输出一次，包含后台预加载的模块 ---
+    print(format_import_report("启动耗时报告"))
+    QTimer.singleShot(5000, lambda: print(format_import_report("启动后5秒的导入耗时")))
+    # ---------------------------------------------------------------------------
     
     print("开始运行应用程序...")
     # --- 运行应用 ---
@@ -238,15 +263,20 @@ def main():
                 hotkey_manager.stop_listener()
                 print("热键监听已停止")
             
-            # 显式删除窗口实例以触发closeEvent
-            window.force_quit = True  # 确保窗口真正关闭而不是最小化到托盘
-            del window
+            # 关闭主窗口（如已创建）并停止空闲索引维护
+            host.shutdown()
+            del host
             print("窗口实例已清理")
             
             # 注意：instance_manager由文智搜.py管理，这里不需要清理
         except Exception as e:
             print(f"清理资源时发生错误: {e}")
     
+    # --- ADDED: 开启"显示性能指标"时输出本次运行各跟踪段的统计 ---
+    if perf_trace.is_enabled():
+        print(perf_trace.format_summary("本次运行性能指标"))
+    # ------------------------------------------------------------
+    
     print(f"=== 程序退出，退出码: {exit_code} ===")
     # 最后退出应用程序
     return exit_code
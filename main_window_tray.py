@@ -1,20 +1,27 @@
-from PySide6.QtCore import Qt, QEvent, QSettings, QThread
+from PySide6.QtCore import Qt, QEvent, QSettings, QThread, Slot
 from PySide6.QtWidgets import QMainWindow, QSystemTrayIcon, QMessageBox, QMenu, QDialog
 from PySide6.QtGui import QCloseEvent, QIcon, QAction
 import os
+from pathlib import Path
 
 from search_gui_pyside import MainWindow, ORGANIZATION_NAME, APPLICATION_NAME
 from quick_search_controller import QuickSearchController
+from index_maintenance import IndexMaintenanceScheduler, format_report
 
 class TrayMainWindow(MainWindow):
     """继承原MainWindow并添加托盘支持的主窗口类"""
     
-    def __init__(self):
-        """初始化主窗口"""
+    def __init__(self, host=None):
+        """初始化主窗口
+        
+        Args:
+            host: 托盘宿主（tray_host.TrayHost），托盘优先启动时传入，快捷搜索控制器和空闲索引维护由宿主持有
+        """
         super().__init__()
         
         # 托盘图标实例，会在main_tray.py中设置
         self.tray_icon = None
+        self.host = host
         
         # 是否首次最小化到托盘标志
         self.first_minimize = True
@@ -28,11 +35,47 @@ class TrayMainWindow(MainWindow):
         # 设置窗口标题
         self.setWindowTitle("文智搜 (支持托盘)")
         
-        # 创建轻量级搜索控制器
-        self.quick_search_controller = QuickSearchController(self)
-        
-        # 连接快捷搜索控制器的信号
-        self.quick_search_controller.show_main_window_signal.connect(self._handle_show_main_window_from_quick_search)
+        # --- MODIFIED: 托盘优先启动时与宿主共享快捷搜索控制器，空闲索引维护由宿主调度 ---
+        if host is not None:
+            self.quick_search_controller = host.quick_search_controller
+            self.tray_icon = host.tray_icon
+            self.hotkey_manager = host.hotkey_manager
+        else:
+            # 创建轻量级搜索控制器
+            self.quick_search_controller = QuickSearchController(self)
+            
+            # 连接快捷搜索控制器的信号
+            self.quick_search_controller.show_main_window_signal.connect(self._handle_show_main_window_from_quick_search)
+
+            # 空闲时在后台维护索引（合并索引段、清除已删除文档）
+            self.index_maintenance_scheduler = IndexMaintenanceScheduler(
+                self._current_index_dir, self._is_idle_for_maintenance, self)
+            self.index_maintenance_scheduler.maintenanceFinished.connect(self._on_index_maintenance_finished)
+            if self.settings.value("indexing/idleMaintenance", True, type=bool):
+                self.index_maintenance_scheduler.start()
+        # -------------------------------------------------------------------------
+
+    # --- ADDED: 空闲索引维护 ---
+    def _current_index_dir(self):
+        """返回当前设置的索引目录"""
+        default_index_path = str(Path.home() / "Documents" / "DocumentSearchIndex")
+        return self.settings.value("indexing/indexDirectory", default_index_path)
+
+    def _is_idle_for_maintenance(self):
+        """托盘空闲状态：主窗口和快捷搜索窗口都已隐藏，且没有进行中的搜索或索引"""
+        if self.isVisible() or getattr(self, 'is_busy', False) or getattr(self, '_search_in_progress', False):
+            return False
+        dialog = getattr(self.quick_search_controller, 'dialog', None)
+        if dialog is not None and dialog.isVisible():
+            return False
+        return True
+
+    @Slot(dict)
+    def _on_index_maintenance_finished(self, report):
+        """维护只在窗口隐藏时进行，报告写入状态栏，用户下次打开窗口时可见"""
+        if report.get('optimized'):
+            self.statusBar().showMessage(format_report(report), 0)
+    # -----------------------------
     
     def _add_tray_settings_menu(self):
         """添加托盘设置菜单 - 简化版本"""
@@ -87,6 +130,10 @@ class TrayMainWindow(MainWindow):
             # 调用原closeEvent进行清理
             self._shutdown_threads()
             super().closeEvent(event)
+            # --- ADDED: 托盘优先启动时程序不随最后一个窗口关闭而退出，由宿主退出 ---
+            if self.host is not None and event.isAccepted() and not self.force_quit:
+                self.host.main_window_closed()
+            # --- END ADDED ---
             return
         
         # 否则，将窗口最小化到托盘
@@ -108,6 +155,10 @@ class TrayMainWindow(MainWindow):
         """确保所有线程安全停止"""
         try:
             print("正在关闭所有线程...")
+
+            # 停止空闲索引维护
+            if hasattr(self, 'index_maintenance_scheduler'):
+                self.index_maintenance_scheduler.stop()
             
             # 检查是否有搜索线程在运行
             if hasattr(self, 'search_thread') and self.search_thread and self.search_thread.isRunning():
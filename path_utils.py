@@ -12,6 +12,7 @@
 
 import os
 import sys
+import hashlib
 from pathlib import Path
 from typing import Union, Tuple
 
@@ -193,6 +194,67 @@ class PathStandardizer:
         
         return normalized_path if normalized_path else '根目录'
 
+    @staticmethod
+    def normalize_for_compare(path_str: Union[str, Path]) -> str:
+        """
+        标准化路径用于目录比较（不区分大小写、统一正斜杠、去除尾部斜杠）
+        
+        与搜索时的目录过滤使用相同的规则，根目录返回 "/" 或 "d:" 形式
+        
+        Args:
+            path_str: 文件或目录路径
+            
+        Returns:
+            str: 用于比较的路径字符串
+        """
+        if not path_str:
+            return ""
+        normalized = os.path.normpath(str(path_str)).replace('\\', '/').lower()
+        if len(normalized) > 1:
+            normalized = normalized.rstrip('/')
+        return normalized or '/'
+
+    @staticmethod
+    def directory_key(dir_path: Union[str, Path]) -> str:
+        """
+        生成目录的索引键（用于目录过滤下推到索引查询）
+        
+        使用比较格式路径的短哈希，避免路径中的空格、逗号等字符影响关键字分词
+        
+        Args:
+            dir_path: 目录路径
+            
+        Returns:
+            str: 16位十六进制目录键
+        """
+        compare_path = PathStandardizer.normalize_for_compare(dir_path)
+        return hashlib.md5(compare_path.encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def ancestor_directory_keys(file_path: Union[str, Path]) -> list:
+        """
+        生成文件自身及其所有上级目录的目录键（压缩包内文件使用压缩包路径）
+        
+        Args:
+            file_path: 文件路径（索引格式或原始格式均可）
+            
+        Returns:
+            list: 目录键列表，由近到远
+        """
+        if not file_path:
+            return []
+        archive_path, _ = PathStandardizer.split_archive_path(str(file_path))
+        compare_path = PathStandardizer.normalize_for_compare(archive_path)
+        
+        keys = []
+        parts = compare_path.split('/')
+        for end in range(len(parts), 0, -1):
+            prefix = '/'.join(parts[:end]) or '/'
+            key = hashlib.md5(prefix.encode('utf-8')).hexdigest()[:16]
+            if key not in keys:
+                keys.append(key)
+        return keys
+
 
 # 为了向后兼容，提供全局函数接口
 def normalize_path_for_index(path_str: Union[str, Path]) -> str:
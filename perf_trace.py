@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能跟踪模块
+
+为索引和搜索的热点路径提供命名跟踪段（span）：
+
+    索引: scan、stat、extract.<扩展名>、tokenize、write、commit
+    搜索: search、query_parse、score、highlight、postprocess、render.<视图>
+
+计时使用单调时钟 time.perf_counter_ns()。每个名称维护一个按 2 的幂分桶（微秒）的直方图，
+同时把最近的跟踪事件保存在定长环形缓冲区中，可导出为 Chrome 跟踪事件格式的 JSON
+（chrome://tracing、Perfetto 可直接打开）。
+
+模块加载时跟踪关闭，程序启动后按"索引优化设置 → 性能监控 → 显示性能指标"开关
+（QSettings 键 SETTINGS_KEY）调用 set_enabled()；关闭时 span() 返回共享的空上下文，
+热点路径上只多一次布尔判断。
+
+本模块只依赖标准库，可以在索引工作进程中使用。
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import wraps
+
+# 保留的最近跟踪事件数（导出用），直方图不受此限制
+MAX_EVENTS = 50000
+
+# 直方图分桶数：第 i 个桶统计耗时在 [2^(i-1), 2^i) 微秒之间的次数，最后一个桶约 35 分钟以上
+HISTOGRAM_BUCKETS = 32
+
+SETTINGS_KEY = "optimization/show_performance_metrics"
+
+now = time.perf_counter_ns
+
+_enabled = False
+_lock = threading.Lock()
+_histograms = {}                       # 名称 -> Histogram
+_events = deque(maxlen=MAX_EVENTS)     # (名称, 开始ns, 耗时ns, pid, tid, 参数)
+
+
+class Histogram:
+    """单个跟踪段名称的耗时统计（对数分桶，内存固定）"""
+
+    __slots__ = ('count', 'total_ns', 'min_ns', 'max_ns', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+
+    def add(self, duration_ns: int):
+        self.count += 1
+        self.total_ns += duration_ns
+        if self.min_ns is None or duration_ns < self.min_ns:
+            self.min_ns = duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+        self.buckets[min((duration_ns // 1000).bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+
+    def percentile(self, fraction: float) -> int:
+        """近似分位数（返回所在桶的上界，不超过最大值），单位纳秒"""
+        if not self.count:
+            return 0
+        threshold = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= threshold:
+                return min((1 << index) * 1000, self.max_ns)
+        return self.max_ns
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'total_ms': self.total_ns / 1e6,
+            'mean_ms': self.total_ns / self.count / 1e6 if self.count else 0.0,
+            'min_ms': (self.min_ns or 0) / 1e6,
+            'p50_ms': self.percentile(0.5) / 1e6,
+            'p95_ms': self.percentile(0.95) / 1e6,
+            'max_ms': self.max_ns / 1e6,
+            'buckets_us': {f"<{1 << index}": bucket_count
+                           for index, bucket_count in enumerate(self.buckets) if bucket_count},
+        }
+
+
+def set_enabled(enabled: bool):
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def record(name: str, start_ns: int, duration_ns: int | None = None, pid: int | None = None, **args):
+    """记录一个已结束的跟踪段（duration_ns 省略时以当前时间为结束）"""
+    if not _enabled:
+        return
+    if duration_ns is None:
+        duration_ns = now() - start_ns
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.add(duration_ns)
+        _events.append((name, start_ns, duration_ns, pid or os.getpid(), threading.get_ident(), args or None))
+
+
+class _Span:
+    __slots__ = ('name', 'args', 'start_ns')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.start_ns = 0
+
+    def __enter__(self):
+        self.start_ns = now()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(self.name, self.start_ns, **self.args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, **args):
+    """跟踪段上下文管理器：with perf_trace.span("score", hits=n): ..."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def traced(name: str):
+    """把整个函数调用记为一个跟踪段的装饰器"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start_ns = now()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, start_ns)
+        return wrapper
+    return decorator
+
+
+def timed_iter(name: str, iterable):
+    """逐项消费的迭代器（如分词器的 token 流）：只累计取下一项的耗时，耗尽时记为一个跟踪段"""
+    if not _enabled:
+        return iterable
+    return _timed_iter(name, iterable)
+
+
+def _timed_iter(name, iterable):
+    iterator = iter(iterable)
+    first_ns = None
+    busy_ns = 0
+    try:
+        while True:
+            start_ns = now()
+            if first_ns is None:
+                first_ns = start_ns
+            try:
+                item = next(iterator)
+            except StopIteration:
+                busy_ns += now() - start_ns
+                return
+            busy_ns += now() - start_ns
+            yield item
+    finally:
+        if first_ns is not None:
+            record(name, first_ns, busy_ns)
+
+
+def summary() -> dict[str, dict]:
+    """各跟踪段的直方图统计，按总耗时降序"""
+    with _lock:
+        items = [(name, histogram.summary()) for name, histogram in _histograms.items()]
+    items.sort(key=lambda item: item[1]['total_ms'], reverse=True)
+    return dict(items)
+
+
+def format_summary(title: str = "性能指标") -> str:
+    """格式化各跟踪段的统计表（毫秒）"""
+    stats = summary()
+    if not stats:
+        return f"=== {title} ===\n  暂无数据（开启\"显示性能指标\"后执行索引或搜索）"
+    lines = [f"=== {title} ===",
+             f"  {'名称':<20}{'次数':>8}{'总计':>11}{'平均':>10}{'P50':>10}{'P95':>10}{'最大':>10}"]
+    for name, stat in stats.items():
+        lines.append(f"  {name:<22}{stat['count']:>8}{stat['total_ms']:>11.1f}{stat['mean_ms']:>10.2f}"
+                     f"{stat['p50_ms']:>10.2f}{stat['p95_ms']:>10.2f}{stat['max_ms']:>10.2f}")
+    return "\n".join(lines)
+
+
+def export_trace(path: str) -> int:
+    """
+    导出 Chrome 跟踪事件格式的 JSON（chrome://tracing、ui.perfetto.dev 可直接打开）
+
+    直方图统计写在 otherData.histograms 中。
+
+    Returns:
+        int: 导出的事件数
+    """
+    with _lock:
+        events = list(_events)
+    trace_events = []
+    for name, start_ns, duration_ns, pid, tid, args in events:
+        event = {
+            'name': name,
+            'cat': name.split('.', 1)[0],
+            'ph': 'X',
+            'ts': start_ns / 1000,
+            'dur': duration_ns / 1000,
+            'pid': pid,
+            'tid': tid,
+        }
+        if args:
+            event['args'] = args
+        trace_events.append(event)
+    data = {
+        'traceEvents': trace_events,
+        'displayTimeUnit': 'ms',
+        'otherData': {'histograms': summary()},
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, default=str)
+    return len(trace_events)
+
+
+def default_trace_path() -> str:
+    """默认导出路径（与运行日志同目录）"""
+    log_dir = os.path.join(os.path.expanduser('~'), 'Documents', 'DocumentSearchIndexLogs')
+    return os.path.join(log_dir, f"perf_trace_{datetime.now():%Y%m%d_%H%M%S}.json")
+
+
+def reset():
+    """清空直方图和跟踪事件"""
+    with _lock:
+        _histograms.clear()
+        _events.clear()
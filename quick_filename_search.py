@@ -12,11 +12,283 @@
 
 import os
 import time
+import heapq
 import fnmatch
+import threading
+from array import array
 from pathlib import Path
 from typing import List, Dict, Optional
 from PySide6.QtCore import QThread, Signal, QObject
 
+# 文件名索引刷新间隔：超过该时间后的搜索会在后台检查目录变化
+FILENAME_INDEX_REFRESH_SECONDS = 30
+# 已删除条目超过该比例时压缩索引
+FILENAME_INDEX_COMPACT_RATIO = 0.25
+WILDCARD_CHARS = frozenset('*?')
+
+
+class FilenameIndex:
+    """内存文件名索引
+
+    只在建立时遍历一次源目录，之后按目录修改时间增量同步：只有条目增删过的目录
+    （目录的修改时间会变化）才重新列举。每个文件预先计算小写主文件名和扩展名，
+    并按主文件名中的字符建立倒排表（数组存储的文件编号，按编号递增）。
+
+    现有匹配规则接受"包含查询中所有字符"的文件名，因此按查询字符求倒排表交集
+    得到的正好是全部候选，再用匹配函数逐个确认。
+    """
+
+    def __init__(self, directories, extensions):
+        self.directories = tuple(directories)
+        self.extensions = frozenset(extensions)
+        self._lock = threading.RLock()
+        self._refresh_thread = None
+        self._reset()
+
+    def _reset(self):
+        self._paths = []
+        self._names = []
+        self._stems = []
+        self._exts = []
+        self._dirs = []
+        self._mtimes = []
+        self._sizes = []
+        self._alive = bytearray()
+        self._dead_count = 0
+        self._ids = {}            # 文件路径 -> 编号
+        self._dir_files = {}      # 目录 -> 该目录下文件编号集合
+        self._dir_mtimes = {}     # 目录 -> 修改时间（纳秒）
+        self._postings = {}       # 字符 -> array('I') 文件编号
+        self.built_at = 0.0
+
+    def __len__(self):
+        return len(self._paths) - self._dead_count
+
+    # ---- 建立与增量同步 ----
+    def build(self):
+        """遍历源目录建立索引"""
+        start_time = time.time()
+        with self._lock:
+            self._reset()
+            for directory in self.directories:
+                if os.path.isdir(directory):
+                    self._scan_tree(directory)
+            self.built_at = time.time()
+        print(f"📇 文件名索引已建立：{len(self)} 个文件，{len(self._dir_mtimes)} 个目录，"
+              f"耗时 {(time.time() - start_time) * 1000:.0f}ms")
+
+    def is_stale(self) -> bool:
+        return time.time() - self.built_at > FILENAME_INDEX_REFRESH_SECONDS
+
+    def refresh_in_background(self):
+        """在后台线程中增量刷新，不阻塞当前搜索"""
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        self.built_at = time.time()
+        self._refresh_thread = threading.Thread(target=self.refresh, name="filename-index-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    def refresh(self):
+        """只重新列举修改时间变化的目录（新增、删除、重命名条目都会改变目录的修改时间）"""
+        start_time = time.time()
+        changed = 0
+        for directory in list(self._dir_mtimes):
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                with self._lock:
+                    self._remove_tree(directory)
+                changed += 1
+                continue
+            if mtime != self._dir_mtimes.get(directory, mtime):
+                with self._lock:
+                    self._rescan_directory(directory)
+                changed += 1
+        with self._lock:
+            for directory in self.directories:
+                if directory not in self._dir_mtimes and os.path.isdir(directory):
+                    self._scan_tree(directory)
+            if self._dead_count > len(self._paths) * FILENAME_INDEX_COMPACT_RATIO:
+                self._compact()
+            self.built_at = time.time()
+        if changed:
+            print(f"📇 文件名索引增量刷新：{changed} 个目录有变化，耗时 {(time.time() - start_time) * 1000:.0f}ms")
+
+    def _list_directory(self, directory):
+        """列举目录，返回 (文件条目列表, 子目录路径列表)；跳过隐藏目录"""
+        files, subdirs = [], []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not entry.name.startswith('.'):
+                            subdirs.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in self.extensions:
+                        files.append(entry)
+                except OSError:
+                    continue
+        return files, subdirs
+
+    def _scan_tree(self, directory):
+        pending = [directory]
+        while pending:
+            current = pending.pop()
+            try:
+                self._dir_mtimes[current] = os.stat(current).st_mtime_ns
+                files, subdirs = self._list_directory(current)
+            except OSError:
+                self._dir_mtimes.pop(current, None)
+                continue
+            self._index_entries(current, files)
+            pending.extend(subdirs)
+
+    def _index_entries(self, directory, entries):
+        # DirEntry.stat() 在 Windows 上直接使用目录列举返回的信息，不额外访问磁盘
+        file_ids = self._dir_files.setdefault(directory, set())
+        for entry in entries:
+            try:
+                stat_info = entry.stat()
+            except OSError:
+                continue
+            file_ids.add(self._add_file(directory, entry.name, os.path.splitext(entry.name)[1].lower(),
+                                        stat_info.st_mtime, stat_info.st_size))
+
+    def _rescan_directory(self, directory):
+        """重新列举单个目录：同步其中的文件，处理新增和删除的子目录"""
+        try:
+            self._dir_mtimes[directory] = os.stat(directory).st_mtime_ns
+            files, subdirs = self._list_directory(directory)
+        except OSError:
+            self._remove_tree(directory)
+            return
+        present = {entry.path for entry in files}
+        for file_id in list(self._dir_files.get(directory, ())):
+            if self._paths[file_id] not in present:
+                self._remove_id(file_id)
+        known_subdirs = {d for d in self._dir_mtimes if os.path.dirname(d) == directory}
+        for removed_dir in known_subdirs - set(subdirs):
+            self._remove_tree(removed_dir)
+        self._index_entries(directory, [entry for entry in files if entry.path not in self._ids])
+        for new_dir in set(subdirs) - known_subdirs:
+            self._scan_tree(new_dir)
+
+    def _remove_tree(self, directory):
+        prefix = directory.rstrip(os.sep) + os.sep
+        for known_dir in [d for d in self._dir_mtimes if d == directory or d.startswith(prefix)]:
+            for file_id in self._dir_files.pop(known_dir, ()):
+                self._remove_id(file_id, discard_from_dir=False)
+            self._dir_mtimes.pop(known_dir, None)
+
+    def _add_file(self, directory, filename, file_ext, mtime, size):
+        file_path = os.path.join(directory, filename)
+        existing = self._ids.get(file_path)
+        if existing is not None:
+            return existing
+        file_id = len(self._paths)
+        stem = os.path.splitext(filename)[0].lower()
+        self._paths.append(file_path)
+        self._names.append(filename)
+        self._stems.append(stem)
+        self._exts.append(file_ext)
+        self._dirs.append(directory)
+        self._mtimes.append(mtime)
+        self._sizes.append(size)
+        self._alive.append(1)
+        self._ids[file_path] = file_id
+        for char in set(stem):
+            postings = self._postings.get(char)
+            if postings is None:
+                postings = self._postings[char] = array('I')
+            postings.append(file_id)
+        return file_id
+
+    def _remove_id(self, file_id, discard_from_dir=True):
+        if not self._alive[file_id]:
+            return
+        self._alive[file_id] = 0
+        self._dead_count += 1
+        self._ids.pop(self._paths[file_id], None)
+        if discard_from_dir:
+            self._dir_files.get(self._dirs[file_id], set()).discard(file_id)
+
+    def _compact(self):
+        """丢弃已删除条目并重建倒排表（只在内存中进行，不访问磁盘）"""
+        alive_entries = [(self._dirs[i], self._names[i], self._exts[i], self._mtimes[i], self._sizes[i])
+                         for i in range(len(self._paths)) if self._alive[i]]
+        dir_mtimes = self._dir_mtimes
+        self._reset()
+        self._dir_mtimes = dir_mtimes
+        for directory, filename, file_ext, mtime, size in alive_entries:
+            file_id = self._add_file(directory, filename, file_ext, mtime, size)
+            self._dir_files.setdefault(directory, set()).add(file_id)
+
+    # ---- 查询 ----
+    def _candidates(self, query: str):
+        """按查询字符求倒排表交集（通配符不参与；含 [ 的模式无法确定必需字符，退化为全部文件）"""
+        required = set(query) - WILDCARD_CHARS
+        if not required or '[' in query:
+            return [i for i in range(len(self._paths)) if self._alive[i]]
+        postings = []
+        for char in required:
+            char_postings = self._postings.get(char)
+            if not char_postings:
+                return []
+            postings.append(char_postings)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for char_postings in postings[1:]:
+            candidates.intersection_update(char_postings)
+            if not candidates:
+                break
+        return candidates
+
+    def _stat(self, file_id) -> bool:
+        """读取文件的修改时间和大小，文件已不存在时从索引中移除"""
+        try:
+            stat_info = os.stat(self._paths[file_id])
+        except OSError:
+            self._remove_id(file_id)
+            return False
+        self._mtimes[file_id] = stat_info.st_mtime
+        self._sizes[file_id] = stat_info.st_size
+        return True
+
+    def search(self, query: str, max_results: int, match_func, score_func) -> List[Dict]:
+        """
+        返回按（修改时间, 匹配分数）降序的前 max_results 个结果
+
+        Args:
+            query: 小写查询词
+            match_func: 匹配函数 (stem, query) -> bool
+            score_func: 评分函数 (stem, file_ext, query) -> float
+        """
+        def rank_key(i):
+            return self._mtimes[i], score_func(self._stems[i], self._exts[i], query)
+
+        with self._lock:
+            matched = [i for i in self._candidates(query)
+                       if self._alive[i] and match_func(self._stems[i], query)]
+            # 只对进入前 k 的文件重新读取文件信息：已删除的文件被移除并由后续候选补上，
+            # 原地修改（目录修改时间不变）的文件在这里更新修改时间和大小
+            # 粗选只比较修改时间（避免对全部候选评分），最终结果再按（修改时间, 分数）排序
+            results = []
+            while matched and len(results) < max_results:
+                ranked = heapq.nlargest(max_results - len(results), matched, key=self._mtimes.__getitem__)
+                results.extend(i for i in ranked if self._stat(i))
+                ranked_set = set(ranked)
+                matched = [i for i in matched if i not in ranked_set]
+
+            results.sort(key=rank_key, reverse=True)
+            return [{
+                'file_path': self._paths[i],
+                'filename': self._names[i],
+                'directory': self._dirs[i],
+                'file_size': self._sizes[i],
+                'modified_time': self._mtimes[i],
+                'file_type': self._exts[i],
+                'match_score': score_func(self._stems[i], self._exts[i], query)
+            } for i in results]
+
 
 class QuickFilenameSearcher(QObject):
     """快速文件名搜索器"""
@@ -41,8 +313,10 @@ class QuickFilenameSearcher(QObject):
                 '.py', '.js', '.css', '.java', '.cpp', '.c', '.h'
             }
         
+        self._filename_index = None  # 内存文件名索引，首次搜索时建立
+        
     def set_source_directories(self, directories: List[str]):
-        """设置搜索目录"""
+        """设置搜索目录（目录变化后下次搜索重建文件名索引）"""
         self.source_directories = directories
     
     def _get_allowed_extensions(self):
@@ -69,6 +343,9 @@ class QuickFilenameSearcher(QObject):
         """
         快速搜索文件名
         
+        首次搜索时建立内存文件名索引，之后每次按键只查询索引；
+        目录变化由后台增量刷新同步，返回前只对前 max_results 个结果读取文件信息。
+        
         Args:
             query: 搜索查询词
             max_results: 最大结果数
@@ -85,69 +362,15 @@ class QuickFilenameSearcher(QObject):
             return []
             
         query = query.strip().lower()
-        results = []
         start_time = time.time()
         
         print(f"🚀 快速文件名搜索开始：'{query}'")
         
         try:
-            for directory in self.source_directories:
-                if not os.path.exists(directory):
-                    continue
-                    
-                self.search_progress.emit(f"搜索目录: {os.path.basename(directory)}")
-                
-                # 递归搜索文件
-                for root, dirs, files in os.walk(directory):
-                    # 跳过隐藏目录
-                    dirs[:] = [d for d in dirs if not d.startswith('.')]
-                    
-                    for file in files:
-                        # 检查文件扩展名
-                        file_ext = Path(file).suffix.lower()
-                        if file_ext not in self.supported_extensions:
-                            continue
-                            
-                        # 检查文件名是否匹配查询词
-                        if self._matches_query(file.lower(), query):
-                            file_path = os.path.join(root, file)
-                            
-                            # 获取文件信息
-                            try:
-                                stat_info = os.stat(file_path)
-                                file_size = stat_info.st_size
-                                modified_time = stat_info.st_mtime
-                                
-                                result = {
-                                    'file_path': file_path,
-                                    'filename': file,
-                                    'directory': root,
-                                    'file_size': file_size,
-                                    'modified_time': modified_time,
-                                    'file_type': file_ext,
-                                    'match_score': self._calculate_match_score(file.lower(), query)
-                                }
-                                
-                                results.append(result)
-                                
-                                # 限制结果数量
-                                if len(results) >= max_results:
-                                    break
-                                    
-                            except (OSError, IOError) as e:
-                                # 跳过无法访问的文件
-                                continue
-                    
-                    # 如果已达到最大结果数，停止搜索
-                    if len(results) >= max_results:
-                        break
-                        
-                # 如果已达到最大结果数，停止搜索其他目录
-                if len(results) >= max_results:
-                    break
-            
-            # 按修改时间排序（最新的在前），同时考虑匹配分数
-            results.sort(key=lambda x: (x['modified_time'], x['match_score']), reverse=True)
+            # --- MODIFIED: 使用内存文件名索引，不再每次按键遍历文件系统 ---
+            filename_index = self._ensure_filename_index()
+            results = filename_index.search(query, max_results, self._matches_stem, self._score_stem)
+            # --- END MODIFIED ---
             
             elapsed_time = time.time() - start_time
             print(f"✅ 快速文件名搜索完成：找到 {len(results)} 个结果，耗时 {elapsed_time*1000:.1f}ms")
@@ -158,9 +381,52 @@ class QuickFilenameSearcher(QObject):
             print(f"❌ 快速文件名搜索出错：{str(e)}")
             return []
     
+    # --- ADDED: 内存文件名索引管理 ---
+    def _ensure_filename_index(self) -> 'FilenameIndex':
+        """返回与当前源目录、文件类型一致的文件名索引，必要时建立；过期时在后台增量刷新"""
+        directories = tuple(self.source_directories)
+        extensions = frozenset(self.supported_extensions)
+        filename_index = self._filename_index
+        if filename_index is None or filename_index.directories != directories or \
+                filename_index.extensions != extensions:
+            self.search_progress.emit(f"正在建立文件名索引: {len(directories)} 个目录")
+            filename_index = FilenameIndex(directories, extensions)
+            filename_index.build()
+            self._filename_index = filename_index
+        elif filename_index.is_stale():
+            filename_index.refresh_in_background()
+        return filename_index
+    
+    def _matches_stem(self, stem: str, query: str) -> bool:
+        """主文件名（小写，不含扩展名）是否匹配查询词：包含、通配符匹配或包含全部查询字符"""
+        if query in stem:
+            return True
+        try:
+            if fnmatch.fnmatch(stem, f"*{query}*"):
+                return True
+        except:
+            pass
+        return all(char in stem for char in query)
+    
+    def _score_stem(self, stem: str, file_ext: str, query: str) -> float:
+        """匹配分数（0-100）：完全/开头/包含匹配、长度占比、字符重合度，常用文档类型加分"""
+        score = 0.0
+        if query == stem:
+            score += 100
+        elif query in stem:
+            score += 80 if stem.find(query) == 0 else 60
+            score += len(query) / len(stem) * 20
+        query_chars = set(query)
+        char_match_ratio = len(query_chars & set(stem)) / len(query_chars) if query_chars else 0
+        score += char_match_ratio * 10
+        if file_ext in {'.txt', '.md', '.doc', '.docx', '.pdf'}:
+            score += 5
+        return min(score, 100.0)
+    # --- END ADDED ---
+    
     def _matches_query(self, filename: str, query: str) -> bool:
         """
-        检查文件名是否匹配查询词
+        检查文件名是否匹配查询词（规则见 _matches_stem）
         
         Args:
             filename: 文件名（小写）
@@ -169,28 +435,11 @@ class QuickFilenameSearcher(QObject):
         Returns:
             bool: 是否匹配
         """
-        # 1. 完全匹配（不含扩展名）
-        name_without_ext = Path(filename).stem.lower()
-        if query in name_without_ext:
-            return True
-            
-        # 2. 模糊匹配（支持通配符）
-        try:
-            if fnmatch.fnmatch(name_without_ext, f"*{query}*"):
-                return True
-        except:
-            pass
-            
-        # 3. 分词匹配（中文支持）
-        query_chars = list(query)
-        if all(char in name_without_ext for char in query_chars):
-            return True
-            
-        return False
+        return self._matches_stem(Path(filename).stem.lower(), query)
     
     def _calculate_match_score(self, filename: str, query: str) -> float:
         """
-        计算匹配分数
+        计算匹配分数（评分规则见 _score_stem）
         
         Args:
             filename: 文件名（小写）
@@ -199,39 +448,7 @@ class QuickFilenameSearcher(QObject):
         Returns:
             float: 匹配分数（0-100）
         """
-        name_without_ext = Path(filename).stem.lower()
-        
-        # 基础分数
-        score = 0.0
-        
-        # 1. 完全匹配加分
-        if query == name_without_ext:
-            score += 100
-        elif query in name_without_ext:
-            # 包含匹配，根据位置和长度加分
-            index = name_without_ext.find(query)
-            if index == 0:  # 开头匹配
-                score += 80
-            else:  # 中间匹配
-                score += 60
-            
-            # 长度匹配度
-            length_ratio = len(query) / len(name_without_ext)
-            score += length_ratio * 20
-        
-        # 2. 字符匹配度
-        query_chars = set(query)
-        name_chars = set(name_without_ext)
-        char_match_ratio = len(query_chars & name_chars) / len(query_chars) if query_chars else 0
-        score += char_match_ratio * 10
-        
-        # 3. 文件类型加分（常用文档类型）
-        common_types = {'.txt', '.md', '.doc', '.docx', '.pdf'}
-        file_ext = Path(filename).suffix.lower()
-        if file_ext in common_types:
-            score += 5
-            
-        return min(score, 100.0)
+        return self._score_stem(Path(filename).stem.lower(), Path(filename).suffix.lower(), query)
 
 
 class QuickFilenameSearchThread(QThread):
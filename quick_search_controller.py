@@ -21,6 +21,7 @@ class QuickSearchController(QObject):
     
     # 定义信号
     show_main_window_signal = Signal(str)  # 显示主窗口信号，带有搜索文本参数
+    _asyncSearchFinished = Signal(int, str, object)  # 后台搜索完成（搜索序号, 查询词, 结果列表）
     
     def __init__(self, main_window):
         """初始化快速搜索控制器
@@ -47,6 +48,12 @@ class QuickSearchController(QObject):
         # 防重复调用机制
         self._current_search_query = None  # 当前正在处理的搜索词
         self._search_in_progress = False   # 搜索进行中标志
+
+        # --- ADDED: 后台搜索状态（结果通过信号回到界面线程，旧搜索的结果被丢弃） ---
+        self._search_generation = 0
+        self._pending_search_future = None
+        self._asyncSearchFinished.connect(self._on_async_search_finished)
+        # --- END ADDED ---
         
         # 预热缓存 - 同步主窗口的热门搜索
         self._sync_with_main_window_cache()
@@ -367,26 +374,17 @@ class QuickSearchController(QObject):
             if self.dialog and hasattr(self.dialog, 'set_search_results'):
                 self.dialog.set_search_results([])
             
-            # 检查主窗口搜索方法是否可用
-            if not hasattr(self.main_window, '_perform_search') or \
-               not callable(getattr(self.main_window, '_perform_search')):
-                print("❌ 主窗口没有提供 _perform_search 方法")
-                if self.dialog and hasattr(self.dialog, 'set_search_results'):
-                    self.dialog.set_search_results([])
+            # --- ADDED: 优先使用 mmap 文件名快照，无需经过主窗口搜索流程 ---
+            raw_results = self._search_filename_snapshot(query)
+            # --- END ADDED ---
+
+            if raw_results is None:
+                # --- MODIFIED: 快照不可用时在共享搜索服务中后台搜索，不再经由主窗口控件忙等 ---
+                self._start_async_search(query)
                 return
-            
-            # 直接调用主窗口的索引搜索，确保结果一致性
-            print(f"🔍 执行主窗口索引搜索：'{query}'")
-            
-            raw_results = self.main_window._perform_search(
-                query=query,
-                max_results=self.max_results,  # 使用增加后的max_results
-                quick_search=True,
-                search_scope="filename"
-            )
-                
-            print(f"✅ 主窗口索引搜索完成：'{query}' ({len(raw_results) if raw_results else 0} 个)")
-                
+                # --- END MODIFIED ---
+            self._search_generation += 1  # 快照结果直接显示，丢弃仍在进行的后台搜索
+
             # 格式化结果
             formatted_results = self._format_search_results(raw_results)
             
@@ -414,6 +412,103 @@ class QuickSearchController(QObject):
                 self._current_search_query = None
                 print(f"🔄 搜索状态已重置：'{query}'")
     
+    # --- ADDED: 文件名快照搜索 ---
+    def _get_index_directory(self):
+        """获取当前索引目录"""
+        if hasattr(self.main_window, '_current_index_dir'):
+            return self.main_window._current_index_dir()
+        from pathlib import Path
+        default_index_path = str(Path.home() / "Documents" / "DocumentSearchIndex")
+        return self.main_window.settings.value("indexing/indexDirectory", default_index_path)
+
+    def _search_filename_snapshot(self, query):
+        """用索引目录中的文件名快照回答文件名查询
+
+        快照在每次索引提交后重建，按源目录、许可证文件类型过滤，并跳过已删除的文件。
+
+        Returns:
+            list | None: 搜索结果；快照不可用时返回 None，由调用方回退到主窗口搜索
+        """
+        try:
+            import time
+            import index_snapshot
+            import document_search
+
+            snapshot = index_snapshot.get_snapshot(self._get_index_directory())
+            if snapshot is None:
+                return None
+            source_dirs = self._get_source_directories()
+            if not source_dirs:
+                return []
+
+            start_time = time.time()
+            allowed_file_types, _ = document_search.get_license_file_type_filter()
+            dir_prefixes = tuple(os.path.normcase(os.path.normpath(d)) + os.sep for d in source_dirs)
+
+            def accept(record):
+                file_type = record['file_type']
+                if file_type and file_type not in allowed_file_types:
+                    return False
+                if not os.path.normcase(os.path.normpath(record['file_path'])).startswith(dir_prefixes):
+                    return False
+                return os.path.exists(record['file_path'])
+
+            results = snapshot.search(query, self.max_results, accept)
+            print(f"⚡ 文件名快照搜索：'{query}' ({len(results)} 个, {(time.time() - start_time) * 1000:.1f}ms)")
+            return results
+        except Exception as e:
+            print(f"文件名快照搜索失败，回退到主窗口搜索: {str(e)}")
+            return None
+    # --- END ADDED ---
+
+    # --- ADDED: 后台搜索 ---
+    def _start_async_search(self, query):
+        """把文件名搜索提交到共享搜索服务，结果就绪后由 _on_async_search_finished 显示
+
+        不设置主窗口的控件，也不轮询等待；新的查询会取消仍在排队的旧查询。
+        """
+        import document_search
+
+        self._search_generation += 1
+        generation = self._search_generation
+        if self._pending_search_future is not None and not self._pending_search_future.done():
+            self._pending_search_future.cancel()
+
+        future = document_search.get_optimized_search_engine().submit(
+            query, self._get_index_directory(),
+            search_mode='phrase',
+            search_scope='filename',
+            current_source_dirs=self._get_source_directories() or None,
+            limit=self.max_results)
+        self._pending_search_future = future
+        print(f"🔍 后台文件名搜索已提交：'{query}' (#{generation})")
+
+        def on_done(done_future):
+            # 在搜索线程中调用：只转发结果，由信号切换到界面线程
+            if done_future.cancelled():
+                return
+            try:
+                results = done_future.result()
+            except Exception as e:
+                print(f"❌ 后台文件名搜索失败：'{query}': {e}")
+                results = []
+            self._asyncSearchFinished.emit(generation, query, results)
+
+        future.add_done_callback(on_done)
+
+    @Slot(int, str, object)
+    def _on_async_search_finished(self, generation, query, raw_results):
+        """后台搜索完成（界面线程），只显示最新一次搜索的结果"""
+        if generation != self._search_generation:
+            print(f"⚠️ 搜索已被新请求覆盖，跳过结果显示：'{query}'")
+            return
+        self._pending_search_future = None
+        formatted_results = self._format_search_results(raw_results)
+        print(f"✅ 后台文件名搜索完成：'{query}' ({len(formatted_results)} 个)")
+        if self.dialog and hasattr(self.dialog, 'set_search_results'):
+            self.dialog.set_search_results(formatted_results)
+    # --- END ADDED ---
+
     def _execute_search_async(self, query):
         """异步执行搜索（动态等待优化版本）"""
         try:
@@ -641,9 +736,11 @@ class QuickSearchController(QObject):
             for result in raw_results[:self.max_results]:
                 try:
                     # 处理不同的结果格式
+                    last_modified = 0
                     if hasattr(result, 'get'):  # 字典类型
                         file_path = result.get('file_path', result.get('path', ''))
                         content = result.get('content_preview', result.get('content', result.get('preview', '')))
+                        last_modified = result.get('last_modified', result.get('mtime', 0)) or 0
                     elif hasattr(result, '__getitem__'):  # 列表或元组类型
                         if len(result) >= 2:
                             file_path = result[0] if result[0] else ''
@@ -670,7 +767,8 @@ class QuickSearchController(QObject):
                     # 创建格式化结果，使用快捷搜索对话框期望的格式
                     formatted_result = {
                         'file_path': file_path,  # 使用 file_path 键名
-                        'content_preview': content or f"文件: {file_name}"  # 使用 content_preview 键名
+                        'content_preview': content or f"文件: {file_name}",  # 使用 content_preview 键名
+                        'last_modified': last_modified  # 保留修改时间，对话框排序时不必再读取文件系统
                     }
                     
                     formatted_results.append(formatted_result)
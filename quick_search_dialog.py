@@ -11,16 +11,23 @@
 
 import sys
 import os
+import math
+from datetime import datetime
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, 
-                             QListWidget, QListWidgetItem, QLabel, QPushButton, 
+                             QListView, QLabel, QPushButton, 
                              QGraphicsDropShadowEffect, QApplication, QWidget, QMenu,
                              QProgressBar, QSizePolicy, QFrame, QMessageBox, QStyledItemDelegate, QStyle)
-from PySide6.QtCore import Qt, QSize, QEvent, QPoint, QSettings, Signal, QTimer, QPropertyAnimation, QEasingCurve, QRect
-from PySide6.QtGui import QIcon, QColor, QFont, QPalette, QKeyEvent, QDesktopServices, QAction, QPainter, QPixmap, QClipboard, QFontMetrics
+from PySide6.QtCore import (Qt, QSize, QEvent, QPoint, QSettings, Signal, QTimer, QPropertyAnimation, QEasingCurve, QRect,
+                            QAbstractListModel, QModelIndex)
+from PySide6.QtGui import QColor, QFont, QPalette, QKeyEvent, QDesktopServices, QAction, QPainter, QPixmap, QClipboard, QFontMetrics
 from pathlib import Path
 
 # 导入主程序的常量
-from search_gui_pyside import ORGANIZATION_NAME, APPLICATION_NAME
+from app_identity import ORGANIZATION_NAME, APPLICATION_NAME
+import perf_trace
+
+# 结果行高度（委托绘制固定两行，所有行等高）
+RESULT_ROW_HEIGHT = 44
 
 class SearchResultDelegate(QStyledItemDelegate):
     """自定义委托，支持不同字体大小的文本显示"""
@@ -28,6 +35,15 @@ class SearchResultDelegate(QStyledItemDelegate):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent_dialog = parent
+        # --- ADDED: 字体和主题颜色在委托中复用，不在每次绘制时重新创建 ---
+        self.title_font = QFont()
+        self.title_font.setPointSize(9)  # 再次减小到9，更精致
+        self.title_font.setBold(True)
+        self.detail_font = QFont()
+        self.detail_font.setPointSize(7)  # 再次减小到7，更精致紧凑
+        self._colors_theme = None
+        self._colors = None
+        # --- END ADDED ---
         
     def paint(self, painter, option, index):
         """自定义绘制方法"""
@@ -71,19 +87,14 @@ class SearchResultDelegate(QStyledItemDelegate):
             painter.setPen(QColor(colors['text_primary']))  # 正常时使用主题文字颜色
         
         # 绘制第一行（文件名）- 使用精致字体
-        title_font = QFont()
-        title_font.setPointSize(9)  # 再次减小到9，更精致
-        title_font.setBold(True)
-        painter.setFont(title_font)
+        painter.setFont(self.title_font)
         
         title_rect = QRect(rect.left() + 10, rect.top() + 5, rect.width() - 20, 16)  # 适应更小字体
         painter.drawText(title_rect, Qt.AlignLeft | Qt.AlignVCenter, lines[0])
         
         # 绘制第二行（路径和时间）- 使用更小字体
         if len(lines) > 1:
-            detail_font = QFont()
-            detail_font.setPointSize(7)  # 再次减小到7，更精致紧凑
-            painter.setFont(detail_font)
+            painter.setFont(self.detail_font)
             
             # 设置较淡的颜色
             detail_color = painter.pen().color()
@@ -96,9 +107,15 @@ class SearchResultDelegate(QStyledItemDelegate):
         painter.restore()
     
     def _get_theme_colors(self):
-        """获取主题颜色"""
+        """获取主题颜色（按主题缓存）"""
         if self.parent_dialog and hasattr(self.parent_dialog, '_get_theme_colors'):
-            return self.parent_dialog._get_theme_colors()
+            # --- MODIFIED: 主题未变化时复用上次的颜色表 ---
+            theme = getattr(self.parent_dialog, 'current_theme', None)
+            if self._colors is None or theme != self._colors_theme:
+                self._colors = self.parent_dialog._get_theme_colors()
+                self._colors_theme = theme
+            return self._colors
+            # --- END MODIFIED ---
         else:
             # 默认蓝色主题
             return {
@@ -113,159 +130,282 @@ class SearchResultDelegate(QStyledItemDelegate):
     
     def sizeHint(self, option, index):
         """返回项目的建议大小"""
-        return QSize(0, 44)  # 进一步减小到44，更紧凑协调
+        return QSize(0, RESULT_ROW_HEIGHT)  # 进一步减小到44，更紧凑协调
 
-class SearchResultItem(QListWidgetItem):
-    """现代化搜索结果列表项 - 性能优化版"""
+# --- MODIFIED: 结果列表改为 model/view，行数据在绘制到该行时才计算 ---
+# 文件类型图标（进程级缓存，所有结果行共享）
+FILE_TYPE_ICONS = {
+    # 文档类型
+    'docx': '📝', 'doc': '📝',
+    'xlsx': '📊', 'xls': '📊', 'csv': '📊',
+    'pptx': '📋', 'ppt': '📋',
+    'pdf': '📕',
+    'txt': '📄', 'md': '📄', 'rtf': '📄',
+    'zip': '📦', 'rar': '📦', '7z': '📦',
+    'html': '🌐', 'htm': '🌐',
+    'eml': '📧', 'msg': '📧',
     
-    def __init__(self, title, path, icon_path=None, content_preview="", file_type=""):
-        super().__init__()
-        
-        self.title = title
-        self.path = path
-        self.content_preview = content_preview
-        self.file_type = file_type
-        
-        # 设置项目标志 - 确保可以被选择和启用
-        self.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable)
-        
-        # 性能优化：延迟文件信息获取，只在需要时获取
-        # 先设置基本显示文本，避免同步I/O操作
-        display_text = self._create_fast_display_text(title, path, file_type)
-        self.setText(display_text)
-        
-        # 设置图标（如果有）
-        if icon_path and os.path.exists(icon_path):
-            self.setIcon(QIcon(icon_path))
-        
-        # 存储额外数据
-        self.setData(Qt.UserRole, path)
-        self.setData(Qt.UserRole + 1, content_preview)
-        
-        # 设置项目高度 - 紧凑显示（文件名+路径+时间）
-        self.setSizeHint(QSize(0, 44))  # 更紧凑协调的高度，适应两行信息
+    # 视频文件
+    'mp4': '🎬', 'avi': '🎬', 'mkv': '🎬', 'wmv': '🎬', 
+    'mov': '🎬', 'flv': '🎬', 'webm': '🎬', 'm4v': '🎬',
     
-    def _create_fast_display_text(self, title, path, file_type):
-        """创建快速显示文本（包含路径和修改时间）"""
-        # 获取文件图标
-        icon = self._get_file_icon(file_type if file_type else Path(path).suffix[1:] if path else '')
-        
-        # 获取文件信息
-        file_info = self._get_file_info(path)
-        
-        # 构建显示文本：文件名 + 路径 + 修改时间
-        if path:
-            # 显示相对路径（更简洁）
-            try:
-                # 尝试获取相对于用户目录的路径
-                from pathlib import Path
-                import os
-                home_path = Path.home()
-                file_path_obj = Path(path)
-                
-                try:
-                    # 如果在用户目录下，显示相对路径
-                    relative_path = file_path_obj.relative_to(home_path)
-                    display_path = f"~/{relative_path.parent}"
-                except ValueError:
-                    # 不在用户目录下，显示完整路径但简化
-                    display_path = str(file_path_obj.parent)
-                    # 如果路径太长，只显示最后两级目录
-                    path_parts = Path(display_path).parts
-                    if len(path_parts) > 2:
-                        display_path = f".../{path_parts[-2]}/{path_parts[-1]}"
-            except:
-                display_path = str(Path(path).parent) if path else '未知目录'
-        else:
-            display_path = '未知目录'
-        
-        # 构建多行显示文本（使用更紧凑的格式）
-        display_text = f"{icon} {title}\n    📁 {display_path} • 🕒 {file_info['modified_time']}"
-        
-        return display_text
+    # 音频文件
+    'mp3': '🎵', 'wav': '🎵', 'flac': '🎵', 'aac': '🎵',
+    'ogg': '🎵', 'wma': '🎵', 'm4a': '🎵',
     
-    def get_detailed_info(self):
-        """按需获取详细文件信息（延迟加载）"""
-        if not hasattr(self, '_detailed_info'):
-            self._detailed_info = self._get_file_info(self.path)
-        return self._detailed_info
-    
-    def _get_file_info(self, file_path):
-        """获取文件信息（延迟调用）"""
-        import os
-        from datetime import datetime
-        
-        if not file_path or not os.path.exists(file_path):
-            return {
-                'size': 0,
-                'modified_time': '未知',
-                'exists': False
-            }
-        
-        try:
-            stat = os.stat(file_path)
-            size = stat.st_size
-            modified_time = datetime.fromtimestamp(stat.st_mtime)
-            
-            return {
-                'size': size,
-                'size_str': self._format_file_size(size),
-                'modified_time': modified_time.strftime('%Y-%m-%d %H:%M'),
-                'exists': True
-            }
-        except Exception as e:
-            return {
-                'size': 0,
-                'size_str': '未知',
-                'modified_time': '未知',
-                'exists': False
-            }
+    # 图片文件
+    'jpg': '🖼️', 'jpeg': '🖼️', 'png': '🖼️', 'gif': '🖼️',
+    'bmp': '🖼️', 'tiff': '🖼️', 'webp': '🖼️', 'svg': '🖼️'
+}
+
+_file_icon_cache = {}
+
+
+def get_file_icon(file_type):
+    """根据文件类型返回对应的图标（按类型缓存）"""
+    icon = _file_icon_cache.get(file_type)
+    if icon is None:
+        icon = FILE_TYPE_ICONS.get(file_type.lower(), '📄')
+        _file_icon_cache[file_type] = icon
+    return icon
+
+
+def format_file_size(size_bytes):
+    """格式化文件大小"""
+    if size_bytes == 0:
+        return "0 B"
     
-    def _format_file_size(self, size_bytes):
-        """格式化文件大小"""
-        if size_bytes == 0:
-            return "0 B"
-        
-        size_names = ["B", "KB", "MB", "GB", "TB"]
-        import math
-        i = int(math.floor(math.log(size_bytes, 1024)))
-        p = math.pow(1024, i)
-        s = round(size_bytes / p, 2)
-        return f"{s} {size_names[i]}"
+    size_names = ["B", "KB", "MB", "GB", "TB"]
+    i = int(math.floor(math.log(size_bytes, 1024)))
+    p = math.pow(1024, i)
+    s = round(size_bytes / p, 2)
+    return f"{s} {size_names[i]}"
+
+
+def get_file_info(file_path):
+    """获取文件信息（只在结果行第一次显示时调用）"""
+    if not file_path or not os.path.exists(file_path):
+        return {
+            'size': 0,
+            'modified_time': '未知',
+            'exists': False
+        }
     
-    def _get_file_icon(self, file_type):
-        """根据文件类型返回对应的图标（缓存优化）"""
-        # 使用类级别缓存避免重复计算
-        if not hasattr(SearchResultItem, '_icon_cache'):
-            SearchResultItem._icon_cache = {
-            # 文档类型
-            'docx': '📝', 'doc': '📝',
-            'xlsx': '📊', 'xls': '📊', 'csv': '📊',
-                'pptx': '📋', 'ppt': '📋',
-                'pdf': '📕',
-            'txt': '📄', 'md': '📄', 'rtf': '📄',
-            'zip': '📦', 'rar': '📦', '7z': '📦',
-            'html': '🌐', 'htm': '🌐',
-            'eml': '📧', 'msg': '📧',
-            
-            # 视频文件
-            'mp4': '🎬', 'avi': '🎬', 'mkv': '🎬', 'wmv': '🎬', 
-            'mov': '🎬', 'flv': '🎬', 'webm': '🎬', 'm4v': '🎬',
-            
-            # 音频文件
-            'mp3': '🎵', 'wav': '🎵', 'flac': '🎵', 'aac': '🎵',
-            'ogg': '🎵', 'wma': '🎵', 'm4a': '🎵',
-            
-            # 图片文件
-            'jpg': '🖼️', 'jpeg': '🖼️', 'png': '🖼️', 'gif': '🖼️',
-            'bmp': '🖼️', 'tiff': '🖼️', 'webp': '🖼️', 'svg': '🖼️'
+    try:
+        stat = os.stat(file_path)
+        size = stat.st_size
+        modified_time = datetime.fromtimestamp(stat.st_mtime)
+        
+        return {
+            'size': size,
+            'size_str': format_file_size(size),
+            'modified_time': modified_time.strftime('%Y-%m-%d %H:%M'),
+            'exists': True
         }
-        
-        return SearchResultItem._icon_cache.get(file_type.lower(), '📄')
+    except Exception as e:
+        return {
+            'size': 0,
+            'size_str': '未知',
+            'modified_time': '未知',
+            'exists': False
+        }
+
+
+def format_display_path(path):
+    """结果第二行显示的目录（用户目录下显示相对路径，其它路径只保留最后两级）"""
+    if not path:
+        return '未知目录'
+    try:
+        file_path_obj = Path(path)
+        try:
+            # 如果在用户目录下，显示相对路径
+            relative_path = file_path_obj.relative_to(Path.home())
+            return f"~/{relative_path.parent}"
+        except ValueError:
+            # 不在用户目录下，显示完整路径但简化
+            display_path = str(file_path_obj.parent)
+            # 如果路径太长，只显示最后两级目录
+            path_parts = Path(display_path).parts
+            if len(path_parts) > 2:
+                display_path = f".../{path_parts[-2]}/{path_parts[-1]}"
+            return display_path
+    except Exception:
+        return str(Path(path).parent)
+
+
+class QuickSearchResultsModel(QAbstractListModel):
+    """快捷搜索结果模型
+
+    只保存结果字典，显示文本、文件信息在视图第一次请求该行时计算并缓存在行中；
+    渐进式结果通过 append_results() 增量插入，不重建已有行。
+    末尾可带一个不可选择的状态行（正在加载 / 超出显示数量提示）。
+    """
+
+    PathRole = Qt.UserRole
+    PreviewRole = Qt.UserRole + 1
+
+    STATUS_STYLES = {
+        'loading': (QColor("#e3f2fd"), QColor("#1976d2")),  # 浅蓝色背景，蓝色文字
+        'more': (QColor("#fff3cd"), QColor("#856404")),     # 警告色背景和文字
+    }
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._status_row = None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows) + (1 if self._status_row else 0)
+
+    def result_count(self):
+        return len(self._rows)
+
+    def result_paths(self):
+        return [row['file_path'] for row in self._rows]
+
+    def _row_at(self, row):
+        if row < len(self._rows):
+            return self._rows[row]
+        return self._status_row
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if index.row() >= len(self._rows):
+            return Qt.ItemIsEnabled  # 状态行不可选择
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._row_at(index.row())
+        if row is None:
+            return None
+        status = row.get('status')
+
+        if role == Qt.DisplayRole:
+            if status:
+                return row['text']
+            text = row.get('display_text')
+            if text is None:
+                text = self._create_display_text(row)
+                row['display_text'] = text
+            return text
+        if role == self.PathRole:
+            return None if status else row['file_path']
+        if role == self.PreviewRole:
+            return row.get('content_preview', '')
+        if role == Qt.SizeHintRole:
+            return QSize(0, RESULT_ROW_HEIGHT)
+        if status and role == Qt.BackgroundRole:
+            return self.STATUS_STYLES[status][0]
+        if status and role == Qt.ForegroundRole:
+            return self.STATUS_STYLES[status][1]
+        return None
+
+    def _create_display_text(self, row):
+        """创建显示文本（包含路径和修改时间）"""
+        file_path = row['file_path']
+        icon = get_file_icon(row['file_type'] or (Path(file_path).suffix[1:] if file_path else ''))
+        file_info = self.get_detailed_info(row)
+        # 构建多行显示文本（使用更紧凑的格式）
+        return f"{icon} {row['title']}\n    📁 {format_display_path(file_path)} • 🕒 {file_info['modified_time']}"
+
+    def get_detailed_info(self, row):
+        """按需获取详细文件信息（延迟加载）"""
+        if isinstance(row, QModelIndex):
+            row = self._row_at(row.row())
+        info = row.get('file_info')
+        if info is None:
+            info = get_file_info(row['file_path'])
+            row['file_info'] = info
+        return info
+
+    @staticmethod
+    def make_row(title, path, content_preview="", file_type=""):
+        return {
+            'title': title,
+            'file_path': path,
+            'content_preview': content_preview,
+            'file_type': file_type,
+        }
+
+    def set_results(self, rows, status_row=None):
+        """替换全部结果"""
+        self.beginResetModel()
+        self._rows = list(rows)
+        self._status_row = status_row
+        self.endResetModel()
+
+    def append_results(self, rows):
+        """在已有结果之后增量插入（状态行保持在末尾）"""
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def set_status_row(self, status_row):
+        """设置或移除末尾的状态行"""
+        position = len(self._rows)
+        if self._status_row:
+            self.beginRemoveRows(QModelIndex(), position, position)
+            self._status_row = None
+            self.endRemoveRows()
+        if status_row:
+            self.beginInsertRows(QModelIndex(), position, position)
+            self._status_row = status_row
+            self.endInsertRows()
+
+    def clear(self):
+        self.set_results([])
+
+
+class QuickSearchResultsView(QListView):
+    """快捷搜索结果视图（提供与原 QListWidget 一致的行号接口）"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.results_model = QuickSearchResultsModel(self)
+        self.setModel(self.results_model)
+        # 所有行等高，视图不需要逐行测量
+        self.setUniformItemSizes(True)
+
+    def count(self):
+        return self.results_model.rowCount()
+
+    def clear(self):
+        self.results_model.clear()
+
+    def currentRow(self):
+        index = self.currentIndex()
+        return index.row() if index.isValid() else -1
+
+    def setCurrentRow(self, row):
+        self.setCurrentIndex(self.results_model.index(row, 0))
+# --- END MODIFIED ---
 
 class QuickSearchDialog(QDialog):
     """优化版快速搜索对话框"""
     
+    # 扩展名到文件类型的映射
+    FILE_TYPE_MAP = {
+        '.txt': 'text', '.md': 'text', '.py': 'code',
+        '.doc': 'word', '.docx': 'word',
+        '.xls': 'excel', '.xlsx': 'excel',
+        '.ppt': 'powerpoint', '.pptx': 'powerpoint',
+        '.pdf': 'pdf',
+        '.jpg': 'image', '.png': 'image', '.gif': 'image',
+        '.mp4': 'video', '.avi': 'video',
+        '.mp3': 'audio', '.wav': 'audio'
+    }
+
+    # 快捷搜索显示限制 - 与主窗口保持一致（305e6f0版本优化），与控制器的max_results一致
+    DISPLAY_LIMIT = 500
+    
     # 定义信号
     search_executed = Signal(str)        # 执行搜索信号
     item_activated = Signal(str)         # 项目激活（打开）信号
@@ -464,7 +604,7 @@ class QuickSearchDialog(QDialog):
         results_layout.addWidget(self.results_header)
         
         # 结果列表
-        self.results_list = QListWidget()
+        self.results_list = QuickSearchResultsView()
         self.results_list.setObjectName("modernResultsList")
         self.results_list.setAlternatingRowColors(True)
         
@@ -477,10 +617,10 @@ class QuickSearchDialog(QDialog):
         self.results_list.setContextMenuPolicy(Qt.CustomContextMenu)
         
         # 2. 设置正确的选择模式
-        self.results_list.setSelectionMode(QListWidget.SingleSelection)
+        self.results_list.setSelectionMode(QListView.SingleSelection)
         
         # 3. 设置选择行为
-        self.results_list.setSelectionBehavior(QListWidget.SelectRows)
+        self.results_list.setSelectionBehavior(QListView.SelectRows)
         
         # 4. 设置焦点策略（移除鼠标跟踪，避免与选择冲突）
         self.results_list.setFocusPolicy(Qt.StrongFocus)
@@ -548,8 +688,8 @@ class QuickSearchDialog(QDialog):
         self.clear_button.clicked.connect(self._clear_search)
         
         # 结果列表
-        self.results_list.itemDoubleClicked.connect(self._on_item_double_clicked)
-        self.results_list.itemActivated.connect(self._on_item_activated)
+        self.results_list.doubleClicked.connect(self._on_item_double_clicked)
+        self.results_list.activated.connect(self._on_item_activated)
         self.results_list.customContextMenuRequested.connect(self._show_context_menu)
         
         # 底部按钮
@@ -1096,9 +1236,9 @@ class QuickSearchDialog(QDialog):
                     return
                 else:
                     # 结果列表有焦点：打开选中的文件
-                    current_item = self.results_list.currentItem()
-                    if current_item and hasattr(current_item, 'data') and current_item.data(Qt.UserRole):
-                        self._on_item_activated(current_item)
+                    current_index = self.results_list.currentIndex()
+                    if current_index.isValid() and current_index.data(Qt.UserRole):
+                        self._on_item_activated(current_index)
         elif event.key() == Qt.Key_Down:
             # 下箭头：移动到结果列表
             if self.results_list.count() > 0:
@@ -1144,16 +1284,16 @@ class QuickSearchDialog(QDialog):
         elif event.modifiers() == Qt.ControlModifier:
             if event.key() == Qt.Key_C:
                 # Ctrl+C: 复制选中项的路径
-                current_item = self.results_list.currentItem()
-                if current_item and hasattr(current_item, 'data'):
-                    file_path = current_item.data(Qt.UserRole)
+                current_index = self.results_list.currentIndex()
+                if current_index.isValid():
+                    file_path = current_index.data(Qt.UserRole)
                     if file_path:
                         self._copy_to_clipboard(file_path)
             elif event.key() == Qt.Key_O:
                 # Ctrl+O: 打开选中的文件
-                current_item = self.results_list.currentItem()
-                if current_item:
-                    self._on_item_activated(current_item)
+                current_index = self.results_list.currentIndex()
+                if current_index.isValid():
+                    self._on_item_activated(current_index)
             elif event.key() == Qt.Key_L:
                 # Ctrl+L: 定位到搜索框
                 self.search_line_edit.setFocus()
@@ -1166,23 +1306,23 @@ class QuickSearchDialog(QDialog):
         """搜索（兼容原接口）"""
         self._on_search_enter()
     
-    def _on_item_double_clicked(self, item):
+    def _on_item_double_clicked(self, index):
         """处理双击事件"""
-        if not item:
+        if not index.isValid():
             return
         
-        file_path = item.data(Qt.UserRole)
+        file_path = index.data(Qt.UserRole)
         if file_path:
             print(f"优化版快速搜索: 双击打开文件 '{file_path}'")
             self.open_file_signal.emit(file_path)
             self.hide()  # 打开文件后隐藏对话框
     
-    def _on_item_activated(self, item):
+    def _on_item_activated(self, index):
         """处理激活事件（回车键）"""
-        if not item:
+        if not index.isValid():
             return
         
-        file_path = item.data(Qt.UserRole)
+        file_path = index.data(Qt.UserRole)
         if file_path:
             print(f"优化版快速搜索: 激活打开文件 '{file_path}'")
             self.open_file_signal.emit(file_path)
@@ -1205,25 +1345,16 @@ class QuickSearchDialog(QDialog):
         """显示简化的右键菜单 - 突出最常用功能"""
         print(f"🖱️ 右键菜单被触发，位置: {position}")
         
-        item = self.results_list.itemAt(position)
-        if not item:
+        index = self.results_list.indexAt(position)
+        if not index.isValid():
             print("⚠️ 右键点击位置没有项目")
             return
         
-        print(f"✅ 找到项目: {type(item)}")
-        
-        # 从SearchResultItem获取文件路径
-        file_path = None
+        print(f"✅ 找到项目: 第{index.row()}行")
         
-        # 优先从SearchResultItem的属性获取
-        if isinstance(item, SearchResultItem):
-            file_path = item.path
-            print(f"📄 从SearchResultItem获取路径: {file_path}")
-        
-        # 如果没有，从Qt.UserRole获取
-        if not file_path:
-            file_path = item.data(Qt.UserRole)
-            print(f"📄 从UserRole获取路径: {file_path}")
+        # 从模型的UserRole获取文件路径（状态行没有路径）
+        file_path = index.data(Qt.UserRole)
+        print(f"📄 从UserRole获取路径: {file_path}")
         
         if not file_path:
             print("⚠️ 无法获取文件路径，跳过右键菜单")
@@ -1318,20 +1449,15 @@ class QuickSearchDialog(QDialog):
     
     def set_search_results(self, results):
         """设置搜索结果（修复版本）"""
-        import time
-        start_time = time.time()
+        start_ns = perf_trace.now()
         
         print(f"🔄 快速搜索对话框：开始更新结果，数量: {len(results) if results else 0}")
         
-        # 性能优化：批量操作，减少UI更新
-        self.results_list.setUpdatesEnabled(False)
-        self.results_list.clear()
-        
         # 隐藏搜索进度
         self._hide_search_progress()
         
         if not results:
-            self.results_list.setUpdatesEnabled(True)
+            self.results_list.clear()
             self.empty_state_label.setVisible(True)
             self.results_list.setVisible(False)
             if hasattr(self, 'results_header'):
@@ -1356,8 +1482,8 @@ class QuickSearchDialog(QDialog):
         
         actual_results = [r for r in results if not r.get('is_loading_indicator', False)]
         
-        # 快捷搜索显示限制 - 与主窗口保持一致（305e6f0版本优化）
-        display_limit = 500  # 增加显示限制，与控制器的max_results一致
+        # 快捷搜索显示限制（见 DISPLAY_LIMIT）
+        display_limit = self.DISPLAY_LIMIT
         
         # 如果有元数据，使用元数据中的总数量，否则使用实际结果数量
         if metadata:
@@ -1394,63 +1520,48 @@ class QuickSearchDialog(QDialog):
                     self.search_hint_label.setText("🔍 文件名搜索")
                     self.search_hint_label.setVisible(True)
         
-        try:
-            # 性能优化：预分配列表，批量创建项目
-            items_to_add = []
-            
-            # 添加实际搜索结果
-            for result in actual_results[:display_limit]:
-                file_path = result.get('file_path', '')
-                content_preview = result.get('content_preview', '')
-                
-                # 创建结果项（现在更快，因为避免了文件I/O）
-                item = SearchResultItem(
-                    title=self._get_file_display_name(file_path),
-                    path=file_path,
-                    content_preview=content_preview,
-                    file_type=self._get_file_type(file_path)
-                )
-                
-                # 确保文件路径正确存储在UserRole中
-                item.setData(Qt.UserRole, file_path)
-                items_to_add.append(item)
-            
-            # 如果有加载指示器，添加加载提示项
-            if has_loading_indicator:
-                loading_item = QListWidgetItem()
-                loading_item.setText("⏳ 正在搜索更多结果...\n  🔍 后台正在进行完整搜索，即将显示全部结果")
-                loading_item.setFlags(Qt.ItemFlag.ItemIsEnabled)  # 不可选择
-                loading_item.setBackground(QColor("#e3f2fd"))  # 浅蓝色背景
-                loading_item.setForeground(QColor("#1976d2"))  # 蓝色文字
-                loading_item.setSizeHint(QSize(0, 60))
-                items_to_add.append(loading_item)
-            
-            # 如果有更多结果（且不是加载状态），添加提示项
-            elif total_count > display_limit:
-                more_item = QListWidgetItem()
-                remaining = total_count - display_limit
-                more_text = f"⚠️ 搜索结果超过{display_limit}条限制\n\n📊 已找到 {total_count} 个文件，快捷搜索仅显示前 {display_limit} 个\n🖥️ 点击「主窗口搜索」或按 Ctrl+Enter 查看全部 {total_count} 个结果"
-                more_item.setText(more_text)
-                more_item.setFlags(Qt.ItemFlag.ItemIsEnabled)  # 不可选择
-                more_item.setBackground(QColor("#fff3cd"))  # 警告色背景
-                more_item.setForeground(QColor("#856404"))  # 警告色文字
-                more_item.setSizeHint(QSize(0, 80))  # 增加高度
-                items_to_add.append(more_item)
-            
-            # 批量添加到列表（减少UI更新次数）
-            for item in items_to_add:
-                self.results_list.addItem(item)
+        # --- MODIFIED: 只构建轻量的行数据交给模型，显示文本和文件信息在绘制时才生成 ---
+        model = self.results_list.results_model
+        rows = [
+            model.make_row(
+                title=self._get_file_display_name(result.get('file_path', '')),
+                path=result.get('file_path', ''),
+                content_preview=result.get('content_preview', ''),
+                file_type=self._get_file_type(result.get('file_path', ''))
+            )
+            for result in actual_results[:display_limit]
+        ]
+        
+        # 如果有加载指示器，添加加载提示行；如果有更多结果（且不是加载状态），添加提示行
+        status_row = None
+        if has_loading_indicator:
+            status_row = {
+                'status': 'loading',
+                'text': "⏳ 正在搜索更多结果...\n  🔍 后台正在进行完整搜索，即将显示全部结果",
+            }
+        elif total_count > display_limit:
+            status_row = {
+                'status': 'more',
+                'text': f"⚠️ 搜索结果超过{display_limit}条限制\n\n📊 已找到 {total_count} 个文件，快捷搜索仅显示前 {display_limit} 个\n🖥️ 点击「主窗口搜索」或按 Ctrl+Enter 查看全部 {total_count} 个结果",
+            }
         
-        finally:
-            # 重新启用UI更新
-            self.results_list.setUpdatesEnabled(True)
+        # 渐进式结果：已显示的结果是新结果的前缀时只追加新增的行，保留已生成的行数据和当前选择
+        current_paths = model.result_paths()
+        appended = bool(current_paths) and [row['file_path'] for row in rows[:len(current_paths)]] == current_paths
+        if appended:
+            model.append_results(rows[len(current_paths):])
+            model.set_status_row(status_row)
+        else:
+            model.set_results(rows, status_row)
         
         # 选中第一个结果（如果不是加载指示器）
-        if self.results_list.count() > 0 and not has_loading_indicator:
+        if model.result_count() > 0 and not has_loading_indicator and self.results_list.currentRow() < 0:
             self.results_list.setCurrentRow(0)
+        # --- END MODIFIED ---
         
         # 显示搜索统计
-        elapsed_ms = int((time.time() - start_time) * 1000)
+        perf_trace.record("render.quick_search", start_ns, rows=len(rows), appended=appended)
+        elapsed_ms = (perf_trace.now() - start_ns) // 1_000_000
         self._show_search_stats(total_count, elapsed_ms, has_loading_indicator)
         
         # 更新状态
@@ -1478,10 +1589,11 @@ class QuickSearchDialog(QDialog):
             # 如果搜索结果没有时间信息，从文件系统获取
             if mtime <= 0:
                 file_path = result.get('file_path', result.get('path', ''))
-                if file_path and os.path.exists(file_path):
+                if file_path:
+                    # 一次 stat 同时完成存在性检查和取修改时间
                     try:
-                        mtime = os.path.getmtime(file_path)
-                    except (OSError, FileNotFoundError):
+                        mtime = os.stat(file_path).st_mtime
+                    except (OSError, ValueError):
                         mtime = 0
             
             return mtime
@@ -1514,17 +1626,7 @@ class QuickSearchDialog(QDialog):
             return "unknown"
         
         ext = os.path.splitext(file_path)[1].lower()
-        type_map = {
-            '.txt': 'text', '.md': 'text', '.py': 'code',
-            '.doc': 'word', '.docx': 'word',
-            '.xls': 'excel', '.xlsx': 'excel',
-            '.ppt': 'powerpoint', '.pptx': 'powerpoint',
-            '.pdf': 'pdf',
-            '.jpg': 'image', '.png': 'image', '.gif': 'image',
-            '.mp4': 'video', '.avi': 'video',
-            '.mp3': 'audio', '.wav': 'audio'
-        }
-        return type_map.get(ext, 'file')
+        return self.FILE_TYPE_MAP.get(ext, 'file')
     
     def _get_theme_colors(self):
         """获取当前主题的颜色配置"""
@@ -1674,7 +1776,7 @@ class QuickSearchDialog(QDialog):
         """刷新结果显示以应用新主题"""
         # 触发重新渲染
         current_row = self.results_list.currentRow()
-        self.results_list.update()
+        self.results_list.viewport().update()
         if current_row >= 0:
             self.results_list.setCurrentRow(current_row)
     
@@ -1736,7 +1838,7 @@ class QuickSearchDialog(QDialog):
         results_layout.addWidget(self.results_header)
         
         # 结果列表
-        self.results_list = QListWidget()
+        self.results_list = QuickSearchResultsView()
         self.results_list.setObjectName("modernResultsList")
         self.results_list.setAlternatingRowColors(True)
         self.results_list.setContextMenuPolicy(Qt.CustomContextMenu)
@@ -12,6 +12,8 @@ from path_utils import normalize_path_for_display, normalize_path_for_index, Pat
 
 # --- 导入统一主题管理工具 ---
 from theme_manager import ThemeManager
+import theme_resources  # 进程级主题样式表/图标缓存
+import perf_trace  # 索引与搜索热点路径的跟踪段
 # ------------------------
 
 import sys
@@ -39,8 +41,8 @@ from PySide6.QtWidgets import (
     QGridLayout, QMenu, # 添加QMenu用于右键菜单
     QListView, QStyledItemDelegate, QStackedWidget, QStyle, # 虚拟滚动所需组件
 )
-from PySide6.QtCore import Qt, QObject, QThread, Signal, Slot, QUrl, QSettings, QDate, QTimer, QSize, QDir, QModelIndex, QRect, QAbstractListModel # Added QSize, QDir, QModelIndex, QRect, QAbstractListModel 
-from PySide6.QtGui import QDesktopServices, QAction, QIntValidator, QShortcut, QKeySequence, QIcon, QColor, QStandardItemModel, QStandardItem, QTextDocument, QTextCursor, QPainter, QCursor # Added QStandardItemModel and QStandardItem, QTextDocument, QPainter, QCursor
+from PySide6.QtCore import Qt, QObject, QThread, Signal, Slot, QUrl, QSettings, QDate, QTimer, QSize, QDir, QModelIndex, QRect, QAbstractListModel, QAbstractItemModel, QSortFilterProxyModel # Added QSize, QDir, QModelIndex, QRect, QAbstractListModel 
+from PySide6.QtGui import QDesktopServices, QAction, QIntValidator, QShortcut, QKeySequence, QColor, QTextDocument, QTextCursor, QPainter, QCursor # Added QTextDocument, QPainter, QCursor
 import html  # Import html module for escaping
 
 # --- ADDED: Network and Version Comparison Imports ---
@@ -54,6 +56,9 @@ import document_search  # Uncommented backend import
 import traceback  # Keep for worker error reporting
 import json  # Needed for structure map parsing
 import functools # ADDED for LRU cache
+from collections import OrderedDict  # 结果列表渲染缓存（LRU）
+from dataclasses import dataclass  # 结果后处理快照
+import types
 import os  # Added for os.path.normpath
 import time # Added for sleep
 import datetime
@@ -403,8 +408,7 @@ def create_highlight_style(theme_colors):
     """
 
 # --- Constants ---
-ORGANIZATION_NAME = "YourOrganizationName"  # Replace with your actual org name or identifier
-APPLICATION_NAME = "DocumentSearchToolPySide"
+from app_identity import ORGANIZATION_NAME, APPLICATION_NAME  # 托盘进程无需导入本模块即可读取设置
 CONFIG_FILE = 'search_config.ini'  # Keep for reference, but QSettings handles location
 DEFAULT_DOC_DIR = ""
 
@@ -423,38 +427,69 @@ CURRENT_VERSION = "1.0.0"  # <--- Update this for each new release!
 UPDATE_INFO_URL = "https://azariasy.github.io/-wen-zhi-sou-website/latest_version.json" # URL to your version info file
 # -------------------------
 
-# === 虚拟滚动相关类实现 ===
-class VirtualResultsModel(QAbstractListModel):
-    """虚拟滚动结果模型，完全兼容传统模式的文件分组和章节折叠功能"""
-    
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.results = []
-        self.display_items = []  # 存储显示项目列表（文件组/章节组/内容项）
-        self.current_theme = "现代蓝"
-        self.parent_window = parent  # 存储父窗口引用以访问collapse_states
-        
-    def rowCount(self, parent=QModelIndex()):
-        """返回显示项目总数"""
-        return len(self.display_items)
-        
-    def data(self, index, role=Qt.DisplayRole):
-        """返回指定索引的数据"""
-        if not index.isValid() or index.row() >= len(self.display_items):
-            return None
-            
-        if role == Qt.DisplayRole:
-            item = self.display_items[index.row()]
-            return self._generate_item_html(item, index.row())
-        elif role == Qt.UserRole:
-            # 返回原始项目数据
-            return self.display_items[index.row()]
-        
+# --- ADDED: 结果过滤键（类型/文件夹），按路径缓存，过滤时不再重复解析路径 ---
+RESULT_TYPE_EXTENSIONS = [
+    '.pdf', '.docx', '.txt', '.xlsx', '.pptx', '.eml', '.msg', '.html', '.htm', '.rtf', '.md',
+    '.mp4', '.mkv', '.avi', '.wmv', '.mov', '.flv', '.webm', '.m4v',  # 视频
+    '.mp3', '.wav', '.flac', '.aac', '.ogg', '.wma', '.m4a',         # 音频
+    '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp', '.svg'  # 图片
+]
+RESULT_TYPE_ALIASES = {'htm': 'html', 'jpeg': 'jpg'}
+
+
+@functools.lru_cache(maxsize=65536)
+def get_result_type_key(file_path):
+    """返回结果的文件类型过滤键（不带点，htm/jpeg 归并为 html/jpg），无法识别时返回 None"""
+    if not file_path:
         return None
-    
-    def _process_results_for_display(self, results):
-        """将原始搜索结果处理成显示项目列表，完全兼容传统模式逻辑"""
-        self.beginResetModel()
+    lower_path = file_path.lower()
+    for ext in RESULT_TYPE_EXTENSIONS:
+        if lower_path.endswith(ext):
+            return RESULT_TYPE_ALIASES.get(ext[1:], ext[1:])
+    return None
+
+
+@functools.lru_cache(maxsize=65536)
+def get_result_folder_key(file_path):
+    """返回结果所在文件夹的标准化显示路径（存档成员取存档文件所在文件夹）"""
+    if not file_path:
+        return None
+    if '::' in file_path:
+        file_path = file_path.split('::', 1)[0]
+    return normalize_path_for_display(str(Path(file_path).parent))
+
+
+def folder_key_matches(folder_key, normalized_filter_folder):
+    """判断文件夹过滤键是否属于所选文件夹（含子文件夹）"""
+    if not folder_key:
+        return False
+    if normalized_filter_folder.endswith(':\\'):  # 根目录情况
+        # 对于D:\这样的根目录，直接检查文件路径是否以此开头
+        return folder_key.startswith(normalized_filter_folder) or folder_key == normalized_filter_folder[:-1]
+    return (folder_key == normalized_filter_folder or
+            folder_key.startswith(normalized_filter_folder + os.path.sep))
+# --- END ADDED ---
+
+# --- ADDED: 显示项构建（纯Python，不依赖Qt对象，可在后处理线程中运行） ---
+class DisplayItemsBuilder:
+    """把搜索结果转换为虚拟滚动显示项列表
+
+    使用者需提供 parent_window（读取 collapse_states / group_collapse_states /
+    last_search_scope / last_search_text）和 display_items 两个属性。
+    VirtualResultsModel 直接继承本类；后处理线程用 for_state() 创建独立实例，
+    parent_window 为界面状态的副本。
+    """
+
+    @classmethod
+    def for_state(cls, parent_window):
+        """创建独立的构建器，parent_window 可以是任何带有上述属性的对象"""
+        builder = cls()
+        builder.parent_window = parent_window
+        builder.display_items = []
+        return builder
+
+    def build_display_items(self, results):
+        """将原始搜索结果处理成显示项目列表（写入 self.display_items），完全兼容传统模式逻辑"""
         self.display_items = []
         
         if not results:
@@ -475,7 +510,6 @@ class VirtualResultsModel(QAbstractListModel):
                     'type': 'welcome_state',
                     'content': '💡 请输入搜索词开始搜索文档'
                 })
-            self.endResetModel()
             return
             
         try:
@@ -494,12 +528,9 @@ class VirtualResultsModel(QAbstractListModel):
                 'type': 'error',
                 'content': f'处理搜索结果时出错: {e}'
             })
-        
-        self.endResetModel()
     
-    def _process_grouped_results_for_display(self, grouped_results):
-        """处理分组结果为虚拟滚动显示项目"""
-        self.beginResetModel()
+    def build_grouped_display_items(self, grouped_results):
+        """将分组结果处理成显示项目列表（写入 self.display_items）"""
         self.display_items = []
         
         if not grouped_results:
@@ -520,7 +551,6 @@ class VirtualResultsModel(QAbstractListModel):
                     'type': 'welcome_state',
                     'content': '💡 请输入搜索词开始搜索文档'
                 })
-            self.endResetModel()
             return
         
         # 初始化分组折叠状态（如果不存在）
@@ -558,8 +588,6 @@ class VirtualResultsModel(QAbstractListModel):
                 else:
                     # 全文搜索：完整显示
                     self._process_fulltext_group_results(group_results)
-        
-        self.endResetModel()
     
     def _process_fulltext_group_results(self, results):
         """处理全文搜索的分组结果"""
@@ -638,7 +666,7 @@ class VirtualResultsModel(QAbstractListModel):
         if self.parent_window and hasattr(self.parent_window, 'collapse_states'):
             return self.parent_window.collapse_states.get(key, False)
         return False
-    
+
     def _process_filename_results(self, results):
         """处理文件名搜索结果"""
         processed_paths = set()
@@ -663,11 +691,20 @@ class VirtualResultsModel(QAbstractListModel):
     
     def _process_fulltext_results(self, results):
         """处理全文搜索结果 - 完全兼容传统模式的文件分组和章节折叠"""
-        last_file_path = None
-        last_displayed_heading = None
-        file_group_counter = 0
+        self.display_items.extend(self._build_fulltext_items(results, self._new_fulltext_state()))
+
+    def _new_fulltext_state(self):
+        """全文结果分组的游标状态，流式追加时跨批次保留"""
+        return {'last_file_path': None, 'last_displayed_heading': None, 'file_group_counter': 0, 'next_index': 0}
+
+    def _build_fulltext_items(self, results, state):
+        """根据分组游标状态把全文结果转换为显示项（会更新state）"""
+        items = []
+        last_file_path = state['last_file_path']
+        last_displayed_heading = state['last_displayed_heading']
+        file_group_counter = state['file_group_counter']
         
-        for i, result in enumerate(results):
+        for i, result in enumerate(results, start=state['next_index']):
             file_path = result.get('file_path', '(未知文件)')
             original_heading = result.get('heading', '(无章节标题)')
             
@@ -688,7 +725,7 @@ class VirtualResultsModel(QAbstractListModel):
                     'is_collapsed': self.parent_window.collapse_states.get(file_key, False) if self.parent_window else False,
                     'result': result
                 }
-                self.display_items.append(file_item)
+                items.append(file_item)
                 
                 last_displayed_heading = None
                 last_file_path = file_path
@@ -712,7 +749,7 @@ class VirtualResultsModel(QAbstractListModel):
                         'is_collapsed': is_chapter_collapsed,
                         'result': result
                     }
-                    self.display_items.append(chapter_item)
+                    items.append(chapter_item)
                     last_displayed_heading = original_heading
                 else:
                     last_displayed_heading = None
@@ -731,8 +768,298 @@ class VirtualResultsModel(QAbstractListModel):
                         'result': result,
                         'index': i
                     }
-                    self.display_items.append(content_item)
+                    items.append(content_item)
+
+        state.update(last_file_path=last_file_path, last_displayed_heading=last_displayed_heading,
+                     file_group_counter=file_group_counter, next_index=state['next_index'] + len(results))
+        return items
+# --- END ADDED ---
+
+# --- ADDED: 结果后处理（独立线程） ---
+def collect_result_folder_ids(results):
+    """按文件夹收集结果编号（结果在列表中的下标）
+
+    Returns:
+        dict: {标准化文件夹路径: [结果编号, ...]}，按文件夹路径排序
+    """
+    folder_ids = {}
+    for result_id, result in enumerate(results):
+        folder_key = get_result_folder_key(result.get('file_path', ''))
+        if folder_key is not None:
+            folder_ids.setdefault(folder_key, []).append(result_id)
+    return dict(sorted(folder_ids.items()))
+
+
+@dataclass(frozen=True)
+class ResultsViewSnapshot:
+    """后处理线程生成的结果视图快照，交给界面线程后不再修改"""
+    generation: int
+    results: list            # 模型持有的结果（非分组视图为全部结果，由代理模型过滤）
+    filtered_results: list   # 按类型/文件夹过滤后的结果（即 MainWindow.search_results）
+    display_items: tuple     # 构建好的显示项
+    holds_all_results: bool  # 模型是否持有全部结果
+    allowed_types: tuple
+    filter_folder: str | None
+    source_results: list        # 文件夹树结果编号对应的原始结果列表
+    folder_tree: object | None  # 文件夹前缀树（FolderPrefixTree），不需要重建文件夹树时为 None
+
+
+def build_results_snapshot(generation, request):
+    """
+    把原始搜索结果转换为可直接显示的快照（纯Python，在后处理线程中运行）
+
+    Args:
+        generation: 请求代数，界面线程据此丢弃过期快照
+        request: dict，包含 results, allowed_types, filter_folder, group_mode, group_func,
+                 state（界面状态副本，见 DisplayItemsBuilder）, build_folder_tree
+    """
+    results = request['results']
+    allowed_types = tuple(request.get('allowed_types') or ())
+    filter_folder = request.get('filter_folder')
+
+    filtered_results = results
+    if allowed_types:
+        allowed = set(allowed_types)
+        filtered_results = [result for result in filtered_results
+                            if get_result_type_key(result.get('file_path', '')) in allowed]
+    if filter_folder:
+        normalized_filter_folder = normalize_path_for_display(filter_folder)
+        filtered_results = [result for result in filtered_results
+                            if folder_key_matches(get_result_folder_key(result.get('file_path', '')),
+                                                  normalized_filter_folder)]
+    if filtered_results is results:
+        filtered_results = list(results)
+
+    builder = DisplayItemsBuilder.for_state(request['state'])
+    group_mode = request.get('group_mode')
+    holds_all_results = False
+    if group_mode:
+        model_results = filtered_results
+        builder.build_grouped_display_items(request['group_func'](filtered_results, group_mode))
+    elif not filtered_results:
+        model_results = filtered_results
+        builder.build_display_items(filtered_results)
+    else:
+        model_results = results
+        holds_all_results = True
+        builder.build_display_items(results)
+
+    folder_tree = FolderPrefixTree(collect_result_folder_ids(results)) if request.get('build_folder_tree') else None
+    return ResultsViewSnapshot(
+        generation=generation,
+        results=model_results,
+        filtered_results=filtered_results,
+        display_items=tuple(builder.display_items),
+        holds_all_results=holds_all_results,
+        allowed_types=allowed_types,
+        filter_folder=filter_folder,
+        source_results=results,
+        folder_tree=folder_tree,
+    )
+
+
+class ResultsPostProcessor(QObject):
+    """搜索结果后处理工作对象（运行在独立线程）
+
+    过滤、分组、显示项构建和文件夹收集都在这里完成，界面线程只做一次模型替换。
+    新请求到来后，排队中的旧请求直接跳过。
+    """
+    snapshotReady = Signal(int, object)  # generation, ResultsViewSnapshot 或 None（出错）
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.latest_generation = 0  # 由界面线程更新
+
+    @Slot(int, object)
+    def process(self, generation, request):
+        if generation != self.latest_generation:
+            return
+        try:
+            with perf_trace.span("postprocess", results=len(request['results'])):
+                snapshot = build_results_snapshot(generation, request)
+        except Exception as e:
+            print(f"结果后处理出错: {e}")
+            traceback.print_exc()
+            snapshot = None
+        self.snapshotReady.emit(generation, snapshot)
+# --- END ADDED ---
+
+# === 虚拟滚动相关类实现 ===
+class VirtualResultsModel(DisplayItemsBuilder, QAbstractListModel):
+    """虚拟滚动结果模型，完全兼容传统模式的文件分组和章节折叠功能"""
+    
+    # --- ADDED: 行HTML缓存容量（LRU） ---
+    HTML_CACHE_SIZE = 2000
+    # --- END ADDED ---
     
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.results = []
+        self.display_items = []  # 存储显示项目列表（文件组/章节组/内容项）
+        self.current_theme = "现代蓝"
+        self.parent_window = parent  # 存储父窗口引用以访问collapse_states
+        # --- ADDED: 按 (行, 主题) 缓存生成的HTML，模型重置（含折叠切换）或主题变化时失效 ---
+        self._html_cache = OrderedDict()
+        self.render_generation = 0  # 委托据此丢弃已排版的文档
+        self.modelAboutToBeReset.connect(self._invalidate_render_cache)
+        # --- END ADDED ---
+        
+    def rowCount(self, parent=QModelIndex()):
+        """返回显示项目总数"""
+        return len(self.display_items)
+        
+    # --- ADDED: 渲染缓存 ---
+    def _invalidate_render_cache(self):
+        """清空HTML缓存并递增渲染代数"""
+        self._html_cache.clear()
+        self.render_generation += 1
+
+    def _cached_item_html(self, row):
+        """返回行的HTML，命中缓存时不重新生成"""
+        key = (row, self.current_theme)
+        html_content = self._html_cache.get(key)
+        if html_content is not None:
+            self._html_cache.move_to_end(key)
+            return html_content
+        html_content = self._generate_item_html(self.display_items[row], row)
+        self._html_cache[key] = html_content
+        if len(self._html_cache) > self.HTML_CACHE_SIZE:
+            self._html_cache.popitem(last=False)
+        return html_content
+    # --- END ADDED ---
+        
+    def data(self, index, role=Qt.DisplayRole):
+        """返回指定索引的数据"""
+        if not index.isValid() or index.row() >= len(self.display_items):
+            return None
+            
+        if role == Qt.DisplayRole:
+            # --- MODIFIED: 使用行HTML缓存 ---
+            return self._cached_item_html(index.row())
+            # --- END MODIFIED ---
+        elif role == Qt.UserRole:
+            # 返回原始项目数据
+            return self.display_items[index.row()]
+        
+        return None
+    
+    def _process_results_for_display(self, results):
+        """将原始搜索结果处理成显示项目列表，完全兼容传统模式逻辑"""
+        self.beginResetModel()
+        self.build_display_items(results)
+        self.endResetModel()
+    
+    def _process_grouped_results_for_display(self, grouped_results):
+        """处理分组结果为虚拟滚动显示项目"""
+        self.beginResetModel()
+        self.build_grouped_display_items(grouped_results)
+        self.endResetModel()
+    
+    # --- ADDED: 后处理快照 ---
+    def apply_snapshot(self, snapshot):
+        """一次性替换为后处理线程构建好的显示项"""
+        self.beginResetModel()
+        self.results = snapshot.results
+        self.display_items = list(snapshot.display_items)
+        self.endResetModel()
+    # --- END ADDED ---
+    
+    # --- ADDED: 就地折叠/展开（只删除或插入该分组的行） ---
+    HEADER_KEY_FIELDS = {'group_header': 'group_key', 'file_group': 'file_key', 'chapter_group': 'chapter_key'}
+    ITEM_LEVELS = {'title': 0, 'group_header': 0, 'file_group': 1, 'chapter_group': 2}
+
+    def _item_level(self, item):
+        return self.ITEM_LEVELS.get(item.get('type'), 3)
+
+    def _group_end(self, row):
+        """返回分组头部 row 的子行结束位置（不含）"""
+        level = self._item_level(self.display_items[row])
+        end = row + 1
+        while end < len(self.display_items) and self._item_level(self.display_items[end]) > level:
+            end += 1
+        return end
+
+    def toggle_collapse(self, key, collapsed):
+        """
+        就地切换分组的折叠状态
+
+        折叠时删除分组的子行并暂存在头部项中，展开时原样插回，其它行不受影响。
+        头部在构建时就已折叠（没有暂存的子行）时无法就地展开，返回 False，由调用方重建模型。
+
+        Returns:
+            bool: 是否已就地处理
+        """
+        rows = [row for row, item in enumerate(self.display_items)
+                if item.get(self.HEADER_KEY_FIELDS.get(item.get('type'), ''), None) == key]
+        if not rows:
+            return False
+        if not collapsed and any('_collapsed_children' not in self.display_items[row] for row in rows
+                                 if self.display_items[row].get('is_collapsed')):
+            return False
+
+        # 行号会移动，行缓存整体失效（只有可见行会重新生成）
+        self._invalidate_render_cache()
+        # 从后往前处理，前面头部的行号不受影响
+        for row in reversed(rows):
+            item = self.display_items[row]
+            if bool(item.get('is_collapsed')) == collapsed:
+                continue
+            if collapsed:
+                end = self._group_end(row)
+                item['_collapsed_children'] = self.display_items[row + 1:end]
+                if end > row + 1:
+                    self.beginRemoveRows(QModelIndex(), row + 1, end - 1)
+                    del self.display_items[row + 1:end]
+                    self.endRemoveRows()
+            else:
+                children = item.pop('_collapsed_children')
+                if children:
+                    self.beginInsertRows(QModelIndex(), row + 1, row + len(children))
+                    self.display_items[row + 1:row + 1] = children
+                    self.endInsertRows()
+            item['is_collapsed'] = collapsed
+            self.dataChanged.emit(self.index(row), self.index(row))
+        return True
+    # --- END ADDED ---
+    
+    # --- ADDED: 流式结果追加（只插入新增行，不重置模型） ---
+    def begin_streaming(self):
+        """开始接收新一轮搜索的流式结果批次"""
+        self.beginResetModel()
+        self.results = []
+        self.display_items = []
+        self._stream_state = self._new_fulltext_state()
+        self._stream_seen_paths = set()
+        self.endResetModel()
+
+    def append_results(self, batch):
+        """将一批结果追加到列表末尾，使用beginInsertRows增量更新视图"""
+        if not batch:
+            return
+        if not hasattr(self, '_stream_state'):
+            self._stream_state = self._new_fulltext_state()
+            self._stream_seen_paths = set()
+
+        if self._is_filename_search():
+            new_items = []
+            for result in batch:
+                file_path = result.get('file_path', '(未知文件)')
+                if file_path in self._stream_seen_paths:
+                    continue
+                self._stream_seen_paths.add(file_path)
+                new_items.append({'type': 'filename_result', 'file_path': file_path, 'result': result})
+        else:
+            new_items = self._build_fulltext_items(batch, self._stream_state)
+
+        self.results.extend(batch)
+        if not new_items:
+            return
+        first_row = len(self.display_items)
+        self.beginInsertRows(QModelIndex(), first_row, first_row + len(new_items) - 1)
+        self.display_items.extend(new_items)
+        self.endInsertRows()
+    # -------------------------------------------------------
+
     def _generate_item_html(self, item, index):
         """生成显示项的HTML内容"""
         try:
@@ -1001,7 +1328,11 @@ class VirtualResultsModel(QAbstractListModel):
     
     def set_theme(self, theme_name):
         """设置主题"""
+        # --- MODIFIED: 主题变化时丢弃旧主题的渲染缓存 ---
+        if theme_name != self.current_theme:
+            self._invalidate_render_cache()
         self.current_theme = theme_name
+        # --- END MODIFIED ---
         # 触发视图更新
         if self.rowCount() > 0:
             self.dataChanged.emit(self.index(0), self.index(self.rowCount() - 1))
@@ -1346,26 +1677,164 @@ class VirtualResultsModel(QAbstractListModel):
 
 
 # === 虚拟滚动相关类实现 ===
+# --- ADDED: 结果过滤代理模型 ---
+class ResultsFilterProxyModel(QSortFilterProxyModel):
+    """按文件类型/文件夹过滤虚拟滚动结果的代理模型
+
+    过滤键按路径预先计算并缓存在显示项中，切换过滤条件时只需逐行比较键，
+    视图只收到被隐藏或重新显示的行的增删通知，不再重置整个模型。
+    """
+
+    ALWAYS_VISIBLE_TYPES = ('title', 'group_header', 'empty_state', 'welcome_state', 'error')
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.allowed_types = None       # None 表示不按类型过滤
+        self.filter_folder = None       # 标准化后的文件夹路径，None 表示不按文件夹过滤
+        self._filter_generation = 0
+
+    @property
+    def render_generation(self):
+        """委托据此判断行号映射是否变化"""
+        source = self.sourceModel()
+        return (getattr(source, 'render_generation', None), self._filter_generation)
+
+    def set_filter(self, allowed_types=None, filter_folder=None):
+        """设置过滤条件，条件未变化时不做任何事"""
+        allowed_types = frozenset(allowed_types) if allowed_types else None
+        filter_folder = normalize_path_for_display(filter_folder) if filter_folder else None
+        if allowed_types == self.allowed_types and filter_folder == self.filter_folder:
+            return
+        self.allowed_types = allowed_types
+        self.filter_folder = filter_folder
+        self._filter_generation += 1
+        self.invalidateFilter()
+
+    @staticmethod
+    def _item_filter_keys(item):
+        keys = item.get('_filter_keys')
+        if keys is None:
+            file_path = item.get('file_path') or item.get('result', {}).get('file_path', '')
+            keys = (get_result_type_key(file_path), get_result_folder_key(file_path))
+            item['_filter_keys'] = keys
+        return keys
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.allowed_types is None and self.filter_folder is None:
+            return True
+        item = self.sourceModel().display_items[source_row]
+        if item.get('type') in self.ALWAYS_VISIBLE_TYPES:
+            return True
+        type_key, folder_key = self._item_filter_keys(item)
+        if self.allowed_types is not None and type_key not in self.allowed_types:
+            return False
+        if self.filter_folder is not None and not folder_key_matches(folder_key, self.filter_folder):
+            return False
+        return True
+# --- END ADDED ---
+
+
 class HtmlItemDelegate(QStyledItemDelegate):
     """HTML内容委托，用于在列表视图中渲染HTML"""
     
+    # --- ADDED: 已排版文档缓存容量（LRU） ---
+    DOCUMENT_CACHE_SIZE = 500
+    # --- END ADDED ---
+    
+    # --- ADDED: 未测量行的估计高度（像素），行首次绘制时按实际排版高度校正 ---
+    ESTIMATED_ROW_HEIGHTS = {
+        'file_group': 54,
+        'chapter_group': 30,
+        'group_header': 40,
+        'filename_result': 72,
+        'content': 80,
+        'title': 25,
+    }
+    DEFAULT_ROW_HEIGHT = 60
+    # --- END ADDED ---
+    
     def __init__(self, parent=None):
         super().__init__(parent)
+        # --- ADDED: 按 (行, 宽度) 缓存已排版的QTextDocument，滚动时不再重复解析HTML ---
+        self._document_cache = OrderedDict()
+        self._cache_generation = None
+        # --- END ADDED ---
+        # --- ADDED: 已绘制行的实际高度 {行: 高度}，对应 _measured_width 宽度 ---
+        self._measured_heights = {}
+        self._measured_width = None
+        # --- END ADDED ---
+        
+    # --- ADDED: 文档缓存 ---
+    def _check_generation(self, index):
+        """模型重置或主题变化后丢弃已排版文档和已测量高度"""
+        generation = getattr(index.model(), 'render_generation', None)
+        if generation != self._cache_generation:
+            self._document_cache.clear()
+            self._measured_heights.clear()
+            self._cache_generation = generation
+
+    def _get_document(self, index, html_content, width):
+        """返回按指定宽度排版好的文档；HTML变化（主题、折叠）或模型重置后重新排版"""
+        self._check_generation(index)
+        key = (index.row(), width)
+        cached = self._document_cache.get(key)
+        if cached is not None and cached[0] == html_content:
+            self._document_cache.move_to_end(key)
+            return cached[1]
+        document = QTextDocument()
+        document.setHtml(html_content)
+        document.setTextWidth(width)
+        self._document_cache[key] = (html_content, document)
+        if len(self._document_cache) > self.DOCUMENT_CACHE_SIZE:
+            self._document_cache.popitem(last=False)
+        return document
+
+    def clear_cache(self):
+        """清空已排版文档缓存"""
+        self._document_cache.clear()
+        self._measured_heights.clear()
+
+    def _record_height(self, index, width, height):
+        """记录行的实际高度；与当前尺寸提示不同时通知视图重新布局"""
+        if width != self._measured_width:
+            # 宽度变化后所有行的换行都可能不同，旧测量值作废
+            self._measured_heights.clear()
+            self._measured_width = width
+        row = index.row()
+        if self._measured_heights.get(row) == height:
+            return
+        previous = self._measured_heights.get(row, self._estimated_height(index))
+        self._measured_heights[row] = height
+        if previous != height:
+            # 视图收到信号后延迟重新布局，同一轮事件中的多次校正只布局一次
+            self.sizeHintChanged.emit(index)
+
+    def _estimated_height(self, index):
+        item = index.data(Qt.UserRole)
+        item_type = item.get('type') if isinstance(item, dict) else None
+        return self.ESTIMATED_ROW_HEIGHTS.get(item_type, self.DEFAULT_ROW_HEIGHT)
+    # --- END ADDED ---
         
     def paint(self, painter, option, index):
         """绘制HTML内容"""
         try:
             html_content = index.data(Qt.DisplayRole)
             if not html_content:
+                # --- ADDED: 空内容行同样校正估计高度 ---
+                self._record_height(index, option.rect.width(), super().sizeHint(option, index).height())
+                # --- END ADDED ---
                 super().paint(painter, option, index)
                 return
                 
-            # 创建QTextDocument来渲染HTML
-            document = QTextDocument()
-            document.setHtml(html_content)
-            document.setTextWidth(option.rect.width())
+            # --- MODIFIED: 复用缓存中已排版的文档，并用实际高度校正估计高度 ---
+            document = self._get_document(index, html_content, option.rect.width())
+            self._record_height(index, option.rect.width(), int(document.size().height()))
+            # --- END MODIFIED ---
             
             painter.save()
+            # --- ADDED: 校正前行高可能不足，裁剪到行区域避免覆盖相邻行 ---
+            painter.setClipRect(option.rect)
+            # --- END ADDED ---
             painter.translate(option.rect.topLeft())
             
             # 如果项被选中，绘制选中背景
@@ -1384,15 +1853,14 @@ class HtmlItemDelegate(QStyledItemDelegate):
     def sizeHint(self, option, index):
         """返回项的大小提示"""
         try:
-            html_content = index.data(Qt.DisplayRole)
-            if not html_content:
-                return super().sizeHint(option, index)
-                
-            document = QTextDocument()
-            document.setHtml(html_content)
-            document.setTextWidth(option.rect.width() if option.rect.width() > 0 else 400)
-            
-            return QSize(int(document.idealWidth()), int(document.size().height()))
+            # --- MODIFIED: 不再为尺寸提示排版HTML，已绘制的行返回实测高度，其余返回估计高度 ---
+            self._check_generation(index)
+            height = self._measured_heights.get(index.row())
+            if height is None:
+                height = self._estimated_height(index)
+            # 列表模式下行宽自动撑满视口，宽度只需给出最小值，避免出现水平滚动条
+            return QSize(1, height)
+            # --- END MODIFIED ---
             
         except Exception as e:
             print(f"Error calculating size hint: {e}")
@@ -1413,6 +1881,13 @@ class VirtualResultsView(QListView):
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         
+        # --- ADDED: 分批布局 + 估计行高，模型重置后不再逐行排版HTML ---
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(200)
+        # 宽度变化时重新布局，行高按新宽度重新测量
+        self.setResizeMode(QListView.Adjust)
+        # --- END ADDED ---
+        
         # 启用鼠标跟踪以支持链接悬停
         self.setMouseTracking(True)
         self.viewport().setMouseTracking(True)
@@ -1559,9 +2034,43 @@ class VirtualResultsView(QListView):
             select_action = menu.addAction("✏️ 文本选择...")
             select_action.triggered.connect(lambda: self._show_text_selection_dialog(html_content))
 
+            # --- ADDED: 结果只包含摘要片段时，提供按需读取完整段落的入口 ---
+            item = index.data(Qt.UserRole) or {}
+            result = item.get('result') or {}
+            if item.get('type') == 'content' and result.get('snippet_truncated'):
+                full_block_action = menu.addAction("📖 查看完整段落...")
+                full_block_action.triggered.connect(lambda: self._show_full_block_text(result))
+            # -------------------------------------------------------------
+
         # 显示菜单
         menu.exec(self.mapToGlobal(position))
 
+    # --- ADDED: 按需读取并显示完整段落 ---
+    def _show_full_block_text(self, result):
+        """根据结果中的块引用，从索引读取完整段落并在文本选择对话框中显示"""
+        import html
+        main_window = self.window()
+        settings = getattr(main_window, 'settings', None)
+        default_index_path = str(Path.home() / "Documents" / "DocumentSearchIndex")
+        index_dir = settings.value("indexing/indexDirectory", default_index_path) if settings else default_index_path
+
+        block = document_search.get_block_text(index_dir, result.get('file_path'), result.get('block_index'))
+        if not block:
+            QMessageBox.warning(self, "无法读取", "无法从索引中读取完整段落，索引可能已更新，请重新搜索。")
+            return
+
+        if block.get('type') == 'excel_row':
+            headers = block.get('headers') or []
+            values = block.get('values') or []
+            lines = [f"{h}: {v}" for h, v in zip(headers, values)] if headers else [str(v) for v in values]
+            full_text = "\n".join(lines)
+        else:
+            full_text = block.get('text', '')
+
+        self._show_text_selection_dialog(
+            f'<div style="white-space: pre-wrap;">{html.escape(str(full_text))}</div>')
+    # ------------------------------------
+
     def _extract_file_path_from_html(self, html_content):
         """从HTML内容中提取文件路径"""
         import re
@@ -1646,6 +2155,10 @@ class VirtualResultsView(QListView):
 
 
 # --- Worker Class for Background Tasks ---
+STREAMED_RESULTS_CACHE_SIZE = 128  # ADDED: 流式搜索结果缓存条目数（与 _perform_search_with_cache 的 maxsize 一致）
+STREAMED_RESULTS_CACHE_TTL = 300   # ADDED: 缓存结果的有效期（秒，与优化搜索引擎的缓存过期时间一致），覆盖索引之外的文件变化
+
+
 class Worker(QObject):
     # Signals to communicate with the main thread
     statusChanged = Signal(str)       # For general status updates
@@ -1653,6 +2166,8 @@ class Worker(QObject):
     progressUpdated = Signal(int, int, str, str) # current, total, phase, detail
     # -----------------------------------------------------------------
     resultsReady = Signal(list)       # Search results list[dict]
+    resultsBatchReady = Signal(list)  # ADDED: 流式搜索的一批结果 list[dict]
+    facetsReady = Signal(dict)  # ADDED: 索引内分面计数（文件类型）
     indexingComplete = Signal(dict)   # Summary dict from backend
     errorOccurred = Signal(str)       # Error message
     # --- ADDED: Signals for update check --- 
@@ -1667,6 +2182,21 @@ class Worker(QObject):
         self._indexing_completed = False
         # 添加一个标志位，用于指示是否请求停止操作
         self.stop_requested = False
+        # --- ADDED: 搜索请求/启动计数，用于识别被新查询取代的搜索 ---
+        self._search_request_id = 0
+        self._search_started_id = 0
+        # --- ADDED: 流式搜索的完整结果缓存（LRU，键同 _perform_search_with_cache），重复查询不再重新搜索 ---
+        # 只在 Worker 线程中读写；索引更新（run_indexing）时清空，键已包含索引目录与源目录参数
+        self._streamed_results_cache = OrderedDict()  # 键 -> (缓存时间, 结果列表)
+        self._search_facets_cache = OrderedDict()  # 同一查询的文件类型计数
+        
+    def mark_search_requested(self):
+        """由主线程在发出搜索信号前调用，使正在进行的旧搜索尽快结束"""
+        self._search_request_id += 1
+
+    def _is_search_superseded(self, search_token):
+        """当有更新的搜索请求排队时返回True"""
+        return self._search_request_id > search_token
         
     def _check_stop_requested(self):
         """检查是否请求了停止操作，如果是则抛出异常"""
@@ -1716,6 +2246,11 @@ class Worker(QObject):
 
             print("使用兼容性包装函数调用优化版索引...")
 
+            # --- ADDED: 分片索引布局设置 ---
+            sharded = QSettings(ORGANIZATION_NAME, APPLICATION_NAME).value(
+                "optimization/sharded_index", False, type=bool)
+            # --- END ADDED ---
+
             generator = document_search.create_or_update_index_legacy(
                 source_directories,
                 index_dir_path,
@@ -1724,7 +2259,8 @@ class Worker(QObject):
                 txt_content_limit_kb=txt_content_limit_kb,
                 file_types_to_index=full_index_types,
                 filename_only_types=filename_only_types,
-                cancel_callback=cancel_check
+                cancel_callback=cancel_check,
+                sharded=sharded
             )
 
             for update in generator:
@@ -1820,20 +2356,130 @@ class Worker(QObject):
 
             self.statusChanged.emit(status_msg)
 
-            # Call the cached search function
-            results = self._perform_search_with_cache(
-                query_str, search_mode, min_size, max_size, start_date_str, end_date_str,
-                file_type_filter_tuple, index_dir_path, case_sensitive, search_scope, search_dirs_tuple
-            )
+            # --- MODIFIED: 流式搜索，逐批发出结果；被新查询取代时直接放弃 ---
+            self._search_started_id += 1
+            search_token = self._search_started_id
+            if self._is_search_superseded(search_token):
+                print(f"⏭️ 搜索 '{query_str}' 已被新的查询取代，跳过执行")
+                return
+
+            # --- ADDED: 先查结果缓存，命中时直接发出完整结果，不再流式搜索 ---
+            cache_key = (query_str, search_mode, min_size, max_size, start_date_str, end_date_str,
+                         file_type_filter_tuple, index_dir_path, case_sensitive, search_scope, search_dirs_tuple)
+            results = None
+            cached_entry = self._streamed_results_cache.get(cache_key)
+            if cached_entry is not None:
+                if time.time() - cached_entry[0] < STREAMED_RESULTS_CACHE_TTL:
+                    results = cached_entry[1]
+                    self._streamed_results_cache.move_to_end(cache_key)
+                    print(f"💾 搜索缓存命中: '{query_str}' ({len(results)} 条结果)")
+                else:
+                    del self._streamed_results_cache[cache_key]
+                    self._search_facets_cache.pop(cache_key, None)
+            # --- END ADDED ---
+            try:
+                if results is None:
+                    results = self._perform_streaming_search(
+                        search_token, query_str, search_mode, min_size, max_size, start_date_str, end_date_str,
+                        file_type_filter_tuple, index_dir_path, case_sensitive, search_scope, search_dirs_tuple
+                    )
+                    if results is not None:
+                        self._streamed_results_cache[cache_key] = (time.time(), results)
+                        if len(self._streamed_results_cache) > STREAMED_RESULTS_CACHE_SIZE:
+                            self._streamed_results_cache.popitem(last=False)
+            except Exception as stream_error:
+                print(f"⚠️ 流式搜索失败，降级到缓存搜索: {stream_error}")
+                # Call the cached search function
+                results = self._perform_search_with_cache(
+                    query_str, search_mode, min_size, max_size, start_date_str, end_date_str,
+                    file_type_filter_tuple, index_dir_path, case_sensitive, search_scope, search_dirs_tuple
+                )
+
+            if results is None:
+                print(f"⏹️ 搜索 '{query_str}' 已被新的查询取代，丢弃结果")
+                return
 
             # Emit results
             self.resultsReady.emit(results)
 
+            # --- ADDED: 结果显示后再统计分面，不阻塞结果显示 ---
+            self._emit_search_facets(
+                search_token, cache_key, query_str, search_mode, min_size, max_size, start_date_str, end_date_str,
+                file_type_filter_tuple, index_dir_path, search_scope, search_dirs_tuple
+            )
+
         except Exception as e:
             tb = traceback.format_exc()
             print(f"WORKER EXCEPTION in run_search: {e}\n{tb}", file=sys.stderr)
             self.errorOccurred.emit(f"搜索过程中发生错误: {e}")
 
+    def _perform_streaming_search(self, search_token, query_str, search_mode, min_size, max_size, start_date_str, end_date_str, file_type_filter_tuple, index_dir_path, case_sensitive, search_scope, search_dirs_tuple):
+        """流式执行搜索：每批结果通过resultsBatchReady发出，返回完整结果列表。
+
+        搜索被新查询取代或被停止时返回None。
+        """
+        search_params = {
+            'search_mode': search_mode,
+            'search_scope': search_scope,
+            'case_sensitive': case_sensitive,
+            'limit': 1200,  # 向 Whoosh 请求的文档命中上限
+            'min_size_kb': min_size,
+            'max_size_kb': max_size,
+            'start_date': start_date_str,
+            'end_date': end_date_str,
+            'file_type_filter': list(file_type_filter_tuple) if file_type_filter_tuple else None,
+            'current_source_dirs': list(search_dirs_tuple) if search_dirs_tuple else None,
+        }
+
+        def is_cancelled():
+            return self.stop_requested or self._is_search_superseded(search_token)
+
+        all_results = []
+        for batch in document_search.iter_search_batches(query_str, index_dir_path,
+                                                         cancel_callback=is_cancelled,
+                                                         **search_params):
+            if is_cancelled():
+                return None
+            all_results.extend(batch)
+            self.resultsBatchReady.emit(batch)
+
+        if is_cancelled():
+            return None
+        print(f"🌊 流式搜索完成: '{query_str}', 共 {len(all_results)} 条结果")
+        return all_results
+
+    def _emit_search_facets(self, search_token, cache_key, query_str, search_mode, min_size, max_size, start_date_str, end_date_str, file_type_filter_tuple, index_dir_path, search_scope, search_dirs_tuple):
+        """从索引统计当前查询的文件类型计数并通过facetsReady发出
+
+        界面只在文件类型复选框上显示计数，因此只统计文件类型分面；
+        已有新的搜索排队时跳过，同一查询的计数随结果缓存复用。
+        """
+        if self.stop_requested or self._is_search_superseded(search_token):
+            return
+        facets = self._search_facets_cache.get(cache_key)
+        if facets is None:
+            try:
+                facets = document_search.search_facets(
+                    query_str, index_dir_path,
+                    search_mode=search_mode,
+                    search_scope=search_scope,
+                    min_size_kb=min_size,
+                    max_size_kb=max_size,
+                    start_date=start_date_str,
+                    end_date=end_date_str,
+                    file_type_filter=list(file_type_filter_tuple) if file_type_filter_tuple else None,
+                    current_source_dirs=list(search_dirs_tuple) if search_dirs_tuple else None,
+                    facet_names=('file_type',),
+                )
+            except Exception as e:
+                print(f"⚠️ 分面统计失败: {e}")
+                return
+            self._search_facets_cache[cache_key] = facets
+            if len(self._search_facets_cache) > STREAMED_RESULTS_CACHE_SIZE:
+                self._search_facets_cache.popitem(last=False)
+        if not self._is_search_superseded(search_token):
+            self.facetsReady.emit(facets)
+
     @functools.lru_cache(maxsize=128)
     def _perform_search_with_cache(self, query_str, search_mode, min_size, max_size, start_date_str, end_date_str, file_type_filter_tuple, index_dir_path, case_sensitive, search_scope, search_dirs_tuple):
         """实际执行搜索的缓存方法"""
@@ -1921,40 +2567,7 @@ class Worker(QObject):
                 search_mode=search_mode
             )
         
-        # 如果搜索目录不为None但后端不支持，则手动过滤结果
-        if search_dirs_list and results:
-            try:
-                print(f"DEBUG: 后端不支持目录过滤，手动过滤 {len(results)} 个结果")
-                filtered_results = []
-                normalized_search_dirs = [os.path.normpath(d).lower() for d in search_dirs_list]
-                
-                for result in results:
-                    file_path = result.get('file_path', '')
-                    if not file_path:
-                        continue
-                    
-                    is_in_selected_dir = False
-                    if '::' in file_path:
-                        archive_path = file_path.split('::', 1)[0]
-                        file_path_normalized = os.path.normpath(archive_path).lower()
-                    else:
-                        file_path_normalized = os.path.normpath(file_path).lower()
-                    
-                    for search_dir in normalized_search_dirs:
-                        if file_path_normalized.startswith(search_dir + os.sep) or file_path_normalized == search_dir:
-                            is_in_selected_dir = True
-                            break
-                            
-                    if is_in_selected_dir:
-                        filtered_results.append(result)
-                
-                print(f"--- Filtered {len(results)} results to {len(filtered_results)} results based on selected directories ---")
-                results = filtered_results
-            except Exception as e:
-                print(f"Error filtering results by directory: {e}")
-                import traceback
-                traceback.print_exc()
-        
+        # MODIFIED: 目录过滤已由后端完成（优先下推到索引查询），不再在此重复逐条过滤
         return results
 
     def clear_search_cache(self):
@@ -1962,6 +2575,8 @@ class Worker(QObject):
         cache_info = self._perform_search_with_cache.cache_info()
         print(f"--- Clearing search cache ({cache_info.hits} hits, {cache_info.misses} misses, {cache_info.currsize}/{cache_info.maxsize} size) ---")
         self._perform_search_with_cache.cache_clear()
+        self._streamed_results_cache.clear()
+        self._search_facets_cache.clear()
         print("--- Search cache cleared. ---")
 
     @Slot(str, str)
@@ -2429,6 +3044,20 @@ class SettingsDialog(QDialog):
         incremental_layout.addStretch()
         strategy_layout.addLayout(incremental_layout)
 
+        # --- ADDED: 按源目录分片索引 ---
+        sharded_layout = QHBoxLayout()
+        self.sharded_index_checkbox = QCheckBox("🧩 按源目录分片索引")
+        self.sharded_index_checkbox.setChecked(False)
+        self.sharded_index_checkbox.setToolTip(
+            "每个源目录使用独立的索引分片，适合超大文档库：\n"
+            "多个分片并行更新，新增源目录不会改动已有分片，搜索时自动合并全部分片。\n"
+            "切换此选项后，下次索引会按新布局重建。")
+        self.sharded_index_checkbox.setStyleSheet("font-weight: bold; color: #333;")
+        sharded_layout.addWidget(self.sharded_index_checkbox)
+        sharded_layout.addStretch()
+        strategy_layout.addLayout(sharded_layout)
+        # --- END ADDED ---
+
         # --- 跳过系统文件 ---
         skip_system_layout = QHBoxLayout()
         self.skip_system_files_checkbox = QCheckBox("🚫 跳过系统文件和临时文件")
@@ -2860,6 +3489,9 @@ class SettingsDialog(QDialog):
         # --- ADDED: Index Strategy Settings ---
         incremental = self.settings.value("optimization/incremental", True, type=bool)
         self.incremental_checkbox.setChecked(incremental)
+
+        sharded_index = self.settings.value("optimization/sharded_index", False, type=bool)
+        self.sharded_index_checkbox.setChecked(sharded_index)
         
         skip_system_files = self.settings.value("optimization/skip_system_files", True, type=bool)
         self.skip_system_files_checkbox.setChecked(skip_system_files)
@@ -2975,6 +3607,8 @@ class SettingsDialog(QDialog):
         # --- ADDED: Index Strategy Settings ---
         incremental = self.incremental_checkbox.isChecked()
         self.settings.setValue("optimization/incremental", incremental)
+
+        self.settings.setValue("optimization/sharded_index", self.sharded_index_checkbox.isChecked())
         
         skip_system_files = self.skip_system_files_checkbox.isChecked()
         self.settings.setValue("optimization/skip_system_files", skip_system_files)
@@ -3299,6 +3933,8 @@ from path_utils import normalize_path_for_display, normalize_path_for_index, Pat
 
 # --- 导入统一主题管理工具 ---
 from theme_manager import ThemeManager
+import theme_resources  # 进程级主题样式表/图标缓存
+import perf_trace  # 索引与搜索热点路径的跟踪段
 # ------------------------
 
 import sys
@@ -3327,7 +3963,7 @@ from PySide6.QtWidgets import (
     QListView, QStyledItemDelegate, QStackedWidget, QStyle, # 虚拟滚动所需组件
 )
 from PySide6.QtCore import Qt, QObject, QThread, Signal, Slot, QUrl, QSettings, QDate, QTimer, QSize, QDir, QModelIndex, QRect, QAbstractListModel # Added QSize, QDir, QModelIndex, QRect, QAbstractListModel 
-from PySide6.QtGui import QDesktopServices, QAction, QIntValidator, QShortcut, QKeySequence, QIcon, QColor, QStandardItemModel, QStandardItem, QTextDocument, QTextCursor, QPainter, QCursor # Added QStandardItemModel and QStandardItem, QTextDocument, QPainter, QCursor
+from PySide6.QtGui import QDesktopServices, QAction, QIntValidator, QShortcut, QKeySequence, QColor, QTextDocument, QTextCursor, QPainter, QCursor # Added QTextDocument, QPainter, QCursor
 import html  # Import html module for escaping
 
 # --- ADDED: Network and Version Comparison Imports ---
@@ -3679,8 +4315,7 @@ def create_highlight_style(theme_colors):
     """
 
 # --- Constants ---
-ORGANIZATION_NAME = "YourOrganizationName"  # Replace with your actual org name or identifier
-APPLICATION_NAME = "DocumentSearchToolPySide"
+from app_identity import ORGANIZATION_NAME, APPLICATION_NAME  # 托盘进程无需导入本模块即可读取设置
 CONFIG_FILE = 'search_config.ini'  # Keep for reference, but QSettings handles location
 DEFAULT_DOC_DIR = ""
 
@@ -3709,6 +4344,7 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
     startSearchSignal = Signal(str, str, object, object, object, object, object, str, bool, str, object) # Added object for search_dirs
     # --- ADDED: Signal for update check --- 
     startUpdateCheckSignal = Signal(str, str) # current_version, update_url
+    postProcessRequested = Signal(int, object) # ADDED: generation, 后处理请求
     # ----------------------------------------
 
     def __init__(self):
@@ -3719,7 +4355,7 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
         # --- 设置窗口图标 ---
         try:
             icon_path = get_resource_path("app_icon.ico")
-            self.setWindowIcon(QIcon(icon_path))
+            self.setWindowIcon(theme_resources.get_icon(icon_path))
         except Exception as e:
             print(f"设置窗口图标时发生错误: {e}")
         # -------------------
@@ -3739,6 +4375,11 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
         self.is_busy = False # Flag to prevent concurrent operations
         self.collapse_states = {} # Stores {key: is_collapsed (bool)} for result display
         self.blocking_filter_update = False # Flag to temporarily block filter updates
+        # --- ADDED: 结果后处理线程状态 ---
+        self.postprocess_thread = None
+        self.results_post_processor = None
+        self._postprocess_generation = 0
+        self._folder_tree_generation = None  # 等待后处理线程提供文件夹列表的请求代数
         # ----------------------------------
         self.current_sort_key = 'score' # Default sort key
         self.current_sort_descending = True # Default sort order
@@ -3881,7 +4522,12 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
         # 创建虚拟滚动组件
         self.virtual_results_model = VirtualResultsModel(self)
         self.virtual_results_view = VirtualResultsView(self)
-        self.virtual_results_view.setModel(self.virtual_results_model)
+        # --- MODIFIED: 视图通过过滤代理模型显示结果，类型/文件夹过滤不再重建模型 ---
+        self.results_filter_proxy = ResultsFilterProxyModel(self)
+        self.results_filter_proxy.setSourceModel(self.virtual_results_model)
+        self.virtual_results_view.setModel(self.results_filter_proxy)
+        self._full_display_results = None  # 模型当前持有的未过滤结果列表（非分组视图）
+        # --- END MODIFIED ---
         self.virtual_results_view.setStyleSheet("border: 1px solid #D0D0D0;")
         
         # 直接使用虚拟滚动视图，统一的搜索结果显示
@@ -3914,6 +4560,9 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
         
         # --- Setup Worker Thread --- 
         self._setup_worker_thread()
+        self._setup_postprocess_thread()  # ADDED: 结果后处理线程
+        perf_trace.set_enabled(self.settings.value(perf_trace.SETTINGS_KEY, True, type=bool))  # ADDED: "显示性能指标"开关
+        document_search.preload_jieba_async()  # ADDED: 后台加载jieba词典，首次搜索不再等待
 
         # --- Setup Connections (AFTER UI Elements Created) ---
         self._setup_connections() # Setup AFTER all UI elements are created
@@ -4285,6 +4934,9 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
                     }}
                 """)
             
+            # 记录原始标签，分面计数显示时在其后追加数量
+            checkbox.setProperty("base_label", checkbox.text())
+
             # 连接复选框状态改变信号
             checkbox.stateChanged.connect(self._filter_results_by_type_slot)
             main_layout.addWidget(checkbox)
@@ -4456,6 +5108,8 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
                     self.worker.statusChanged.disconnect(self.update_status_label_slot)
                     self.worker.progressUpdated.disconnect(self.update_progress_bar_slot)
                     self.worker.resultsReady.disconnect(self._handle_new_search_results_slot)
+                    self.worker.resultsBatchReady.disconnect(self._handle_search_results_batch_slot)
+                    self.worker.facetsReady.disconnect(self._handle_search_facets_slot)
                     self.worker.indexingComplete.disconnect(self.indexing_finished_slot)
                     self.worker.errorOccurred.disconnect(self.handle_error_slot)
                     self.worker.updateAvailableSignal.disconnect(self.show_update_available_dialog_slot)
@@ -4501,6 +5155,8 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
             self.worker.progressUpdated.connect(self.update_progress_bar_slot)
             self.worker.resultsReady.connect(self._handle_new_search_results_slot)
             print(f"🔧 resultsReady信号已连接到_handle_new_search_results_slot (Worker ID: {id(self.worker)})")
+            self.worker.resultsBatchReady.connect(self._handle_search_results_batch_slot)
+            self.worker.facetsReady.connect(self._handle_search_facets_slot)
             self.worker.indexingComplete.connect(self.indexing_finished_slot)
             self.worker.errorOccurred.connect(self.handle_error_slot)
             
@@ -4684,15 +5340,18 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
         
         # 检查文件夹树功能是否可用
         folder_tree_available = self.license_manager.is_feature_available(Features.FOLDER_TREE)
-        if folder_tree_available:
-            # 仅当文件夹树功能可用时构建文件夹树
-            self.folder_tree.build_folder_tree_from_results(backend_results)
-        else:
+        if not folder_tree_available:
             # 如果功能不可用，确保文件夹树是空的
             self.folder_tree.clear()
         
-        # Now apply the current checkbox filters to these new results
-        self._filter_results_by_type_slot()
+        # MODIFIED: 过滤、分组、显示项构建和文件夹树的路径处理交给后处理线程，完成后一次性替换模型
+        if self.blocking_filter_update or self.results_post_processor is None:
+            if folder_tree_available:
+                self.folder_tree.build_folder_tree_from_results(backend_results)
+            # Now apply the current checkbox filters to these new results
+            self._filter_results_by_type_slot()
+        else:
+            self._request_results_postprocess(backend_results, build_folder_tree=folder_tree_available)
         
         # 清除搜索进行标志
         self._search_in_progress = False
@@ -4704,6 +5363,44 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
         
         # Note: 搜索忙碌状态现在在此处重置，而不是在display_search_results_slot中
     
+    # --- ADDED: 流式搜索批次处理 ---
+    @Slot(list)
+    def _handle_search_results_batch_slot(self, batch):
+        """收到一批流式结果时立即追加显示，完整结果到达后由_handle_new_search_results_slot统一处理"""
+        display_batch = [r for r in batch if not r.get('error', False) and not r.get('warning', False)]
+        if not display_batch:
+            return
+        # 分组视图或文件夹过滤需要完整结果，等待最终结果再显示
+        if getattr(self, 'grouping_enabled', False) or getattr(self, 'filtered_by_folder', False):
+            return
+
+        if getattr(self, '_stream_batches_received', 0) == 0:
+            self._invalidate_postprocess()  # ADDED: 新一轮搜索开始，丢弃上一轮未完成的后处理
+            self._folder_tree_generation = None
+            self.collapse_states = {}
+            self.virtual_results_model.parent_window = self
+            self.virtual_results_model.set_theme(self.settings.value("ui/theme", "现代蓝"))
+            self.virtual_results_model.begin_streaming()
+        self._stream_batches_received = getattr(self, '_stream_batches_received', 0) + 1
+
+        self.virtual_results_model.append_results(display_batch)
+        self.statusBar().showMessage(f"已找到 {len(self.virtual_results_model.results)} 个结果，正在继续加载...", 0)
+    # ------------------------------
+
+    # --- ADDED: 分面计数显示 ---
+    @Slot(dict)
+    def _handle_search_facets_slot(self, facets):
+        """在文件类型复选框上显示索引统计的命中文档数"""
+        type_counts = facets.get('file_type', {})
+        # 复选框键与索引中扩展名的别名
+        type_aliases = {'html': ['html', 'htm'], 'jpg': ['jpg', 'jpeg']}
+        for checkbox, type_value in self.file_type_checkboxes.items():
+            base_label = checkbox.property("base_label") or checkbox.text()
+            type_keys = type_value if isinstance(type_value, list) else type_aliases.get(type_value, [type_value])
+            count = sum(type_counts.get(f".{type_key}", 0) for type_key in type_keys)
+            checkbox.setText(f"{base_label} {count}" if count else base_label)
+    # ------------------------------
+
     @Slot(str)
     def _filter_results_by_folder_slot(self, folder_path):
         """按文件夹路径过滤搜索结果
@@ -4787,81 +5484,36 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
         
         print(f"DEBUG: Checked types for filtering: {checked_types}")  # DEBUG
         
+        # MODIFIED: 文件夹过滤优先使用文件夹树节点预先计算的结果编号，只检查该文件夹下的结果
+        candidate_results = self.original_search_results
+        folder_key_filter = None
+        if self.filtered_by_folder and self.current_filter_folder:
+            folder_ids = self.folder_tree.result_ids_for(self.current_filter_folder, self.original_search_results)
+            if folder_ids is not None:
+                candidate_results = [self.original_search_results[i] for i in folder_ids]
+            else:
+                folder_key_filter = normalize_path_for_display(self.current_filter_folder)
+        
         # 如果没有选择文件类型，使用所有原始结果
         if not checked_types:
             print("DEBUG: No file types checked, using all original results")  # DEBUG
             # 重要修复：必须创建原始结果的副本，而不是直接引用
-            filtered_results = self.original_search_results.copy()
+            filtered_results = candidate_results.copy()
         else:
             # 根据所选文件类型过滤原始结果
             print("DEBUG: Filtering original results based on checked types...")  # DEBUG
-            filtered_results = []
-            for result in self.original_search_results:
-                file_path = result.get('file_path', '')
-                file_type = None
-                
-                # 提取文件扩展名，包括多媒体文件
-                if file_path:
-                    lower_path = file_path.lower()
-                    # 扩展文件类型列表，包含多媒体文件
-                    all_extensions = [
-                        '.pdf', '.docx', '.txt', '.xlsx', '.pptx', '.eml', '.msg', '.html', '.htm', '.rtf', '.md',
-                        '.mp4', '.mkv', '.avi', '.wmv', '.mov', '.flv', '.webm', '.m4v',  # 视频
-                        '.mp3', '.wav', '.flac', '.aac', '.ogg', '.wma', '.m4a',         # 音频
-                        '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp', '.svg'  # 图片
-                    ]
-                    for ext in all_extensions:
-                        if lower_path.endswith(ext):
-                            file_type = ext[1:]  # 移除前导点
-                            # .htm特殊情况，处理为html
-                            if file_type == 'htm':
-                                file_type = 'html'
-                            # .jpeg特殊情况，处理为jpg
-                            elif file_type == 'jpeg':
-                                file_type = 'jpg'
-                            break
-                
-                # 如果文件类型匹配所选类型，添加结果
-                if file_type and file_type in checked_types:
-                    filtered_results.append(result)
+            # MODIFIED: 使用按路径缓存的类型键，不再逐条遍历扩展名列表
+            checked_type_set = set(checked_types)
+            filtered_results = [result for result in candidate_results
+                                if get_result_type_key(result.get('file_path', '')) in checked_type_set]
             
             print(f"DEBUG: Filtered results count after type filtering: {len(filtered_results)}")  # DEBUG
         
-        # 应用文件夹过滤
-        if self.filtered_by_folder and self.current_filter_folder:
-            folder_filtered_results = []
-            for result in filtered_results:
-                file_path = result.get('file_path', '')
-                if not file_path:
-                    continue
-                    
-                # 处理存档文件中的项目
-                if '::' in file_path:
-                    archive_path = file_path.split('::', 1)[0]
-                    folder_path = str(Path(archive_path).parent)
-                else:
-                    folder_path = str(Path(file_path).parent)
-                
-                # 标准化路径进行比较
-                folder_path = normalize_path_for_display(folder_path)
-                normalized_filter_folder = normalize_path_for_display(self.current_filter_folder)
-                
-                # 检查文件路径是否属于所选文件夹
-                # 特殊处理根目录情况
-                is_match = False
-                if normalized_filter_folder.endswith(':\\'):  # 根目录情况
-                    # 对于D:\这样的根目录，直接检查文件路径是否以此开头
-                    is_match = folder_path.startswith(normalized_filter_folder) or folder_path == normalized_filter_folder[:-1]
-                else:
-                    # 非根目录的正常情况
-                    is_match = (folder_path == normalized_filter_folder or 
-                               folder_path.startswith(normalized_filter_folder + os.path.sep))
-                
-                if is_match:
-                    folder_filtered_results.append(result)
-                    
-            # 更新过滤后的结果
-            filtered_results = folder_filtered_results
+        # 应用文件夹过滤（文件夹树不是由当前结果构建时，按路径键匹配）
+        if folder_key_filter is not None:
+            filtered_results = [result for result in filtered_results
+                                if folder_key_matches(get_result_folder_key(result.get('file_path', '')),
+                                                      folder_key_filter)]
         
         # 保存过滤后的结果
         self.search_results = filtered_results
@@ -4908,7 +5560,45 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
         # === 统一显示逻辑修复 ===
         # 调用统一的display_search_results_slot函数，避免重复的虚拟滚动判断逻辑
         print(f"DEBUG: _filter_results_by_type_slot调用display_search_results_slot，结果数量: {filtered_count}")
-        self.display_search_results_slot(filtered_results)
+        # MODIFIED: 非分组视图下由过滤代理模型就地过滤
+        self._display_filtered_results(filtered_results, self.original_search_results, checked_types)
+
+    # --- ADDED: 代理过滤显示 ---
+    def _is_grouped_view(self):
+        return bool(getattr(self, 'grouping_enabled', False) and
+                    getattr(self, 'current_grouping_mode', 'none') != 'none')
+
+    def _display_filtered_results(self, filtered_results, full_results, checked_types=None):
+        """
+        显示过滤后的结果
+
+        非分组视图中模型持有全部结果（full_results），类型/文件夹过滤交给代理模型，
+        再次切换过滤条件时只增删变化的行；分组视图的分组计数依赖过滤结果，
+        没有结果时需要显示空状态，这两种情况按过滤结果重建模型。
+        """
+        if checked_types is None:
+            checked_types = self._get_checked_file_types()
+        folder = self.current_filter_folder if self.filtered_by_folder else None
+        self.results_filter_proxy.set_filter(checked_types, folder)
+
+        if self._is_grouped_view() or not filtered_results:
+            self._full_display_results = None
+            self.display_search_results_slot(filtered_results)
+        elif self.virtual_results_model.results is not full_results or self._full_display_results is not full_results:
+            self._full_display_results = full_results
+            self.display_search_results_slot(full_results, visible_count=len(filtered_results))
+
+    def _get_checked_file_types(self):
+        """返回选中且可用的文件类型过滤键"""
+        checked_types = []
+        for checkbox, type_value in self.file_type_checkboxes.items():
+            if checkbox.isChecked() and checkbox.isEnabled():
+                if isinstance(type_value, list):
+                    checked_types.extend(type_value)
+                else:
+                    checked_types.append(type_value)
+        return checked_types
+    # --- END ADDED ---
     
     @Slot()
     def _sort_and_redisplay_results_slot(self):
@@ -4938,6 +5628,8 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
 
     def clear_results_slot(self):
         """Slot for the Clear Results button click. Clears the results area and resets status."""
+        self._invalidate_postprocess()  # ADDED
+        self._folder_tree_generation = None
         # 清空虚拟滚动模型
         if hasattr(self, 'virtual_results_model'):
             self.virtual_results_model.set_results([])
@@ -4986,11 +5678,6 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
         search_scope = 'fulltext' if scope_index == 0 else 'filename'
         print(f"DEBUG: Search scope selected: {search_scope}")
 
-        # --- 清除搜索缓存以确保结果准确性 ---
-        if hasattr(self, 'worker') and self.worker:
-            self.worker.clear_search_cache()
-            print(f"DEBUG: 搜索开始前已清除缓存")
-
         # --- MODIFIED: Call common search prep with scope ---
         self._start_search_common(mode, query, search_scope)
         # --------------------------------------------------
@@ -5211,10 +5898,13 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
         print(f"DEBUG: 目录过滤参数(current_source_dirs): {current_source_dirs_param}")
         print(f"DEBUG: 搜索范围参数(search_dirs): {search_dirs_param}")
 
-        # 清除搜索缓存以确保目录过滤生效
+        # MODIFIED: 不再每次搜索前清除缓存——缓存键包含源目录参数，目录过滤不受影响；
+        # 缓存由 Worker 在索引更新时清空（在 Worker 线程中，避免与搜索并发修改）
+
+        # --- ADDED: 通知Worker有新的搜索请求，旧的流式搜索会尽快结束 ---
+        self._stream_batches_received = 0
         if self.worker:
-            self.worker.clear_search_cache()
-            print("DEBUG: 已清除搜索缓存，确保目录过滤生效")
+            self.worker.mark_search_requested()
 
         # --- 发送搜索信号到后台线程 ---
         # 移除了文件大小和日期筛选参数，简化搜索功能
@@ -5328,11 +6018,6 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
 
         # 确保搜索框文本正确
         if self.search_line_edit.text().strip() == search_text.strip():
-            # 清除搜索缓存以确保新搜索获得准确结果
-            if hasattr(self, 'worker') and self.worker:
-                self.worker.clear_search_cache()
-                print(f"DEBUG: 已清除搜索缓存以确保准确结果")
-
             # 更新搜索历史记录
             self.last_search_text = search_text.strip()
             print(f"DEBUG: 历史记录搜索 - 立即执行搜索: '{search_text}'")
@@ -5430,31 +6115,16 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
         
         # === 统一使用虚拟滚动模式 ===
         print(f"DEBUG: _apply_view_mode_and_display调用display_search_results_slot（虚拟滚动），结果数量: {len(sorted_results)}")
-        self.display_search_results_slot(sorted_results)
+        # MODIFIED: 非分组视图中模型持有全部结果，由过滤代理模型隐藏未选类型/文件夹
+        full_results = self.original_search_results or search_results
+        if current_view == "⏰ 时间视图":
+            full_results = self._sort_results_by_time(full_results)
+        self._display_filtered_results(sorted_results, full_results)
 
     def _sort_results_by_time(self, results):
         """按修改时间降序排列搜索结果"""
-        import os
-        
-        def get_modification_time(result):
-            """获取文件的修改时间戳"""
-            # 优先从搜索结果获取时间信息
-            mtime = result.get('last_modified', result.get('mtime', 0))
-            
-            # 如果搜索结果没有时间信息，从文件系统获取
-            if mtime <= 0:
-                file_path = result.get('file_path', result.get('path', ''))
-                if file_path and os.path.exists(file_path):
-                    try:
-                        mtime = os.path.getmtime(file_path)
-                    except (OSError, FileNotFoundError):
-                        mtime = 0
-            
-            return mtime
-        
-        # 按修改时间降序排序（最新的在前面）
-        sorted_results = sorted(results, key=get_modification_time, reverse=True)
-        return sorted_results
+        # MODIFIED: 与后端共用排序实现，只使用索引中存储的修改时间，不再逐条访问文件系统
+        return document_search.sort_results(results, 'date_desc')
             
 
             
@@ -5483,18 +6153,9 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
             return self._extract_file_type(file_path)
         elif group_mode == 'date':
             # 按修改日期分组（按天）
+            # MODIFIED: 只使用索引中存储的修改时间，不再逐条访问文件系统
             import datetime
-            import os
-            mtime = result.get('last_modified', result.get('mtime', 0))
-            
-            # 如果搜索结果没有mtime，尝试从文件系统获取
-            if mtime <= 0:
-                file_path = result.get('file_path', result.get('path', ''))
-                if file_path and os.path.exists(file_path):
-                    try:
-                        mtime = os.path.getmtime(file_path)
-                    except (OSError, FileNotFoundError):
-                        mtime = 0
+            mtime = result.get('last_modified', result.get('mtime', 0)) or 0
             
             if mtime > 0:
                 try:
@@ -5678,9 +6339,15 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
             self.detail_label.setVisible(True)
 
     @Slot(list)
-    def display_search_results_slot(self, results):
-        """Displays search results using virtual scroll mode."""
+    def display_search_results_slot(self, results, visible_count=None):
+        """Displays search results using virtual scroll mode.
+
+        visible_count: 代理模型过滤后实际显示的结果数（模型持有全部结果时传入）
+        """
         try:
+            # ADDED: 同步显示会覆盖尚未完成的后处理结果
+            self._invalidate_postprocess()
+            
             # === 统一使用虚拟滚动模式 ===
             print(f"🔧 虚拟滚动模式: 显示 {len(results)} 个结果")
             
@@ -5689,27 +6356,11 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
             # 设置虚拟滚动模型数据
             current_theme = self.settings.value("ui/theme", "现代蓝")
             self.virtual_results_model.set_theme(current_theme)
-            self.virtual_results_model.set_results(results)
+            with perf_trace.span("render.results", results=len(results)):
+                self.virtual_results_model.set_results(results)
             
-            if not results:
-                self.statusBar().showMessage("未找到结果", 5000)
-            else:
-                # 检查是否可能被截断（接近限制数值）
-                max_recommended_results = 500
-                if len(results) >= max_recommended_results:
-                    self.statusBar().showMessage(f"🔍 结果数量超过 {max_recommended_results} 条，建议使用更明确的搜索词重新尝试", 0)
-                    
-                    # 在界面顶部添加警告横幅
-                    if hasattr(self, 'search_warning_label'):
-                        self.search_warning_label.setText(f"⚠️ 结果数量超过 {max_recommended_results} 条，建议使用更明确的搜索词重新尝试以获得更精确的结果。")
-                        self.search_warning_label.setVisible(True)
-                else:
-                    self.statusBar().showMessage(f"找到 {len(results)} 个结果", 0)
-                    # 隐藏警告标签
-                    if hasattr(self, 'search_warning_label'):
-                        self.search_warning_label.setVisible(False)
-                
-                print(f"💡 虚拟滚动模式: 显示 {len(results)} 个结果，提升UI性能")
+            # MODIFIED: 状态栏显示实际可见的结果数
+            self._show_results_count_status(len(results) if visible_count is None else visible_count)
                 
         except Exception as e:
             print(f"显示搜索结果时出错: {e}")
@@ -5719,6 +6370,105 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
             # 这里不再重复重置，避免多次调用
             pass
 
+    # --- ADDED: 结果数状态显示（同步显示与后处理快照共用） ---
+    def _show_results_count_status(self, result_count):
+        """在状态栏显示结果数，结果过多时显示警告横幅"""
+        if not result_count:
+            self.statusBar().showMessage("未找到结果", 5000)
+            return
+        # 检查是否可能被截断（接近限制数值）
+        max_recommended_results = 500
+        if result_count >= max_recommended_results:
+            self.statusBar().showMessage(f"🔍 结果数量超过 {max_recommended_results} 条，建议使用更明确的搜索词重新尝试", 0)
+            
+            # 在界面顶部添加警告横幅
+            if hasattr(self, 'search_warning_label'):
+                self.search_warning_label.setText(f"⚠️ 结果数量超过 {max_recommended_results} 条，建议使用更明确的搜索词重新尝试以获得更精确的结果。")
+                self.search_warning_label.setVisible(True)
+        else:
+            self.statusBar().showMessage(f"找到 {result_count} 个结果", 0)
+            # 隐藏警告标签
+            if hasattr(self, 'search_warning_label'):
+                self.search_warning_label.setVisible(False)
+        
+        print(f"💡 虚拟滚动模式: 显示 {result_count} 个结果，提升UI性能")
+    # --- END ADDED ---
+
+    # --- ADDED: 结果后处理线程 ---
+    def _setup_postprocess_thread(self):
+        """创建结果后处理线程（过滤、分组、显示项构建不占用界面线程）"""
+        self.postprocess_thread = QThread()
+        self.results_post_processor = ResultsPostProcessor()
+        self.results_post_processor.moveToThread(self.postprocess_thread)
+        self.postProcessRequested.connect(self.results_post_processor.process)
+        self.results_post_processor.snapshotReady.connect(self._apply_results_snapshot_slot)
+        self.postprocess_thread.start()
+
+    def _stop_postprocess_thread(self):
+        if self.postprocess_thread and self.postprocess_thread.isRunning():
+            self._invalidate_postprocess()
+            self.postprocess_thread.quit()
+            self.postprocess_thread.wait(3000)
+        self.postprocess_thread = None
+        if self.results_post_processor:
+            self.results_post_processor.deleteLater()
+            self.results_post_processor = None
+
+    def _invalidate_postprocess(self):
+        """丢弃排队中和正在进行的后处理请求"""
+        self._postprocess_generation += 1
+        if self.results_post_processor is not None:
+            self.results_post_processor.latest_generation = self._postprocess_generation
+
+    def _request_results_postprocess(self, results, build_folder_tree=False):
+        """把新的搜索结果交给后处理线程，界面线程不做逐条处理"""
+        self._invalidate_postprocess()
+        generation = self._postprocess_generation
+        self._folder_tree_generation = generation if build_folder_tree else None
+        # 构建器只读取界面状态的副本，后处理期间界面可以自由修改原状态
+        state = types.SimpleNamespace(
+            collapse_states=dict(self.collapse_states),
+            group_collapse_states=dict(getattr(self, 'group_collapse_states', {})),
+            last_search_scope=getattr(self, 'last_search_scope', None),
+            last_search_text=getattr(self, 'last_search_text', ''),
+            search_results=[],
+        )
+        request = {
+            'results': results,
+            'allowed_types': self._get_checked_file_types(),
+            'filter_folder': self.current_filter_folder if self.filtered_by_folder else None,
+            'group_mode': self.current_grouping_mode if self._is_grouped_view() else None,
+            'group_func': self._group_results,
+            'state': state,
+            'build_folder_tree': build_folder_tree,
+        }
+        self.statusBar().showMessage(f"正在整理 {len(results)} 个结果...", 0)
+        self.postProcessRequested.emit(generation, request)
+
+    @Slot(int, object)
+    def _apply_results_snapshot_slot(self, generation, snapshot):
+        """后处理完成：一次性替换模型、过滤条件和文件夹树"""
+        if snapshot is not None and snapshot.folder_tree is not None and generation == self._folder_tree_generation:
+            # 显示已被同步刷新覆盖时，文件夹树仍属于当前结果
+            self._folder_tree_generation = None
+            self.folder_tree.build_folder_tree(snapshot.folder_tree, snapshot.source_results)
+        if generation != self._postprocess_generation:
+            return
+        if snapshot is None:
+            # 后处理出错，退回界面线程同步处理
+            self._filter_results_by_type_slot()
+            return
+
+        self.search_results = snapshot.filtered_results
+        self.results_filter_proxy.set_filter(snapshot.allowed_types, snapshot.filter_folder)
+        self.virtual_results_model.parent_window = self
+        self.virtual_results_model.set_theme(self.settings.value("ui/theme", "现代蓝"))
+        with perf_trace.span("render.results", results=len(snapshot.filtered_results), snapshot=True):
+            self.virtual_results_model.apply_snapshot(snapshot)
+        self._full_display_results = snapshot.results if snapshot.holds_all_results else None
+        self._show_results_count_status(len(snapshot.filtered_results))
+    # --- END ADDED ---
+
     @Slot(dict)
     def indexing_finished_slot(self, summary_dict):
         # Process final_status message from summary_dict
@@ -5852,8 +6602,9 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
                     self.group_collapse_states[toggle_key] = new_state
                     print(f"  New virtual group collapse state for key '{toggle_key}': {self.group_collapse_states[toggle_key]}")
                     
-                    # 重新应用分组和显示（虚拟滚动模式）
-                    self._apply_view_mode_and_display()
+                    # MODIFIED: 优先就地删除/插入该分组的行，无法就地处理时重新应用分组和显示
+                    if not self.virtual_results_model.toggle_collapse(toggle_key, new_state):
+                        self._apply_view_mode_and_display()
                 else:
                     # 传统模式的文件/章节折叠处理
                     current_state = self.collapse_states.get(toggle_key, False)  # Default to expanded
@@ -5862,6 +6613,9 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
                     self.collapse_states[toggle_key] = new_state
                     print(f"  New collapse state for key '{toggle_key}': {self.collapse_states[toggle_key]}")
                     
+                    # MODIFIED: 优先就地删除/插入该文件或章节的行
+                    if self.virtual_results_model.toggle_collapse(toggle_key, new_state):
+                        return
                     # 修改：直接渲染当前结果，而不是重新筛选
                     print("  直接渲染当前结果...")
                     # 创建搜索结果的副本，以避免引用问题
@@ -5989,6 +6743,12 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
         hotkey_settings_action.triggered.connect(self.show_hotkey_settings_dialog_slot)
         settings_menu.addAction(hotkey_settings_action)
 
+        # --- ADDED: 性能监控（索引优化设置的"性能监控"页，显示跟踪段统计并导出跟踪文件） ---
+        performance_action = QAction("性能监控(&P)...", self)
+        performance_action.triggered.connect(self.show_performance_monitor_dialog_slot)
+        settings_menu.addAction(performance_action)
+        # -------------------------------------------------------------------------
+
         # --- ADDED: 许可证菜单 ---
         settings_menu.addSeparator()  # 添加分隔线
         license_action = QAction("许可证管理(&L)...", self)
@@ -6075,21 +6835,11 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
         # 首先获取当前主题
         theme_name = self.settings.value("ui/theme", "系统默认")
         
-        # 重新应用主题图标
-        if theme_name == "现代蓝" or theme_name == "系统默认":
-            arrow_icon_path = get_resource_path("down_arrow_blue.png")
-        elif theme_name == "现代紫":
-            arrow_icon_path = get_resource_path("down_arrow_purple.png")
-        elif theme_name == "现代红":
-            arrow_icon_path = get_resource_path("down_arrow_red.png")
-        elif theme_name == "现代橙":
-            arrow_icon_path = get_resource_path("down_arrow_orange.png")
-        else:
-            # 默认使用蓝色
-            arrow_icon_path = get_resource_path("down_arrow_blue.png")
+        # 重新应用主题图标（未知主题使用蓝色）
+        arrow_icon_path = theme_resources.theme_image_path("down_arrow", theme_name)
             
         # 重新应用主题图标到下拉框
-        if os.path.exists(arrow_icon_path):
+        if arrow_icon_path:
             self._apply_direct_arrow_icons(arrow_icon_path)
             
         # 强制每个控件重绘
@@ -6300,8 +7050,8 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
             self.apply_theme("现代蓝")
             
             # 应用图标到下拉框
-            arrow_icon_path = get_resource_path("down_arrow_blue.png")
-            if os.path.exists(arrow_icon_path):
+            arrow_icon_path = theme_resources.theme_image_path("down_arrow", "现代蓝")
+            if arrow_icon_path:
                 self._apply_direct_arrow_icons(arrow_icon_path)
         
         # 刷新菜单栏和UI以显示正确的许可证状态
@@ -6425,14 +7175,10 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
             try:
                 # 使用现代蓝色主题
                 
-                # 加载蓝色样式表，使用资源路径解析器
-                style_path = get_resource_path("blue_style.qss")
-                print(f"资源路径解析: blue_style.qss -> {style_path}")
-                
-                with open(style_path, "r", encoding="utf-8") as style_file:
-                    style_content = style_file.read()
-                    self.setStyleSheet(style_content)
-                    print("Applied modern blue theme.")
+                # 加载蓝色样式表（进程级缓存，图片路径已替换为绝对路径，只在第一次使用时读取文件）
+                style_content = theme_resources.get_theme_stylesheet("现代蓝")
+                self.setStyleSheet(style_content)
+                print("Applied modern blue theme.")
                     
                 # --- 修正图像路径 ---
                 self._update_theme_icons(theme_name)
@@ -6445,14 +7191,10 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
             try:
                 # 使用现代紫色主题
                 
-                # 加载紫色样式表，使用资源路径解析器
-                style_path = get_resource_path("purple_style.qss")
-                print(f"资源路径解析: purple_style.qss -> {style_path}")
-                
-                with open(style_path, "r", encoding="utf-8") as style_file:
-                    style_content = style_file.read()
-                    self.setStyleSheet(style_content)
-                    print("Applied modern purple theme.")
+                # 加载紫色样式表（进程级缓存，图片路径已替换为绝对路径，只在第一次使用时读取文件）
+                style_content = theme_resources.get_theme_stylesheet("现代紫")
+                self.setStyleSheet(style_content)
+                print("Applied modern purple theme.")
                     
                 # --- 修正图像路径 ---
                 self._update_theme_icons(theme_name)
@@ -6463,14 +7205,10 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
             try:
                 # 使用现代红色主题
                 
-                # 加载红色样式表，使用资源路径解析器
-                style_path = get_resource_path("red_style.qss")
-                print(f"资源路径解析: red_style.qss -> {style_path}")
-                
-                with open(style_path, "r", encoding="utf-8") as style_file:
-                    style_content = style_file.read()
-                    self.setStyleSheet(style_content)
-                    print("Applied modern red theme.")
+                # 加载红色样式表（进程级缓存，图片路径已替换为绝对路径，只在第一次使用时读取文件）
+                style_content = theme_resources.get_theme_stylesheet("现代红")
+                self.setStyleSheet(style_content)
+                print("Applied modern red theme.")
                     
                 # --- 修正图像路径 ---
                 self._update_theme_icons(theme_name)
@@ -6481,14 +7219,10 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
             try:
                 # 使用现代橙色主题
                 
-                # 加载橙色样式表，使用资源路径解析器
-                style_path = get_resource_path("orange_style.qss")
-                print(f"资源路径解析: orange_style.qss -> {style_path}")
-                
-                with open(style_path, "r", encoding="utf-8") as style_file:
-                    style_content = style_file.read()
-                    self.setStyleSheet(style_content)
-                    print("Applied modern orange theme.")
+                # 加载橙色样式表（进程级缓存，图片路径已替换为绝对路径，只在第一次使用时读取文件）
+                style_content = theme_resources.get_theme_stylesheet("现代橙")
+                self.setStyleSheet(style_content)
+                print("Applied modern orange theme.")
                     
                 # --- 修正图像路径 ---
                 self._update_theme_icons(theme_name)
@@ -6561,19 +7295,10 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
         Args:
             theme_name: 主题名称
         """
-        # 获取组合框中的箭头图标
-        arrow_icon_path = None
-        
-        if theme_name == "现代蓝" or theme_name == "系统默认":
-            arrow_icon_path = get_resource_path("down_arrow_blue.png")
-        elif theme_name == "现代紫":
-            arrow_icon_path = get_resource_path("down_arrow_purple.png")
-        elif theme_name == "现代红":
-            arrow_icon_path = get_resource_path("down_arrow_red.png")
-        elif theme_name == "现代橙":
-            arrow_icon_path = get_resource_path("down_arrow_orange.png")
+        # 获取组合框中的箭头图标（路径解析和存在性检查按主题缓存）
+        arrow_icon_path = theme_resources.theme_image_path("down_arrow", theme_name)
             
-        if arrow_icon_path and os.path.exists(arrow_icon_path):
+        if arrow_icon_path:
             # 通过代码设置图标路径，确保在所有环境下正确显示
             self._apply_direct_arrow_icons(arrow_icon_path)
     
@@ -6609,55 +7334,30 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
         from PySide6.QtWidgets import QApplication
         app = QApplication.instance()
         try:
-            # 使用资源路径解析器加载蓝色样式表
-            style_path = get_resource_path("blue_style.qss")
-            if os.path.exists(style_path):
-                with open(style_path, "r", encoding="utf-8") as f:
-                    stylesheet = f.read()
-                
-                # 检查打包环境下的路径并修改URL引用
-                if getattr(sys, 'frozen', False):
-                    # 在PyInstaller打包后的环境中
-                    print("检测到打包环境，应用相对路径处理...")
-                    # 获取资源文件所在的目录
-                    base_path = sys._MEIPASS
-                    
-                    # 修改样式表中的图片URL路径为绝对路径
-                    # 这解决了在打包环境中图片路径引用的问题
-                    stylesheet = stylesheet.replace('image: url(', f'image: url("{base_path}/")')
-                    stylesheet = stylesheet.replace('.png)', '.png")')
-                    
-                    # 同时保持原有的替换逻辑
-                    stylesheet = stylesheet.replace("image: url(checkmark.png)", "image: url(checkmark_blue.png)")
-                    stylesheet = stylesheet.replace("image: url(down_arrow.png)", "image: url(down_arrow_blue.png)")
-                else:
-                    # 在开发环境中
-                    stylesheet = stylesheet.replace("image: url(checkmark.png)", "image: url(checkmark_blue.png)")
-                    stylesheet = stylesheet.replace("image: url(down_arrow.png)", "image: url(down_arrow_blue.png)")
-                
-                    app.setStyleSheet(stylesheet)
+            # 加载蓝色样式表（进程级缓存；图片引用已统一替换为绝对路径，开发环境和打包环境相同）
+            try:
+                stylesheet = theme_resources.get_theme_stylesheet("现代蓝")
+            except OSError as e:
+                stylesheet = None
+                print(f"Blue style file not found: {e}")
+            if stylesheet is not None:
+                app.setStyleSheet(stylesheet)
                 print("Applied fallback blue theme.")
                 
-                # 通过编程方式直接设置下拉箭头和单选按钮图标
+                # 通过编程方式直接设置下拉箭头图标
                 # 这是一种备选方法，如果通过样式表无法正确设置图标
                 try:
-                    from PySide6.QtGui import QIcon, QPixmap
-                    arrow_icon_path = get_resource_path("down_arrow_blue.png")
-                    radio_icon_path = get_resource_path("radio_checked_blue.png")
-                    check_icon_path = get_resource_path("checkmark_blue.png")
-                    
-                    if os.path.exists(arrow_icon_path):
-                        down_arrow_icon = QIcon(arrow_icon_path)
+                    down_arrow_icon = theme_resources.get_theme_icon("down_arrow", "现代蓝")
+                    if down_arrow_icon is not None:
                         # 将图标应用于应用程序范围的图标设置
                         app.setProperty("down_arrow_icon", down_arrow_icon)
-                        print(f"已通过代码设置下拉箭头图标: {arrow_icon_path}")
+                        print("已通过代码设置下拉箭头图标")
                 except Exception as e:
                     print(f"通过代码设置图标时发生错误: {e}")
                 
                 # 更新样式设置
                 self.settings.setValue("ui/theme", "现代蓝")
             else:
-                print(f"Blue style file not found: {style_path}")
                 # 如果找不到样式表文件，使用系统默认样式
                 app.setStyleSheet("")
         except Exception as e:
@@ -6903,6 +7603,10 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
         else:
             print("  线程未运行或已清理。")
 
+        # --- ADDED: 停止结果后处理线程 ---
+        self._stop_postprocess_thread()
+        # --------------------------------
+
         # 显式设置对象为None，帮助垃圾回收
         if hasattr(self, 'worker') and self.worker:
             self.worker.deleteLater()
@@ -7803,6 +8507,16 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
         dialog = StartupSettingsDialog(self)
         dialog.exec()
 
+    # --- ADDED: 性能监控 ---
+    @Slot()
+    def show_performance_monitor_dialog_slot(self):
+        """打开索引优化设置的"性能监控"页（跟踪段统计、导出跟踪文件）"""
+        from gui_optimization_settings import OptimizationSettingsDialog
+        dialog = OptimizationSettingsDialog(self)
+        dialog.show_monitoring_tab()
+        dialog.exec()
+    # --- END ADDED ---
+
     @Slot()
     def show_hotkey_settings_dialog_slot(self):
         """显示热键设置对话框"""
@@ -7958,6 +8672,193 @@ class MainWindow(QMainWindow):  # Changed base class to QMainWindow
         sys.stderr.flush()
 
 # --- 文件夹树视图组件 ---
+# --- ADDED: 惰性文件夹树 ---
+class FolderTreeNode:
+    """文件夹前缀树节点"""
+    __slots__ = ('name', 'path', 'parent', 'row', 'children', 'child_list', 'own_ids', 'count', 'fetched')
+
+    def __init__(self, name, path, parent=None):
+        self.name = name
+        self.path = path
+        self.parent = parent
+        self.row = 0
+        self.children = {}      # 名称 -> 子节点（构建阶段使用）
+        self.child_list = []    # 排序后的子节点，行号即下标
+        self.own_ids = []       # 直接位于此文件夹中的结果编号
+        self.count = 0          # 子树中的结果总数
+        self.fetched = 0        # 已经交给视图的子行数
+
+    def subtree_ids(self):
+        """子树中全部结果编号（升序）"""
+        ids = list(self.own_ids)
+        stack = list(self.child_list)
+        while stack:
+            node = stack.pop()
+            ids.extend(node.own_ids)
+            stack.extend(node.child_list)
+        ids.sort()
+        return ids
+
+
+class FolderPrefixTree:
+    """结果文件夹的紧凑前缀树（纯Python，可在后处理线程中构建）
+
+    每个节点记录直接位于该文件夹中的结果编号和子树命中数。
+    """
+
+    def __init__(self, folder_result_ids=None):
+        """
+        Args:
+            folder_result_ids: {标准化文件夹路径: [结果编号, ...]}
+        """
+        self.root = FolderTreeNode('', '')
+        self.nodes = {}  # 文件夹路径 -> 节点
+        for folder_path, result_ids in (folder_result_ids or {}).items():
+            if folder_path:
+                self._add_folder(folder_path).own_ids.extend(result_ids)
+        self._finalize()
+
+    def _add_folder(self, folder_path):
+        """向上找到已存在的祖先，只为缺失的各级文件夹创建节点（根目录部分如 "D:\\" 或 "/" 作为顶层节点）"""
+        nodes = self.nodes
+        missing = []
+        path = folder_path
+        while path not in nodes:
+            parent_path, name = os.path.split(path)
+            if not name or parent_path == path:
+                missing.append((path, path, None))
+                break
+            if not parent_path:
+                missing.append((path, name, None))
+                break
+            missing.append((path, name, parent_path))
+            path = parent_path
+        for path, name, parent_path in reversed(missing):
+            parent_node = nodes[parent_path] if parent_path is not None else self.root
+            node = FolderTreeNode(name, path, parent_node)
+            parent_node.children[name] = node
+            nodes[path] = node
+        return nodes[folder_path]
+
+    def _finalize(self):
+        """排序子节点并自底向上计算命中数（迭代实现，避免深层目录递归）"""
+        order = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            node.child_list = [node.children[name] for name in sorted(node.children)]
+            node.children = None  # 构建完成后只保留有序列表
+            for row, child in enumerate(node.child_list):
+                child.row = row
+            stack.extend(node.child_list)
+        for node in reversed(order):
+            node.count = len(node.own_ids) + sum(child.count for child in node.child_list)
+
+    def node_for_path(self, folder_path):
+        node = self.nodes.get(folder_path)
+        if node is None and folder_path:
+            node = self.nodes.get(normalize_path_for_display(folder_path))
+        return node
+
+
+class FolderTreeModel(QAbstractItemModel):
+    """基于文件夹前缀树的惰性树模型
+
+    只持有紧凑的前缀树，不为文件夹创建条目对象；
+    视图展开节点时通过 canFetchMore/fetchMore 才把子行交给视图。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tree = FolderPrefixTree()
+        self.source_results = None  # 结果编号对应的结果列表
+
+    @property
+    def _root(self):
+        return self.tree.root
+
+    def set_tree(self, tree, source_results):
+        """替换为新的前缀树（顶层节点直接可见，其余节点展开时加载）"""
+        self.beginResetModel()
+        tree.root.fetched = len(tree.root.child_list)
+        self.tree = tree
+        self.source_results = source_results
+        self.endResetModel()
+
+    def node_for_path(self, folder_path):
+        return self.tree.node_for_path(folder_path)
+
+    def index_for_path(self, folder_path):
+        """返回文件夹对应的索引，必要时逐级加载上层节点的子行"""
+        node = self.node_for_path(folder_path)
+        if node is None:
+            return QModelIndex()
+        chain = []
+        while node is not self._root:
+            chain.append(node)
+            node = node.parent
+        for ancestor in reversed(chain[1:]):
+            index = self.createIndex(ancestor.row, 0, ancestor)
+            if self.canFetchMore(index):
+                self.fetchMore(index)
+        target = chain[0]
+        return self.createIndex(target.row, 0, target)
+
+    def _node(self, index):
+        return index.internalPointer() if index.isValid() else self._root
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self._node(parent)
+        if column != 0 or row < 0 or row >= node.fetched:
+            return QModelIndex()
+        return self.createIndex(row, 0, node.child_list[row])
+
+    def parent(self, index=QModelIndex()):
+        if not index.isValid():
+            return QModelIndex()
+        parent_node = index.internalPointer().parent
+        if parent_node is None or parent_node is self._root:
+            return QModelIndex()
+        return self.createIndex(parent_node.row, 0, parent_node)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return self._node(parent).fetched
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        return bool(self._node(parent).child_list)
+
+    def canFetchMore(self, parent):
+        node = self._node(parent)
+        return node.fetched < len(node.child_list)
+
+    def fetchMore(self, parent):
+        node = self._node(parent)
+        remaining = len(node.child_list) - node.fetched
+        if remaining <= 0:
+            return
+        self.beginInsertRows(parent, node.fetched, node.fetched + remaining - 1)
+        node.fetched += remaining
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.DisplayRole:
+            return f"{node.name} ({node.count})"
+        if role == Qt.UserRole:
+            return node.path
+        if role == Qt.ToolTipRole:
+            return f"{node.path}\n{node.count} 个结果"
+        return None
+# --- END ADDED ---
+
 class FolderTreeWidget(QWidget):
     """提供文件夹树视图，显示搜索结果的源文件夹结构"""
     
@@ -7986,7 +8887,8 @@ class FolderTreeWidget(QWidget):
         self.tree_view.setStyleSheet("border: 1px solid #D0D0D0;")
         
         # 创建模型
-        self.tree_model = QStandardItemModel()
+        # MODIFIED: 惰性文件夹树模型，节点展开时才创建子行
+        self.tree_model = FolderTreeModel(self)
         self.tree_view.setModel(self.tree_model)
         
         # 添加到布局
@@ -7995,23 +8897,17 @@ class FolderTreeWidget(QWidget):
         # 设置连接
         self.tree_view.clicked.connect(self._on_tree_item_clicked)
         
-        # 初始化变量
-        self.folder_paths = set()  # 存储已添加的文件夹路径
-        self.path_items = {}  # 存储路径到项目的映射
         
     def _on_tree_item_clicked(self, index):
         """当用户点击树中的项目时处理"""
-        item = self.tree_model.itemFromIndex(index)
-        if item and item.data():
-            folder_path = item.data()
+        folder_path = index.data(Qt.UserRole)
+        if folder_path:
             print(f"选择了文件夹: {folder_path}")
             self.folderSelected.emit(folder_path)
     
     def clear(self):
         """清除树视图中的所有项目"""
-        self.tree_model.clear()
-        self.folder_paths = set()
-        self.path_items = {}
+        self.tree_model.set_tree(FolderPrefixTree(), None)
     
     def build_folder_tree_from_results(self, results):
         """从搜索结果中构建文件夹树
@@ -8019,86 +8915,27 @@ class FolderTreeWidget(QWidget):
         Args:
             results: 搜索结果列表
         """
-        self.clear()
-        
-        # 收集所有唯一的文件夹路径
-        for result in results:
-            file_path = result.get('file_path', '')
-            if not file_path:
-                continue
-                
-            # 处理存档文件中的项目
-            if '::' in file_path:
-                # 对于存档内的文件，只显示存档文件所在的文件夹
-                archive_path = file_path.split('::', 1)[0]
-                folder_path = str(Path(archive_path).parent)
-            else:
-                folder_path = str(Path(file_path).parent)
-            
-            # 标准化路径
-            folder_path = normalize_path_for_display(folder_path)
-            self._add_folder_path(folder_path)
-        
-        # 展开所有顶层节点
-        self.tree_view.expandToDepth(0)
-        
-    def _add_folder_path(self, folder_path):
-        """添加文件夹路径到树中，确保创建完整的路径层次结构
+        # MODIFIED: 文件夹收集（存档成员取存档所在文件夹，标准化路径）与后处理线程共用
+        self.build_folder_tree(FolderPrefixTree(collect_result_folder_ids(results)), results)
+
+    def build_folder_tree(self, folder_tree, source_results):
+        """用已构建好的文件夹前缀树（可由后处理线程构建）显示文件夹树
         
         Args:
-            folder_path: 要添加的文件夹路径
+            folder_tree: FolderPrefixTree
+            source_results: 结果编号对应的结果列表
         """
-        if folder_path in self.folder_paths:
-            return
-            
-        self.folder_paths.add(folder_path)
+        self.tree_model.set_tree(folder_tree, source_results)
         
-        # 创建路径的各个部分
-        path = Path(folder_path)
-        parts = list(path.parts)
-        
-        # 找出根目录（盘符或最顶层目录）
-        root_part = parts[0]
-        
-        # 从根目录开始构建路径
-        current_path = root_part
-        
-        # 查找或创建根目录项目
-        root_item = None
-        for i in range(self.tree_model.rowCount()):
-            item = self.tree_model.item(i)
-            if item.text() == root_part:
-                root_item = item
-                break
-                
-        # 如果根目录不存在，创建它
-        if root_item is None:
-            root_item = QStandardItem(root_part)
-            root_item.setData(root_part)
-            self.tree_model.appendRow(root_item)
-            self.path_items[root_part] = root_item
-            
-        # 构建路径的其余部分
-        parent_item = root_item
-        for i in range(1, len(parts)):
-            current_path = os.path.join(current_path, parts[i])
-            
-            # 检查此部分是否已存在
-            child_exists = False
-            for j in range(parent_item.rowCount()):
-                child = parent_item.child(j)
-                if child.text() == parts[i]:
-                    parent_item = child
-                    child_exists = True
-                    break
-                    
-            # 如果不存在，创建它
-            if not child_exists:
-                new_item = QStandardItem(parts[i])
-                new_item.setData(current_path)
-                parent_item.appendRow(new_item)
-                parent_item = new_item
-                self.path_items[current_path] = new_item
+        # 展开所有顶层节点
+        self.tree_view.expandToDepth(0)
+
+    def result_ids_for(self, folder_path, results):
+        """返回文件夹（含子文件夹）中的结果编号（升序）；树不是由 results 构建的或文件夹不存在时返回 None"""
+        if self.tree_model.source_results is not results:
+            return None
+        node = self.tree_model.node_for_path(folder_path)
+        return node.subtree_ids() if node is not None else None
     
     def select_folder(self, folder_path):
         """选择指定的文件夹在树中
@@ -8106,9 +8943,9 @@ class FolderTreeWidget(QWidget):
         Args:
             folder_path: 要选择的文件夹路径
         """
-        if folder_path in self.path_items:
-            item = self.path_items[folder_path]
-            index = self.tree_model.indexFromItem(item)
+        # MODIFIED: 沿路径逐级加载子行后再选中
+        index = self.tree_model.index_for_path(folder_path)
+        if index.isValid():
             self.tree_view.setCurrentIndex(index)
             self.tree_view.scrollTo(index)
 
@@ -8136,31 +8973,13 @@ class IndexDirectoriesDialog(QDialog):
             # 获取主题名称
             theme_name = self.settings.value("ui/theme", "系统默认")
             
-            # 根据主题应用对应的复选框样式
-            if theme_name == "现代蓝" or theme_name == "系统默认":
-                checkbox_style = """
-                    QCheckBox::indicator:checked {
-                        image: url(checkmark_blue.png);
-                    }
-                """
-            elif theme_name == "现代绿":
-                checkbox_style = """
-                    QCheckBox::indicator:checked {
-                        image: url(checkmark_green.png);
-                    }
-                """
-            elif theme_name == "现代紫":
-                checkbox_style = """
-                    QCheckBox::indicator:checked {
-                        image: url(checkmark_purple.png);
-                    }
-                """
-            else:
-                checkbox_style = """
-                    QCheckBox::indicator:checked {
-                        image: url(checkmark_blue.png);
-                    }
-                """
+            # 根据主题应用对应的复选框样式（图片路径按主题缓存，未知主题使用蓝色）
+            checkmark_path = theme_resources.theme_image_path("checkmark", theme_name) or "checkmark_blue.png"
+            checkbox_style = f"""
+                QCheckBox::indicator:checked {{
+                    image: url("{checkmark_path.replace(os.sep, '/')}");
+                }}
+            """
                 
             # 应用样式到对话框中的所有复选框
             self.setStyleSheet(checkbox_style)
@@ -135,10 +135,10 @@ def test_manual_search_v2():
         if dialog.results_list.count() > 0:
             dialog.results_list.setFocus()
             dialog.results_list.setCurrentRow(0)
-            current_item = dialog.results_list.currentItem()
-            if current_item:
+            current_index = dialog.results_list.currentIndex()
+            if current_index.isValid():
                 print("   模拟在结果列表中按回车键")
-                dialog._on_item_activated(current_item)
+                dialog._on_item_activated(current_index)
         
         QTimer.singleShot(1000, lambda: test_help_dialog())
     
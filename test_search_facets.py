@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+索引内分面计数测试
+
+检查旧版模式（last_modified 没有列存储）的索引上，日期分面仍按修改日期分组
+"""
+
+import tempfile
+from datetime import datetime
+
+from whoosh import fields
+from whoosh.index import create_in
+
+import document_search
+
+
+def build_legacy_index(index_dir, timestamps):
+    """按模式版本 1 的字段定义建立索引（last_modified 为普通 NUMERIC，不可排序）"""
+    schema = fields.Schema(
+        path=fields.ID(stored=True, unique=True),
+        content=fields.TEXT(stored=True),
+        filename_text=fields.TEXT(stored=True),
+        structure_map=fields.TEXT(stored=True),
+        last_modified=fields.NUMERIC(stored=True),
+        file_size=fields.NUMERIC(stored=True),
+        file_type=fields.TEXT(stored=True),
+        indexed_with_ocr=fields.BOOLEAN(stored=True)
+    )
+    ix = create_in(index_dir, schema)
+    writer = ix.writer()
+    for i, mtime in enumerate(timestamps):
+        writer.add_document(path=f"{index_dir}/doc{i}.txt", content="分面 测试", filename_text=f"doc{i}",
+                            last_modified=mtime, file_size=1, file_type=".txt")
+    writer.commit()
+    ix.close()
+
+
+def test_date_facet_on_legacy_schema():
+    """旧版索引的日期分面按天计数，而不是全部落入“未知日期”"""
+    timestamps = [int(datetime(2024, 1, 1, 12).timestamp())] * 2 + [int(datetime(2024, 3, 5, 12).timestamp())]
+    with tempfile.TemporaryDirectory() as index_dir:
+        build_legacy_index(index_dir, timestamps)
+        assert document_search.get_index_schema_version(index_dir) == 1
+
+        facets = document_search.search_facets("分面", index_dir, search_mode='fuzzy', facet_names=('date',))
+
+    assert facets['date'] == {'2024-01-01': 2, '2024-03-05': 1}
+    assert facets['total_docs'] == 3
+
+
+if __name__ == "__main__":
+    test_date_facet_on_legacy_schema()
+    print("日期分面测试通过")
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+主题资源缓存模块
+
+主题样式表（*_style.qss）和图片资源（down_arrow_*.png、checkmark_*.png、radio_checked_*.png、
+应用图标）在进程内只从磁盘读取一次，所有窗口和对话框共享：
+
+- 样式表读取后把 url(xxx.png) 预先替换为资源的绝对路径（开发环境和打包环境一致，
+  不再依赖当前工作目录），按主题缓存替换后的文本；
+- 图片按（种类, 主题）解析一次路径，QIcon/QPixmap 按路径缓存。
+
+切换主题和创建对话框时直接使用缓存，不再访问文件系统。
+"""
+
+import os
+import re
+import sys
+import threading
+
+from PySide6.QtGui import QIcon, QPixmap
+
+DEFAULT_THEME = "现代蓝"
+
+# 主题名称 -> 样式表文件
+THEME_STYLE_FILES = {
+    "现代蓝": "blue_style.qss",
+    "现代紫": "purple_style.qss",
+    "现代红": "red_style.qss",
+    "现代橙": "orange_style.qss",
+    "现代绿": "green_style.qss",
+}
+
+# 主题名称 -> 主题图片后缀（down_arrow_blue.png 等）
+THEME_IMAGE_SUFFIXES = {
+    "现代蓝": "blue",
+    "系统默认": "blue",
+    "现代紫": "purple",
+    "现代红": "red",
+    "现代橙": "orange",
+    "现代绿": "green",
+}
+
+# 随主题变化的图片种类；样式表中引用不带主题后缀的名称时替换为当前主题的图片
+THEMED_IMAGES = ("down_arrow", "checkmark", "radio_checked")
+
+_URL_PATTERN = re.compile(r"""url\(\s*["']?([^"')]+?)["']?\s*\)""")
+
+_lock = threading.Lock()
+_stylesheets = {}
+_image_paths = {}
+_icons = {}
+_pixmaps = {}
+
+
+def resource_base_path() -> str:
+    """资源文件所在目录（PyInstaller 打包环境为 sys._MEIPASS）"""
+    if getattr(sys, 'frozen', False):
+        return sys._MEIPASS
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def resource_path(relative_path: str) -> str:
+    return os.path.join(resource_base_path(), relative_path)
+
+
+def _theme_suffix(theme_name: str) -> str:
+    return THEME_IMAGE_SUFFIXES.get(theme_name, THEME_IMAGE_SUFFIXES[DEFAULT_THEME])
+
+
+def _substitute_urls(stylesheet: str, theme_name: str) -> str:
+    """把样式表中的相对图片引用替换为绝对路径（Qt 资源路径和绝对路径保持不变）"""
+    suffix = _theme_suffix(theme_name)
+
+    def replace(match):
+        name = match.group(1)
+        if name.startswith(':') or os.path.isabs(name):
+            return match.group(0)
+        stem, ext = os.path.splitext(name)
+        if stem in THEMED_IMAGES:
+            name = f"{stem}_{suffix}{ext}"
+        return f'url("{resource_path(name).replace(os.sep, "/")}")'
+
+    return _URL_PATTERN.sub(replace, stylesheet)
+
+
+def get_theme_stylesheet(theme_name: str) -> str:
+    """
+    返回主题样式表（图片路径已替换），首次调用时读取文件
+
+    Raises:
+        OSError: 样式表文件不存在或无法读取（失败不缓存，下次调用重新尝试）
+    """
+    with _lock:
+        stylesheet = _stylesheets.get(theme_name)
+    if stylesheet is not None:
+        return stylesheet
+
+    style_file = THEME_STYLE_FILES.get(theme_name, THEME_STYLE_FILES[DEFAULT_THEME])
+    with open(resource_path(style_file), "r", encoding="utf-8") as f:
+        stylesheet = _substitute_urls(f.read(), theme_name)
+    with _lock:
+        _stylesheets[theme_name] = stylesheet
+    return stylesheet
+
+
+def theme_image_path(kind: str, theme_name: str) -> str | None:
+    """返回主题图片（如 down_arrow_blue.png）的绝对路径，文件不存在时返回 None"""
+    key = (kind, _theme_suffix(theme_name))
+    with _lock:
+        if key in _image_paths:
+            return _image_paths[key]
+    path = resource_path(f"{kind}_{key[1]}.png")
+    if not os.path.exists(path):
+        path = None
+    with _lock:
+        _image_paths[key] = path
+    return path
+
+
+def get_icon(path: str) -> QIcon:
+    """按路径缓存的 QIcon（需在界面线程调用）"""
+    icon = _icons.get(path)
+    if icon is None:
+        icon = QIcon(path)
+        _icons[path] = icon
+    return icon
+
+
+def get_pixmap(path: str) -> QPixmap:
+    """按路径缓存的 QPixmap（需在界面线程调用）"""
+    pixmap = _pixmaps.get(path)
+    if pixmap is None:
+        pixmap = QPixmap(path)
+        _pixmaps[path] = pixmap
+    return pixmap
+
+
+def get_theme_icon(kind: str, theme_name: str) -> QIcon | None:
+    """主题图片对应的 QIcon，图片不存在时返回 None"""
+    path = theme_image_path(kind, theme_name)
+    return get_icon(path) if path else None
+
+
+def get_theme_pixmap(kind: str, theme_name: str) -> QPixmap | None:
+    """主题图片对应的 QPixmap，图片不存在时返回 None"""
+    path = theme_image_path(kind, theme_name)
+    return get_pixmap(path) if path else None
+
+
+def preload_theme(theme_name: str):
+    """预先读取主题的样式表和图片路径（例如在托盘空闲时调用），之后切换到该主题不再读盘"""
+    try:
+        get_theme_stylesheet(theme_name)
+    except OSError as e:
+        print(f"预加载主题样式表失败 ({theme_name}): {e}")
+    for kind in THEMED_IMAGES:
+        theme_image_path(kind, theme_name)
+
+
+def clear_cache():
+    """清空缓存（主题文件在运行时被修改后调用）"""
+    with _lock:
+        _stylesheets.clear()
+        _image_paths.clear()
+    _icons.clear()
+    _pixmaps.clear()
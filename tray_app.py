@@ -15,7 +15,8 @@ import subprocess
 import webbrowser
 
 # 导入资源路径解析器
-from search_gui_pyside import get_resource_path, ORGANIZATION_NAME, APPLICATION_NAME
+from app_identity import ORGANIZATION_NAME, APPLICATION_NAME
+from theme_resources import resource_path
 
 class TrayIcon(QSystemTrayIcon):
     """系统托盘图标类"""
@@ -32,7 +33,7 @@ class TrayIcon(QSystemTrayIcon):
         super().__init__(parent)
         
         # 设置托盘图标
-        icon_path = get_resource_path("app_icon.ico")
+        icon_path = resource_path("app_icon.ico")
         if os.path.exists(icon_path):
             self.setIcon(QIcon(icon_path))
         else:
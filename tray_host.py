@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+托盘常驻进程的宿主对象
+
+托盘优先启动：托盘图标和热键监听最先就绪，主窗口（TrayMainWindow 及其主题、对话框控件、
+工作线程）在第一次需要显示时才创建。快捷搜索只依赖本对象提供的设置、索引目录和打开文件功能，
+整个快捷搜索流程不会实例化主窗口。
+
+本模块不导入 search_gui_pyside，主窗口模块在首次打开主窗口时才导入。
+"""
+
+from pathlib import Path
+
+from PySide6.QtCore import QObject, QSettings, QTimer, QUrl, Signal, Slot
+from PySide6.QtGui import QDesktopServices
+from PySide6.QtWidgets import QApplication
+
+from app_identity import ORGANIZATION_NAME, APPLICATION_NAME
+from lazy_imports import timed_import
+import perf_trace
+from quick_search_controller import QuickSearchController
+
+# 主窗口未创建时，轻量级搜索控制器回退搜索的最长等待时间（秒）
+FALLBACK_SEARCH_TIMEOUT = 15
+# 回退搜索在共享搜索服务中的通道名：新查询取代本通道中超时未完成的旧查询
+FALLBACK_SEARCH_CHANNEL = "tray_quick_search"
+
+
+class TrayHost(QObject):
+    """托盘进程的宿主：持有设置、快捷搜索控制器和空闲索引维护，按需创建主窗口
+
+    轻量级搜索控制器把本对象当作"主窗口"使用（settings、_current_index_dir、open_file、
+    _perform_search、worker），这些接口在主窗口不存在时都不会创建主窗口。
+    """
+
+    mainWindowCreated = Signal(object)  # 主窗口首次创建完成（TrayMainWindow）
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.settings = QSettings(ORGANIZATION_NAME, APPLICATION_NAME)
+        perf_trace.set_enabled(self.settings.value(perf_trace.SETTINGS_KEY, True, type=bool))
+        self.tray_icon = None
+        self.hotkey_manager = None
+        self.index_maintenance_scheduler = None
+        self._window = None
+        self._pending_maintenance_report = None
+
+        self.quick_search_controller = QuickSearchController(self)
+        self.quick_search_controller.show_main_window_signal.connect(self._handle_show_main_window_from_quick_search)
+
+        # 空闲索引维护依赖 Whoosh 和 document_search，事件循环开始后再创建，不拖慢托盘出现
+        QTimer.singleShot(0, self._setup_index_maintenance)
+
+    # --- 主窗口 ---
+    @property
+    def window(self):
+        """已创建的主窗口，尚未创建时为 None（不会触发创建）"""
+        return self._window
+
+    @property
+    def worker(self):
+        """主窗口的搜索工作对象；主窗口未创建时为 None（快捷搜索预热缓存时使用）"""
+        return getattr(self._window, 'worker', None)
+
+    def ensure_main_window(self):
+        """返回主窗口，第一次调用时导入主窗口模块并创建"""
+        if self._window is None:
+            print("首次打开主窗口，正在创建...")
+            with timed_import("main_window_tray (search_gui_pyside)"):
+                from main_window_tray import TrayMainWindow
+            with timed_import("创建主窗口"):
+                window = TrayMainWindow(host=self)
+            self._window = window
+            if self._pending_maintenance_report is not None:
+                window._on_index_maintenance_finished(self._pending_maintenance_report)
+                self._pending_maintenance_report = None
+            print("主窗口创建成功")
+            self.mainWindowCreated.emit(window)
+        return self._window
+
+    def set_tray_icon(self, tray_icon):
+        self.tray_icon = tray_icon
+        if self._window is not None:
+            self._window.set_tray_icon(tray_icon)
+
+    def set_hotkey_manager(self, hotkey_manager):
+        self.hotkey_manager = hotkey_manager
+        if self._window is not None:
+            self._window.hotkey_manager = hotkey_manager
+
+    def show_main_window(self):
+        window = self.ensure_main_window()
+        window.showNormal()
+        window.activateWindow()
+
+    def hide_main_window(self):
+        if self._window is not None:
+            self._window.hide()
+
+    @Slot(str)
+    def _handle_show_main_window_from_quick_search(self, query):
+        self.ensure_main_window()._handle_show_main_window_from_quick_search(query)
+
+    def main_window_closed(self):
+        """主窗口真正关闭（非最小化到托盘）时退出程序，与主窗口常驻时的行为一致"""
+        QApplication.quit()
+
+    def shutdown(self):
+        """退出前停止后台维护并关闭主窗口"""
+        if self.index_maintenance_scheduler is not None:
+            self.index_maintenance_scheduler.stop()
+        if self._window is not None:
+            self._window.force_close()
+
+    # --- 快捷搜索 ---
+    def show_quick_search_dialog(self, initial_query=None):
+        """显示轻量级搜索对话框（不创建主窗口）"""
+        if self._window is not None:
+            self._window.show_quick_search_dialog(initial_query)
+            return
+        self.quick_search_controller.show_quick_search(initial_query)
+        self.quick_search_controller.update_theme(self.settings.value("ui/theme", "现代蓝"))
+
+    def _current_index_dir(self):
+        """返回当前设置的索引目录"""
+        default_index_path = str(Path.home() / "Documents" / "DocumentSearchIndex")
+        return self.settings.value("indexing/indexDirectory", default_index_path)
+
+    def open_file(self, path):
+        """用系统默认程序打开文件或文件夹"""
+        if self._window is not None:
+            self._window.open_file(path)
+            return
+        if not QDesktopServices.openUrl(QUrl.fromLocalFile(path)):
+            print(f"打开文件失败: {path}")
+
+    def _perform_search(self, query, max_results=50, quick_search=False, search_scope="fulltext"):
+        """供轻量级搜索控制器的回退路径调用
+
+        主窗口已创建时沿用主窗口的搜索流程；否则直接在共享搜索服务中搜索，不创建主窗口。
+        """
+        if self._window is not None:
+            return self._window._perform_search(query, max_results, quick_search, search_scope)
+        try:
+            import document_search
+            source_dirs = self.settings.value("indexing/sourceDirectories", [], type=list)
+            future = document_search.get_optimized_search_engine().submit(
+                query, self._current_index_dir(),
+                channel=FALLBACK_SEARCH_CHANNEL,
+                search_mode='phrase',
+                search_scope=search_scope,
+                current_source_dirs=source_dirs or None,
+                limit=max_results)
+            return future.result(timeout=FALLBACK_SEARCH_TIMEOUT)
+        except Exception as e:
+            print(f"托盘搜索失败: {e}")
+            return []
+
+    # --- 空闲索引维护 ---
+    def _setup_index_maintenance(self):
+        from index_maintenance import IndexMaintenanceScheduler
+
+        self.index_maintenance_scheduler = IndexMaintenanceScheduler(
+            self._current_index_dir, self._is_idle_for_maintenance, self)
+        self.index_maintenance_scheduler.maintenanceFinished.connect(self._on_index_maintenance_finished)
+        if self.settings.value("indexing/idleMaintenance", True, type=bool):
+            self.index_maintenance_scheduler.start()
+
+    def _is_idle_for_maintenance(self):
+        """托盘空闲状态：主窗口（如已创建）和快捷搜索窗口都已隐藏，且没有进行中的搜索或索引"""
+        window = self._window
+        if window is not None and (window.isVisible() or getattr(window, 'is_busy', False)
+                                   or getattr(window, '_search_in_progress', False)):
+            return False
+        dialog = getattr(self.quick_search_controller, 'dialog', None)
+        if dialog is not None and dialog.isVisible():
+            return False
+        return True
+
+    @Slot(dict)
+    def _on_index_maintenance_finished(self, report):
+        """报告写入主窗口状态栏；主窗口尚未创建时保留到创建后再显示"""
+        if self._window is not None:
+            self._window._on_index_maintenance_finished(report)
+        elif report.get('optimized'):
+            self._pending_maintenance_report = report
@@ -12,7 +12,7 @@ from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QCheckBox,
 from PySide6.QtCore import QSettings, Qt, Signal
 
 # 导入主程序的常量
-from search_gui_pyside import ORGANIZATION_NAME, APPLICATION_NAME
+from app_identity import ORGANIZATION_NAME, APPLICATION_NAME
 
 
 class TraySettingsDialog(QDialog):
@@ -12,6 +12,9 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
+# 最先导入，启动耗时报告从这里开始计时
+import lazy_imports
+
 def main():
     """主函数 - 启动文智搜托盘版应用程序"""
     try:
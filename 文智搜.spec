@@ -85,6 +85,7 @@ a = Analysis(
         'PIL',
         'pytesseract',
         'pdf2image',
+        'pdf2image.exceptions',  # document_search 延迟导入（importlib），需显式列出
         'PyPDF2',
         'fitz', # PyMuPDF
         
@@ -95,6 +96,7 @@ a = Analysis(
         'markdown',
         'bs4',
         'striprtf',
+        'striprtf.striprtf',
         'email',
         'chardet',
         'extract_msg',
@@ -138,6 +140,8 @@ a = Analysis(
         # 应用程序模块
         'main_window_tray',
         'main_tray',
+        'tray_host',
+        'app_identity',
         'tray_app',
         'hotkey_manager',
         'quick_search_dialog',